@@ -0,0 +1,347 @@
+"""Асинхронный опрос серверов Source по протоколу A2S"""
+import asyncio
+import bz2
+import struct
+import time
+import zlib
+from typing import (AsyncIterable, AsyncIterator, Callable, Dict, Iterable, List,
+                    NamedTuple, Optional, Set, Tuple)
+
+DEFAULT_PORT = 27015
+DEFAULT_TIMEOUT = 1.5
+DEFAULT_CONCURRENCY = 200
+# Как часто query_many проверяет флаг отмены, сек
+CANCEL_POLL = 0.1
+
+HEADER = b"\xff\xff\xff\xff"
+SPLIT_HEADER = b"\xfe\xff\xff\xff"
+A2S_INFO = HEADER + b"TSource Engine Query\x00"
+A2S_PLAYER = HEADER + b"U"
+A2S_RULES = HEADER + b"V"
+# Первый запрос игроков и правил идёт с пустым challenge
+NO_CHALLENGE = b"\xff\xff\xff\xff"
+S2C_CHALLENGE = 0x41
+S2A_INFO = 0x49
+S2A_PLAYER = 0x44
+S2A_RULES = 0x45
+
+# Больше частей ответа сервер не присылает (список правил - самый длинный)
+MAX_SPLIT_PACKETS = 32
+_SPLIT = struct.Struct("<lBBh")
+
+# Сервер может ответить challenge несколько раз подряд, дальше не пытаемся
+MAX_CHALLENGES = 3
+
+
+class A2SError(Exception):
+    """Некорректный или неожиданный ответ сервера"""
+
+
+class ServerInfo(NamedTuple):
+    address: str
+    name: str
+    map: str
+    folder: str
+    game: str
+    players: int
+    max_players: int
+    bots: int
+    ping: float
+
+    def players_text(self) -> str:
+        return f"{self.players}/{self.max_players}"
+
+    def as_row(self) -> Tuple[str, str, str, str, str]:
+        """Строка в формате колонок servers_tree"""
+        return (self.name, self.players_text(), self.map,
+                str(round(self.ping)), self.address)
+
+
+class PlayerInfo(NamedTuple):
+    name: str
+    score: int
+    duration: float
+
+
+class _Reader:
+    """Последовательное чтение полей из пакета"""
+
+    def __init__(self, data: bytes, offset: int = 0):
+        self.data = data
+        self.offset = offset
+
+    def _unpack(self, fmt: str):
+        try:
+            value = struct.unpack_from(fmt, self.data, self.offset)[0]
+        except struct.error as e:
+            raise A2SError(f"Обрезанный пакет: {e}")
+        self.offset += struct.calcsize(fmt)
+        return value
+
+    def byte(self) -> int:
+        return self._unpack("<B")
+
+    def short(self) -> int:
+        return self._unpack("<h")
+
+    def long(self) -> int:
+        return self._unpack("<l")
+
+    def float(self) -> float:
+        return self._unpack("<f")
+
+    def remaining(self) -> int:
+        return len(self.data) - self.offset
+
+    def string(self) -> str:
+        end = self.data.find(b"\x00", self.offset)
+        if end == -1:
+            raise A2SError("Строка без завершающего нуля")
+        value = self.data[self.offset:end].decode("utf-8", errors="replace")
+        self.offset = end + 1
+        return value
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """Разбор строки "host:port" (порт по умолчанию 27015)"""
+    host, sep, port = str(address).strip().rpartition(":")
+    if not sep:
+        return port, DEFAULT_PORT
+    return host, int(port) if port else DEFAULT_PORT
+
+
+def parse_info(address: str, payload: bytes, ping: float) -> ServerInfo:
+    """Разбор тела ответа S2A_INFO (без заголовка и типа пакета)"""
+    reader = _Reader(payload)
+    reader.byte()  # версия протокола
+    name = reader.string()
+    map_name = reader.string()
+    folder = reader.string()
+    game = reader.string()
+    reader.short()  # appid
+    players = reader.byte()
+    max_players = reader.byte()
+    bots = reader.byte()
+    return ServerInfo(address, name, map_name, folder, game,
+                      players, max_players, bots, ping)
+
+
+def parse_players(payload: bytes) -> List[PlayerInfo]:
+    """Разбор тела ответа S2A_PLAYER.
+
+    Серверы с большим числом игроков обрезают список, не исправляя
+    счётчик, поэтому чтение останавливается на конце пакета.
+    """
+    reader = _Reader(payload)
+    count = reader.byte()
+    players = []
+    for _ in range(count):
+        if not reader.remaining():
+            break
+        reader.byte()  # индекс
+        players.append(PlayerInfo(reader.string(), reader.long(), reader.float()))
+    return players
+
+
+def parse_rules(payload: bytes) -> Dict[str, str]:
+    """Разбор тела ответа S2A_RULES (без заголовка и типа пакета)"""
+    reader = _Reader(payload)
+    count = reader.short() & 0xFFFF
+    rules = {}
+    for _ in range(count):
+        if not reader.remaining():
+            break
+        name = reader.string()
+        rules[name] = reader.string()
+    return rules
+
+
+def join_split(packets: List[bytes]) -> bytes:
+    """Сборка ответа из частей формата Source (заголовок 0xFFFFFFFE).
+
+    Части могут прийти в любом порядке. Если у идентификатора поднят
+    старший бит, ответ сжат bzip2 и в первой части указаны размер и CRC32.
+    """
+    parts: Dict[int, bytes] = {}
+    request_id = total = None
+    compressed = False
+    for packet in packets:
+        try:
+            request_id, total, number, _size = _SPLIT.unpack_from(packet, 4)
+        except struct.error as e:
+            raise A2SError(f"Обрезанный пакет: {e}")
+        compressed = request_id < 0
+        parts[number] = packet[4 + _SPLIT.size:]
+    if total is None or set(parts) != set(range(total)):
+        raise A2SError("Получены не все части ответа")
+    data = b"".join(parts[i] for i in range(total))
+    if compressed:
+        try:
+            size, crc = struct.unpack_from("<lL", data)
+            data = bz2.decompress(data[8:])
+        except (struct.error, OSError, ValueError) as e:
+            raise A2SError(f"Не удалось распаковать ответ: {e}")
+        if len(data) != size or zlib.crc32(data) != crc:
+            raise A2SError("Контрольная сумма сжатого ответа не совпадает")
+    return data
+
+
+class _QueryProtocol(asyncio.DatagramProtocol):
+    """Складывает входящие датаграммы в очередь"""
+
+    def __init__(self):
+        self.packets: asyncio.Queue = asyncio.Queue()
+
+    def datagram_received(self, data, addr):
+        self.packets.put_nowait(data)
+
+    def error_received(self, exc):
+        self.packets.put_nowait(exc)
+
+    async def recv(self) -> bytes:
+        packet = await self.packets.get()
+        if isinstance(packet, Exception):
+            raise packet
+        return packet
+
+    async def recv_message(self) -> bytes:
+        """Один ответ целиком: разбитый на части собирается по идентификатору"""
+        packet = await self.recv()
+        if packet[:4] != SPLIT_HEADER:
+            return packet
+        if len(packet) < 4 + _SPLIT.size:
+            raise A2SError("Обрезанный заголовок части ответа")
+        request_id, total, _, _ = _SPLIT.unpack_from(packet, 4)
+        if not 0 < total <= MAX_SPLIT_PACKETS:
+            raise A2SError(f"Недопустимое число частей ответа: {total}")
+        packets: Dict[int, bytes] = {}
+        while True:
+            if packet[:4] == SPLIT_HEADER and len(packet) >= 4 + _SPLIT.size:
+                part_id, _, number, _ = _SPLIT.unpack_from(packet, 4)
+                # Части другого ответа (например, до challenge) пропускаем
+                if part_id == request_id:
+                    packets[number] = packet
+            if len(packets) >= total:
+                return join_split(list(packets.values()))
+            packet = await self.recv()
+
+
+async def _exchange(address: str, request: bytes, answers: Callable[[int], bool],
+                    first: Optional[bytes] = None) -> Tuple[bytes, float]:
+    """Отправка запроса с обработкой challenge, возвращает (ответ, RTT в мс).
+
+    first - первый пакет, если он отличается от запроса (A2S_PLAYER и
+    A2S_RULES шлются с пустым challenge); challenge дописывается к request.
+    """
+    host, port = parse_address(address)
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(
+        _QueryProtocol, remote_addr=(host, port))
+    try:
+        payload = first or request
+        for _ in range(MAX_CHALLENGES + 1):
+            sent = time.perf_counter()
+            transport.sendto(payload)
+            data = await protocol.recv_message()
+            rtt = (time.perf_counter() - sent) * 1000
+            if data[:4] != HEADER or len(data) < 5:
+                raise A2SError("Неизвестный формат ответа")
+            kind = data[4]
+            if kind == S2C_CHALLENGE:
+                payload = request + data[5:9]
+                continue
+            if answers(kind):
+                return data[5:], rtt
+            raise A2SError(f"Неожиданный тип ответа: {kind:#x}")
+        raise A2SError("Сервер не принял challenge")
+    finally:
+        transport.close()
+
+
+async def query_info(address: str, timeout: float = DEFAULT_TIMEOUT) -> ServerInfo:
+    """Запрос A2S_INFO к одному серверу"""
+    payload, rtt = await asyncio.wait_for(
+        _exchange(address, A2S_INFO, lambda kind: kind == S2A_INFO), timeout)
+    return parse_info(address, payload, rtt)
+
+
+async def query_players(address: str, timeout: float = DEFAULT_TIMEOUT) -> List[PlayerInfo]:
+    """Запрос A2S_PLAYER: список игроков со счётом и временем на сервере"""
+    payload, _ = await asyncio.wait_for(
+        _exchange(address, A2S_PLAYER, lambda kind: kind == S2A_PLAYER,
+                  first=A2S_PLAYER + NO_CHALLENGE), timeout)
+    return parse_players(payload)
+
+
+async def query_rules(address: str, timeout: float = DEFAULT_TIMEOUT) -> Dict[str, str]:
+    """Запрос A2S_RULES: консольные переменные, которые сервер отдаёт наружу"""
+    payload, _ = await asyncio.wait_for(
+        _exchange(address, A2S_RULES, lambda kind: kind == S2A_RULES,
+                  first=A2S_RULES + NO_CHALLENGE), timeout)
+    return parse_rules(payload)
+
+
+async def query_stream(addresses: AsyncIterable[str],
+                       timeout: float = DEFAULT_TIMEOUT,
+                       concurrency: int = DEFAULT_CONCURRENCY,
+                       on_result: Optional[Callable[[str, Optional[ServerInfo]], None]] = None,
+                       cancel=None) -> Dict[str, Optional[ServerInfo]]:
+    """Опрос адресов по мере их поступления из асинхронного источника.
+
+    Одновременно в полёте не больше concurrency запросов, источник
+    читается только когда есть свободный слот. Недоступные серверы
+    получают None. on_result вызывается по мере готовности ответов.
+    cancel - объект с методом is_set(); после его установки незавершённые
+    запросы прерываются и возвращаются уже полученные результаты.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    results: Dict[str, Optional[ServerInfo]] = {}
+    tasks: Set[asyncio.Future] = set()
+
+    async def worker(address: str):
+        try:
+            info = await query_info(address, timeout)
+        except (asyncio.TimeoutError, OSError, ValueError, A2SError):
+            info = None
+        finally:
+            semaphore.release()
+        results[address] = info
+        if on_result:
+            on_result(address, info)
+
+    async def feed():
+        async for address in addresses:
+            await semaphore.acquire()
+            task = asyncio.ensure_future(worker(address))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        while tasks:
+            await asyncio.wait(set(tasks))
+
+    feeder = asyncio.ensure_future(feed())
+    while not feeder.done():
+        await asyncio.wait({feeder}, timeout=CANCEL_POLL if cancel is not None else None)
+        if cancel is not None and cancel.is_set():
+            feeder.cancel()
+            for task in list(tasks):
+                task.cancel()
+            await asyncio.gather(feeder, *tasks, return_exceptions=True)
+            return results
+    feeder.result()
+    return results
+
+
+async def _iterate(items: Iterable[str]) -> AsyncIterator[str]:
+    for item in items:
+        yield item
+
+
+async def query_many(addresses: Iterable[str], **kwargs) -> Dict[str, Optional[ServerInfo]]:
+    """Параллельный опрос списка адресов (параметры как у query_stream)"""
+    unique = dict.fromkeys(str(a) for a in addresses)
+    return await query_stream(_iterate(unique), **kwargs)
+
+
+def query_servers(addresses: Iterable[str], **kwargs) -> Dict[str, Optional[ServerInfo]]:
+    """Синхронная обёртка над query_many для вызова вне event loop"""
+    return asyncio.run(query_many(addresses, **kwargs))
@@ -0,0 +1,203 @@
+"""Наборы аддонов: включение и выключение переименованием в соседнюю папку.
+
+Выключенный аддон переносится из garrysmod/addons в garrysmod/addons_disabled.
+Обе папки лежат на одном диске, поэтому перенос - это один атомарный
+os.rename, без копирования. При смене набора переносится только разница
+с текущим состоянием. Перед переносами план пишется в журнал; если
+лаунчер упал посередине, recover() возвращает всё как было до смены.
+Смена и откат идут под блокировкой: потоком внутри процесса и файлом
+в addons_disabled, чтобы окно и CLI не переносили аддоны одновременно.
+"""
+import json
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+DISABLED_DIR = "addons_disabled"
+# Журнал лежит в папке выключенных аддонов: точка в имени скрывает его из списка
+JOURNAL_FILE = ".switch.json"
+JOURNAL_VERSION = 1
+LOCK_FILE = ".switch.lock"
+# Набор, в котором включены все аддоны, в том числе выключенные раньше
+ALL_ADDONS = "*"
+
+
+class SwitchError(RuntimeError):
+    """Набор сейчас сменить нельзя (например, запущена игра)"""
+
+
+class SwitchResult(NamedTuple):
+    enabled: List[str]
+    disabled: List[str]
+    missing: List[str]      # есть в наборе, но нет ни в одной из папок
+
+
+def _is_addon(entry: os.DirEntry) -> bool:
+    if entry.name.startswith("."):
+        return False
+    return entry.is_dir() or entry.name.lower().endswith(".gma")
+
+
+# Смены в разных потоках одного процесса (flock между ними не действует на Windows)
+_switch_lock = threading.Lock()
+
+
+def _lock_file(f, wait: bool) -> bool:
+    """Блокировка файла ОС; снимается сама, если процесс упал"""
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if wait else msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if wait else fcntl.LOCK_NB))
+    except OSError:
+        if wait:
+            raise
+        return False
+    return True
+
+
+def _unlock_file(f):
+    if sys.platform == "win32":
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _listing(path: str) -> Set[str]:
+    try:
+        with os.scandir(path) as entries:
+            return {entry.name for entry in entries if _is_addon(entry)}
+    except FileNotFoundError:
+        return set()
+
+
+class AddonSwitcher:
+    """Включение набора аддонов в одной папке addons.
+
+    Работает только с элементами addons: предметы Мастерской Steam
+    скачает заново, если их папки пропадут.
+    """
+
+    def __init__(self, addons_path: str):
+        self.addons_path = addons_path
+        self.staging = os.path.join(os.path.dirname(addons_path), DISABLED_DIR)
+        self.journal_path = os.path.join(self.staging, JOURNAL_FILE)
+        self.lock_path = os.path.join(self.staging, LOCK_FILE)
+
+    @contextmanager
+    def locked(self, wait: bool = True) -> Iterator[bool]:
+        """Исключительное право на переносы; при wait=False - False, если занято"""
+        if not _switch_lock.acquire(blocking=wait):
+            yield False
+            return
+        try:
+            os.makedirs(self.staging, exist_ok=True)
+            with open(self.lock_path, "a+b") as f:
+                if not _lock_file(f, wait):
+                    yield False
+                    return
+                try:
+                    yield True
+                finally:
+                    _unlock_file(f)
+        finally:
+            _switch_lock.release()
+
+    def state(self) -> Tuple[Set[str], Set[str]]:
+        """Имена (включённых, выключенных) аддонов"""
+        return _listing(self.addons_path), _listing(self.staging)
+
+    def plan(self, wanted: Optional[Iterable[str]]) -> Tuple[List[Tuple[str, str]], List[str]]:
+        """Переносы (откуда, куда) до набора wanted (None - все) и отсутствующие имена"""
+        enabled, disabled = self.state()
+        # Аддон с одним именем в обеих папках не трогаем: перенос затёр бы другой
+        clash = enabled & disabled
+        if wanted is None:
+            wanted = enabled | disabled
+        wanted = set(wanted)
+        moves = [(os.path.join(self.addons_path, name), os.path.join(self.staging, name))
+                 for name in sorted(enabled - wanted - clash)]
+        moves += [(os.path.join(self.staging, name), os.path.join(self.addons_path, name))
+                  for name in sorted((disabled & wanted) - clash)]
+        return moves, sorted(wanted - enabled - disabled)
+
+    def apply(self, wanted: Optional[Iterable[str]]) -> SwitchResult:
+        """Привести addons к набору wanted; при ошибке сделанные переносы откатываются"""
+        with self.locked():
+            self._recover()
+            return self._apply(wanted)
+
+    def _apply(self, wanted: Optional[Iterable[str]]) -> SwitchResult:
+        moves, missing = self.plan(wanted)
+        if not moves:
+            return SwitchResult([], [], missing)
+        self._write_journal(moves)
+        done = []
+        try:
+            for source, target in moves:
+                os.rename(source, target)
+                done.append((source, target))
+        except OSError:
+            # Например, игра держит открытым файл аддона
+            self._undo(done)
+            os.remove(self.journal_path)
+            raise
+        os.remove(self.journal_path)
+        names = [(os.path.dirname(target), os.path.basename(target)) for _, target in moves]
+        return SwitchResult([name for folder, name in names if folder == self.addons_path],
+                            [name for folder, name in names if folder == self.staging],
+                            missing)
+
+    def recover(self, wait: bool = True) -> int:
+        """Откат прерванной смены набора по журналу; возвращает число возвращённых аддонов.
+
+        При wait=False ничего не делает, если смена идёт прямо сейчас.
+        """
+        # Без журнала откатывать нечего: папку addons_disabled не создаём зря
+        if not os.path.exists(self.journal_path):
+            return 0
+        with self.locked(wait) as held:
+            return self._recover() if held else 0
+
+    def _recover(self) -> int:
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            moves = [tuple(move) for move in data["moves"]] if data.get("version") == JOURNAL_VERSION else []
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ошибка чтения журнала аддонов: {e}")
+            moves = []
+        # Каждый перенос атомарен: аддон лежит либо на старом месте, либо на новом
+        restored = self._undo([(s, t) for s, t in moves
+                               if os.path.lexists(t) and not os.path.lexists(s)])
+        os.remove(self.journal_path)
+        return restored
+
+    def _undo(self, moves: List[Tuple[str, str]]) -> int:
+        restored = 0
+        for source, target in reversed(moves):
+            try:
+                os.rename(target, source)
+                restored += 1
+            except OSError as e:
+                print(f"Ошибка возврата аддона {target}: {e}")
+        return restored
+
+    def _write_journal(self, moves: List[Tuple[str, str]]):
+        # Журнал должен оказаться на диске раньше первого переноса
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": JOURNAL_VERSION, "moves": moves}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
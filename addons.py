@@ -0,0 +1,378 @@
+"""Индекс аддонов Garry's Mod: папки и пакеты .gma в addons и Workshop"""
+import json
+import mmap
+import os
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+INDEX_FILE = "addon_index.json"
+INDEX_VERSION = 1
+SCAN_WORKERS = 8
+
+GMA_IDENT = b"GMAD"
+# Новый Workshop хранит пакеты как .bin, старый - как *_legacy.gma
+PACKAGE_EXTENSIONS = (".gma", ".bin")
+# Размер и CRC файла плюс номер следующей записи таблицы
+_FILE_TAIL = struct.Struct("<qII")
+
+
+class GmaError(ValueError):
+    """Файл не является пакетом GMA или его заголовок повреждён"""
+
+
+class GmaFile(NamedTuple):
+    name: str
+    size: int
+    crc: int
+
+
+class GmaHeader(NamedTuple):
+    version: int
+    steamid: int
+    timestamp: int
+    required: Tuple[str, ...]
+    name: str
+    description: str
+    author: str
+    addon_version: int
+    files: Tuple[GmaFile, ...]
+    data_offset: int
+
+
+class AddonInfo(NamedTuple):
+    path: str
+    source: str          # "addons" или "workshop"
+    kind: str            # "folder" или "gma"
+    title: str
+    description: str
+    author: str
+    workshop_id: str
+    size: int
+    file_count: int
+
+    @property
+    def entry(self) -> str:
+        """Элемент верхнего уровня: папка или .gma в addons, папка предмета Workshop"""
+        return os.path.dirname(self.path) if self.source == "workshop" else self.path
+
+    @property
+    def label(self) -> str:
+        if self.kind == "folder":
+            return self.title
+        return f"{self.title} ({self.size / 1048576:.1f} MB)"
+
+
+class _HeaderReader:
+    """Последовательное чтение полей заголовка из mmap без копирования файла"""
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def unpack(self, fmt: str):
+        size = struct.calcsize(fmt)
+        if self.pos + size > len(self.data):
+            raise GmaError("Заголовок обрывается")
+        values = struct.unpack_from(fmt, self.data, self.pos)
+        self.pos += size
+        return values[0] if len(values) == 1 else values
+
+    def string(self) -> str:
+        end = self.data.find(b"\0", self.pos)
+        if end < 0:
+            raise GmaError("Строка без завершающего нуля")
+        value = self.data[self.pos:end].decode("utf-8", errors="replace")
+        self.pos = end + 1
+        return value
+
+
+def parse_gma(data) -> GmaHeader:
+    """Разбор заголовка и таблицы файлов (data - bytes или mmap)"""
+    if data[:4] != GMA_IDENT:
+        raise GmaError("Нет сигнатуры GMAD")
+    reader = _HeaderReader(data)
+    reader.pos = 4
+    version = reader.unpack("<B")
+    steamid, timestamp = reader.unpack("<QQ")
+
+    required = []
+    if version > 1:
+        while True:
+            content = reader.string()
+            if not content:
+                break
+            required.append(content)
+
+    name = reader.string()
+    description = reader.string()
+    author = reader.string()
+    addon_version = reader.unpack("<i")
+
+    # Таблица файлов бывает на тысячи строк, поэтому разбирается без _HeaderReader:
+    # за номером файла идут имя, размер, CRC и номер следующего файла
+    files = []
+    number = reader.unpack("<I")
+    pos = reader.pos
+    find = data.find
+    limit = len(data) - _FILE_TAIL.size
+    while number:
+        end = find(b"\0", pos)
+        if end < 0 or end + 1 > limit:
+            raise GmaError("Таблица файлов обрывается")
+        size, crc, number = _FILE_TAIL.unpack_from(data, end + 1)
+        files.append(GmaFile(data[pos:end].decode("utf-8", errors="replace"), size, crc))
+        pos = end + 1 + _FILE_TAIL.size
+
+    return GmaHeader(version, steamid, timestamp, tuple(required), name, description,
+                     author, addon_version, tuple(files), pos)
+
+
+def read_gma_header(path: str) -> GmaHeader:
+    """Заголовок пакета; через mmap читаются только нужные страницы"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < len(GMA_IDENT):
+            raise GmaError("Файл слишком мал")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return parse_gma(data)
+
+
+def _description_text(description: str) -> str:
+    # gmad пишет в описание JSON вида {"description": ..., "type": ..., "tags": [...]}
+    if description.startswith("{"):
+        try:
+            return str(json.loads(description).get("description", ""))
+        except (ValueError, AttributeError):
+            pass
+    return description
+
+
+def gma_info(path: str, source: str, workshop_id: str = "") -> AddonInfo:
+    header = read_gma_header(path)
+    title = header.name or os.path.splitext(os.path.basename(path))[0]
+    return AddonInfo(path, source, "gma", title, _description_text(header.description),
+                     header.author, workshop_id, os.path.getsize(path), len(header.files))
+
+
+def folder_info(path: str, source: str) -> AddonInfo:
+    """Распакованный аддон; название берётся из addon.json, если он есть"""
+    title = os.path.basename(path)
+    description = ""
+    try:
+        with open(os.path.join(path, "addon.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        title = str(meta.get("title") or title)
+        description = str(meta.get("description") or "")
+    except (OSError, ValueError, AttributeError):
+        pass
+    return AddonInfo(path, source, "folder", title, description, "", "", 0, 0)
+
+
+def _stat_key(entry: os.DirEntry) -> List[int]:
+    st = entry.stat()
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _is_package(name: str) -> bool:
+    return name.lower().endswith(PACKAGE_EXTENSIONS)
+
+
+class AddonIndex:
+    """Аддоны из addons и workshop/content/4000 с кэшем на диске.
+
+    Запись индекса привязана к пути, mtime и размеру, поэтому повторное
+    сканирование разбирает заново только изменившиеся пакеты. Каталоги
+    обходятся через os.scandir в пуле потоков.
+    """
+
+    def __init__(self, path: str = INDEX_FILE, workers: int = SCAN_WORKERS):
+        self.path = path
+        self.workers = workers
+        self.entries: Optional[Dict[str, Dict]] = None
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.entries = data["entries"] if data.get("version") == INDEX_VERSION else {}
+        except (OSError, ValueError, KeyError):
+            self.entries = {}
+
+    def save(self):
+        # Под блокировкой: индекс может одновременно обновлять наблюдатель за папками
+        with self._lock:
+            if not self.dirty:
+                return
+            tmp_path = self.path + ".tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"version": INDEX_VERSION, "entries": self.entries},
+                              f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+                self.dirty = False
+            except OSError as e:
+                print(f"Ошибка сохранения индекса аддонов: {e}")
+
+    def mtime(self, path: str) -> Optional[float]:
+        """Время изменения пакета из индекса, без обращения к диску"""
+        with self._lock:
+            entry = (self.entries or {}).get(path)
+        return entry["key"][0] / 1e9 if entry else None
+
+    def _cached(self, path: str, key: List[int]) -> Optional[AddonInfo]:
+        with self._lock:
+            entry = self.entries.get(path)
+        if entry and entry["key"] == key:
+            return AddonInfo(*entry["info"])
+        return None
+
+    def _remember(self, path: str, key: List[int], info: AddonInfo):
+        with self._lock:
+            self.entries[path] = {"key": key, "info": list(info)}
+            self.dirty = True
+
+    def _package(self, entry: os.DirEntry, source: str, workshop_id: str = "") -> Optional[AddonInfo]:
+        key = _stat_key(entry)
+        info = self._cached(entry.path, key)
+        if info is None:
+            try:
+                info = gma_info(entry.path, source, workshop_id)
+            except GmaError:
+                # Сжатый .bin старого Workshop: заголовка не прочитать, но аддон есть.
+                # Запись всё равно кэшируется, чтобы не разбирать файл при каждом скане
+                info = AddonInfo(entry.path, source, "gma", workshop_id or entry.name,
+                                 "", "", workshop_id, key[1], 0)
+            except OSError as e:
+                print(f"Ошибка чтения аддона {entry.path}: {e}")
+                return None
+            self._remember(entry.path, key, info)
+        return info
+
+    def _folder(self, entry: os.DirEntry, source: str) -> AddonInfo:
+        # mtime папки меняется, только когда в ней появляются или пропадают файлы
+        key = _stat_key(entry)
+        info = self._cached(entry.path, key)
+        if info is None:
+            info = folder_info(entry.path, source)
+            self._remember(entry.path, key, info)
+        return info
+
+    def _addons_entry(self, entry: os.DirEntry) -> Optional[AddonInfo]:
+        if entry.name.startswith("."):
+            return None
+        if entry.is_dir():
+            return self._folder(entry, "addons")
+        if entry.is_file() and entry.name.lower().endswith(".gma"):
+            return self._package(entry, "addons")
+        return None
+
+    def _workshop_item(self, entry: os.DirEntry) -> Optional[AddonInfo]:
+        if not entry.is_dir() or not entry.name.isdigit():
+            return None
+        try:
+            with os.scandir(entry.path) as files:
+                packages = sorted((f for f in files if f.is_file() and _is_package(f.name)),
+                                  key=lambda f: f.name)
+        except OSError:
+            return None
+        for package in packages:
+            info = self._package(package, "workshop", entry.name)
+            if info:
+                return info
+        return None
+
+    def scan(self, addons_path: Optional[str], workshop_path: Optional[str] = None,
+             cancel=None) -> List[AddonInfo]:
+        """Полный список аддонов (вызывать из фонового потока)"""
+        if self.entries is None:
+            self.load()
+
+        jobs = []
+        for root, handler in ((addons_path, self._addons_entry),
+                              (workshop_path, self._workshop_item)):
+            if not root or not os.path.isdir(root):
+                continue
+            with os.scandir(root) as entries:
+                jobs.extend((handler, entry) for entry in entries)
+
+        results: List[AddonInfo] = []
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="addons") as pool:
+            for info in pool.map(lambda job: job[0](job[1]), jobs):
+                if cancel is not None and cancel.is_set():
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    return []
+                if info:
+                    results.append(info)
+
+        self._forget_missing(results, (addons_path, workshop_path))
+        self.save()
+        results.sort(key=lambda info: info.title.lower())
+        return results
+
+    def _forget_missing(self, found: Iterable[AddonInfo], roots):
+        """Убрать из индекса удалённые аддоны в просканированных папках"""
+        alive = {info.path for info in found}
+        prefixes = tuple(os.path.join(root, "") for root in roots if root)
+        with self._lock:
+            stale = [path for path in self.entries
+                     if path.startswith(prefixes) and path not in alive]
+            for path in stale:
+                del self.entries[path]
+            if stale:
+                self.dirty = True
+
+    def refresh(self, entries: Iterable[str], addons_path: Optional[str],
+                workshop_path: Optional[str] = None) -> Tuple[List[AddonInfo], List[str]]:
+        """Пересканировать отдельные элементы верхнего уровня.
+
+        Возвращает (новые или изменённые аддоны, пути пропавших элементов).
+        """
+        if self.entries is None:
+            self.load()
+        handlers = {}
+        for root, handler in ((addons_path, self._addons_entry),
+                              (workshop_path, self._workshop_item)):
+            if root:
+                handlers[os.path.normpath(root)] = handler
+
+        # Один scandir на корень вместо stat по каждому пути
+        wanted: Dict[str, Set[str]] = {}
+        for path in entries:
+            root, name = os.path.split(os.path.normpath(path))
+            if root in handlers:
+                wanted.setdefault(root, set()).add(name)
+
+        updated: List[AddonInfo] = []
+        removed: List[str] = []
+        for root, names in wanted.items():
+            found = {}
+            try:
+                with os.scandir(root) as listing:
+                    found = {e.name: e for e in listing if e.name in names}
+            except OSError:
+                pass
+            for name in names:
+                path = os.path.join(root, name)
+                info = handlers[root](found[name]) if name in found else None
+                self._forget_entry(path, info.path if info else None)
+                if info:
+                    updated.append(info)
+                else:
+                    removed.append(path)
+
+        self.save()
+        return updated, removed
+
+    def _forget_entry(self, entry: str, keep: Optional[str]):
+        """Убрать записи элемента entry, кроме записи keep"""
+        prefix = os.path.join(entry, "")
+        with self._lock:
+            stale = [path for path in self.entries
+                     if (path == entry or path.startswith(prefix)) and path != keep]
+            for path in stale:
+                del self.entries[path]
+            if stale:
+                self.dirty = True
@@ -0,0 +1,109 @@
+"""Смена набора аддонов: разница переносами против копирования и откат после сбоя
+
+Запуск из корня репозитория: python benchmarks/bench_addon_profiles.py [--addons N]
+Во временной папке garrysmod/addons создаются аддоны-папки с файлами.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import addon_profiles
+from addon_profiles import AddonSwitcher
+
+FILES_PER_ADDON = 5
+
+
+def make_addons(addons: str, count: int):
+    for i in range(count):
+        folder = os.path.join(addons, f"addon_{i:04d}", "lua", "autorun")
+        os.makedirs(folder)
+        for j in range(FILES_PER_ADDON):
+            with open(os.path.join(folder, f"file{j}.lua"), "wb") as f:
+                f.write(b"-- " * 300)
+
+
+def copy_switch(addons: str, staging: str, names):
+    """Что делает перенос руками между дисками: копия и удаление"""
+    os.makedirs(staging, exist_ok=True)
+    for name in names:
+        shutil.copytree(os.path.join(addons, name), os.path.join(staging, name))
+        shutil.rmtree(os.path.join(addons, name))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class Crash(BaseException):
+    """Падение процесса посреди смены набора"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--addons", type=int, default=1500)
+    args = parser.parse_args()
+    count = args.addons
+    base = tempfile.mkdtemp()
+    try:
+        addons = os.path.join(base, "garrysmod", "addons")
+        make_addons(addons, count)
+        names = sorted(os.listdir(addons))
+        switcher = AddonSwitcher(addons)
+        # Два набора для разных серверов: общая половина и по четверти своих
+        half, quarter = count // 2, count // 4
+        first = names[:half + quarter]
+        second = names[:half] + names[half + quarter:]
+
+        result, to_first = timed(switcher.apply, first)
+        assert len(result.disabled) == count - len(first) and not result.enabled
+        result, to_second = timed(switcher.apply, second)
+        assert len(result.enabled) == len(result.disabled) == quarter
+        result, again = timed(switcher.apply, second)
+        assert not result.enabled and not result.disabled
+        result, to_all = timed(switcher.apply, None)
+        assert switcher.state() == (set(names), set())
+
+        # Сбой на середине: журнал остаётся, recover возвращает исходное состояние
+        rename = os.rename
+        calls = [0]
+
+        def crashing_rename(source, target):
+            calls[0] += 1
+            if calls[0] > quarter // 2:
+                raise Crash()
+            rename(source, target)
+
+        addon_profiles.os.rename = crashing_rename
+        try:
+            switcher.apply(second)
+        except Crash:
+            pass
+        finally:
+            addon_profiles.os.rename = rename
+        assert os.path.exists(switcher.journal_path)
+        restored, recover = timed(switcher.recover)
+        assert restored == quarter // 2 and switcher.state() == (set(names), set())
+
+        _, copied = timed(copy_switch, addons, switcher.staging + "_copy", names[half + quarter:])
+
+        print(f"аддонов: {count}, в наборах по {len(first)}, отличаются {quarter * 2}")
+        print(f"все -> первый набор      {to_first * 1000:8.1f} мс")
+        print(f"первый -> второй         {to_second * 1000:8.1f} мс")
+        print(f"второй -> второй         {again * 1000:8.1f} мс")
+        print(f"второй -> все            {to_all * 1000:8.1f} мс")
+        print(f"откат после сбоя         {recover * 1000:8.1f} мс")
+        print(f"копирование {quarter} папок   {copied * 1000:8.1f} мс")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Скорость индексации аддонов: холодный и тёплый индекс
+
+Запуск из корня репозитория: python benchmarks/bench_addons.py [--addons N]
+Создаёт во временной папке addons/ и workshop/content/4000 с пакетами GMA.
+"""
+import argparse
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from addons import AddonIndex, read_gma_header
+
+
+def write_gma(path: str, name: str, files: int = 200, payload: int = 64 * 1024):
+    """Пакет GMA версии 3 с files файлами по payload байт"""
+    header = bytearray(b"GMAD" + struct.pack("<BQQ", 3, 0, 0) + b"\0")
+    for part in (name, '{"description": "bench", "type": "tool", "tags": []}', "bench"):
+        header += part.encode() + b"\0"
+    header += struct.pack("<i", 1)
+    for number in range(1, files + 1):
+        header += struct.pack("<I", number) + f"lua/{name}/file{number}.lua\0".encode()
+        header += struct.pack("<qI", payload // files, 0)
+    header += struct.pack("<I", 0)
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(b"\0" * payload)
+        f.write(struct.pack("<I", 0))
+
+
+def make_tree(base: str, count: int):
+    addons = os.path.join(base, "addons")
+    workshop = os.path.join(base, "workshop", "content", "4000")
+    os.makedirs(addons)
+    os.makedirs(workshop)
+    for i in range(count // 10):
+        os.makedirs(os.path.join(addons, f"folder_addon_{i}", "lua"))
+        write_gma(os.path.join(addons, f"local_{i}.gma"), f"Local {i}")
+    for i in range(count):
+        item = os.path.join(workshop, str(100000 + i))
+        os.makedirs(item)
+        write_gma(os.path.join(item, f"{i}_legacy.gma"), f"Workshop {i}")
+    return addons, workshop
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--addons", type=int, default=2000)
+    args = parser.parse_args()
+    count = args.addons
+    base = tempfile.mkdtemp()
+    try:
+        addons, workshop = make_tree(base, count)
+        header = read_gma_header(os.path.join(workshop, "100000", "0_legacy.gma"))
+        assert header.name == "Workshop 0" and len(header.files) == 200
+        index_path = os.path.join(base, "addon_index.json")
+
+        start = time.perf_counter()
+        found = AddonIndex(index_path).scan(addons, workshop)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        warm_found = AddonIndex(index_path).scan(addons, workshop)
+        warm = time.perf_counter() - start
+        assert warm_found == found
+
+        print(f"аддонов: {len(found)}")
+        print(f"холодный индекс  {cold * 1000:8.1f} мс")
+        print(f"тёплый индекс    {warm * 1000:8.1f} мс")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
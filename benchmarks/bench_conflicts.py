@@ -0,0 +1,65 @@
+"""Анализ конфликтов: первый прогон, повторный и после добавления одного аддона
+
+Запуск из корня репозитория: python benchmarks/bench_conflicts.py [--addons N]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from addons import AddonIndex
+from bench_addons import make_tree, write_gma
+from conflicts import ConflictAnalyzer
+
+
+def timed(label: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<28} {(time.perf_counter() - start) * 1000:8.1f} мс")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--addons", type=int, default=500)
+    args = parser.parse_args()
+    count = args.addons
+    base = tempfile.mkdtemp()
+    try:
+        addons, workshop = make_tree(base, count)
+        # Два папочных аддона с одним и тем же файлом разного содержания
+        for i, body in enumerate((b"print(1)", b"print(2)")):
+            folder = os.path.join(addons, f"folder_addon_{i}", "lua", "autorun")
+            os.makedirs(folder, exist_ok=True)
+            with open(os.path.join(folder, "shared.lua"), "wb") as f:
+                f.write(body)
+
+        index = AddonIndex(os.path.join(base, "addon_index.json"))
+        mods = index.scan(addons, workshop)
+        analyzer = ConflictAnalyzer(os.path.join(base, "addon_hashes.json"))
+
+        report = timed("первый анализ", lambda: analyzer.analyze(mods))
+        timed("повторный анализ", lambda: ConflictAnalyzer(analyzer.cache_path).analyze(mods))
+
+        item = os.path.join(workshop, "999999")
+        os.makedirs(item)
+        write_gma(os.path.join(item, "new.gma"), "Extra")
+        mods = index.scan(addons, workshop)
+        again = timed("после нового аддона", lambda: ConflictAnalyzer(analyzer.cache_path).analyze(mods))
+
+        print(f"аддонов: {report.addons}, файлов: {report.files}, "
+              f"конфликтов: {len(report.conflicts)}, дубликатов: {len(report.duplicates)}, "
+              f"лишних: {report.wasted_bytes / 1048576:.1f} MB")
+        print(f"захэшировано файлов: {report.hashed_files} -> {again.hashed_files}")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Игроки и правила с локальных заменителей серверов: разбитые и сжатые ответы
+
+Запуск из корня репозитория: python benchmarks/bench_details.py [--servers N]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import fake_a2s
+import server_details
+
+PLAYERS = [(f"Игрок {i}", i * 3, 60.0 * i + 0.5) for i in range(64)]
+# Около 15 KB правил: ответ приходит десятком частей
+RULES = {f"sv_rule_{i}": "x" * 24 for i in range(500)}
+RULES["sv_workshop_collection"] = "2868253812"
+RULES["gm_required_addons"] = "104691717, 104815552"
+
+
+def serve(ready, servers, count):
+    async def run():
+        servers.extend(await fake_a2s.start(count, players=PLAYERS, rules=RULES, delay=0.005))
+        servers.extend(await fake_a2s.start(count, players=PLAYERS, rules=RULES, delay=0.005,
+                                            compress=True))
+        servers.extend(await fake_a2s.start(count, delay=0.005, loss=1.0))
+        ready.set()
+        await asyncio.Event().wait()
+    asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", type=int, default=20)
+    args = parser.parse_args()
+    count = args.servers
+    ready, servers = threading.Event(), []
+    threading.Thread(target=serve, args=(ready, servers, count), daemon=True).start()
+    ready.wait()
+    plain, packed, dead = servers[:count], servers[count:2 * count], servers[2 * count:]
+
+    cache = server_details.DetailsCache()
+    for label, group in (("разбитый ответ", plain), ("сжатый bzip2", packed)):
+        start = time.perf_counter()
+        for server in group:
+            details = server_details.fetch_details(server.address)
+            assert len(details.players) == len(PLAYERS) and details.rules == RULES
+            assert details.workshop_ids == ["2868253812", "104691717", "104815552"]
+            cache.put(details)
+        elapsed = (time.perf_counter() - start) / count
+        print(f"{label:<16}{elapsed * 1000:>8.1f} мс на сервер")
+
+    start = time.perf_counter()
+    for server in plain + packed:
+        assert cache.get(server.address) is not None
+    print(f"{'из кэша':<16}{(time.perf_counter() - start) / (2 * count) * 1e6:>8.1f} мкс на сервер")
+
+    # Отмена: запрос к молчащему серверу прерывается почти сразу, а не по таймауту
+    cancel = threading.Event()
+    threading.Timer(0.05, cancel.set).start()
+    start = time.perf_counter()
+    result = server_details.fetch_details(dead[0].address, timeout=2.0, cancel=cancel)
+    assert result is None
+    print(f"{'отмена':<16}{(time.perf_counter() - start) * 1000:>8.1f} мс (таймаут 2000 мс)")
+
+
+if __name__ == "__main__":
+    main()
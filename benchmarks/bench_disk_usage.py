@@ -0,0 +1,123 @@
+"""Подсчёт места: холодный скан, повторный по кэшу mtime и после изменения одной папки
+
+Запуск из корня репозитория: python benchmarks/bench_disk_usage.py [--items N]
+Создаёт во временной папке garrysmod/addons, cache, download и workshop/content/4000
+с манифестом, где на половину предметов нет подписки.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from disk_usage import DiskUsage, UsageRoot, workshop_manifest
+
+OLD = time.time() - 90 * 86400
+
+
+def write(path: str, size: int, mtime: float = None):
+    # Разреженный файл: размер по stat настоящий, места на диске не занимает
+    with open(path, "wb") as f:
+        f.truncate(size)
+    if mtime:
+        os.utime(path, (mtime, mtime))
+
+
+def make_tree(base: str, count: int):
+    garrysmod = os.path.join(base, "common", "GarrysMod", "garrysmod")
+    workshop = os.path.join(base, "workshop", "content", "4000")
+    roots = [UsageRoot("addons", os.path.join(garrysmod, "addons")),
+             UsageRoot("workshop", workshop),
+             UsageRoot("cache", os.path.join(garrysmod, "cache")),
+             UsageRoot("download", os.path.join(garrysmod, "download"))]
+    # Распакованные аддоны: lua/<имя>/ и materials/<имя>/ с мелкими файлами
+    for i in range(count // 10):
+        for sub in ("lua", "materials"):
+            folder = os.path.join(roots[0].path, f"addon_{i}", sub, f"addon_{i}")
+            os.makedirs(folder)
+            for j in range(10):
+                write(os.path.join(folder, f"file{j}"), 2048)
+    details = []
+    for i in range(count):
+        item = os.path.join(workshop, str(100000 + i))
+        os.makedirs(item)
+        write(os.path.join(item, f"{i}_legacy.gma"), (1 << 20) + 64 * 1024 * (i % 32))
+        subscribed = "76561198000000000" if i % 2 else "0"
+        details.append(f'"{100000 + i}" {{ "manifest" "1" "subscribedby" "{subscribed}" }}')
+    with open(workshop_manifest(workshop), "w") as f:
+        f.write('"AppWorkshop" { "appid" "4000" "WorkshopItemDetails" { ' + " ".join(details) + " } }")
+    # Старые загрузки с серверов и свежий кэш Lua
+    for folder, mtime in (("download/maps", OLD), ("download/materials/old", OLD), ("cache/lua", None)):
+        path = os.path.join(garrysmod, folder)
+        os.makedirs(path)
+        for j in range(20):
+            write(os.path.join(path, f"file{j}.bsp"), 256 * 1024, mtime)
+        if mtime:
+            os.utime(path, (mtime, mtime))
+    os.utime(os.path.join(garrysmod, "download", "materials"), (OLD, OLD))
+    return roots
+
+
+def walk_total(roots) -> int:
+    """Что считает наивный os.walk: stat каждого файла при каждом запуске"""
+    total = 0
+    for root in roots:
+        for folder, _, files in os.walk(root.path):
+            total += sum(os.path.getsize(os.path.join(folder, name)) for name in files)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=2000)
+    args = parser.parse_args()
+    count = args.items
+    base = tempfile.mkdtemp()
+    try:
+        roots = make_tree(base, count)
+        manifest = workshop_manifest(roots[1].path)
+        cache_path = os.path.join(base, "disk_usage.json")
+
+        start = time.perf_counter()
+        expected = walk_total(roots)
+        walk = time.perf_counter() - start
+
+        start = time.perf_counter()
+        report = DiskUsage(cache_path).analyze(roots, manifest)
+        cold = time.perf_counter() - start
+        assert report.tree.total == expected
+        stale = [s for s in report.suggestions if s.kind == "stale_cache"]
+        unsubscribed = [s for s in report.suggestions if s.kind == "unsubscribed"]
+        assert len(stale) == 2 and len(unsubscribed) == (count + 1) // 2, report.suggestions[:3]
+
+        start = time.perf_counter()
+        warm_report = DiskUsage(cache_path).analyze(roots, manifest)
+        warm = time.perf_counter() - start
+        assert warm_report.tree.total == expected
+
+        # Новый файл в одном предмете: перечитывается только его папка
+        write(os.path.join(roots[1].path, "100000", "extra.bin"), 1 << 20)
+        start = time.perf_counter()
+        changed = DiskUsage(cache_path).analyze(roots, manifest)
+        touched = time.perf_counter() - start
+        assert changed.tree.total == expected + (1 << 20)
+
+        tree = report.tree
+        print(f"папок: {len(tree)}, всего {tree.total / 1048576:.0f} MB, "
+              f"можно освободить {report.reclaimable / 1048576:.0f} MB")
+        print(f"os.walk + getsize   {walk * 1000:8.1f} мс")
+        print(f"холодный скан       {cold * 1000:8.1f} мс")
+        print(f"повторный скан      {warm * 1000:8.1f} мс")
+        print(f"после изменения     {touched * 1000:8.1f} мс")
+        largest = tree.ranked(tree.ranked(limit=1)[0], limit=3)
+        print("крупнейшие:", ", ".join(f"{tree.names[n]} {tree.size[n] / 1048576:.1f} MB" for n in largest))
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Сравнение загрузки картинок при старте: прежний способ и ImageCache
+
+Запуск из корня репозитория: python benchmarks/bench_images.py
+Замеряется только работа PIL (без создания PhotoImage, которому нужен дисплей).
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PIL import Image
+
+from image_cache import ImageCache
+
+
+def old_pipeline():
+    # Как было: два открытия иконки, два ресайза фона и point() для тёмной темы
+    Image.open("gmo.png").resize((150, 150), Image.LANCZOS)
+    Image.open("gmo.png").resize((50, 50), Image.LANCZOS)
+    bg_img = Image.open("gar3main.png")
+    bg_img.resize((1000, 700), Image.LANCZOS)
+    bg_img.resize((1000, 700), Image.LANCZOS).point(lambda p: p * 0.4)
+
+
+def new_pipeline(cache: ImageCache):
+    # Как сейчас при старте: иконки и фон только текущей (светлой) темы
+    cache.get("gmo.png", (150, 150))
+    cache.get("gmo.png", (50, 50))
+    cache.get("gar3main.png", (1000, 700), "normal")
+
+
+def measure(label: str, fn, repeat: int = 5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    print(f"{label:<36} {min(times) * 1000:8.1f} мс (лучший из {repeat})")
+
+
+def main():
+    os.chdir(ROOT)
+    measure("прежний load_images", old_pipeline)
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        def cold():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            new_pipeline(ImageCache(cache_dir))
+
+        measure("ImageCache, холодный кэш", cold)
+        new_pipeline(ImageCache(cache_dir))
+        measure("ImageCache, тёплый кэш", lambda: new_pipeline(ImageCache(cache_dir)))
+
+        dark_source = Image.open("gar3main.png").resize((1000, 700), Image.LANCZOS)
+        from image_cache import darken
+        measure("тёмный вариант: point(lambda)", lambda: dark_source.point(lambda p: p * 0.4))
+        measure("тёмный вариант: darken()", lambda: darken(dark_source))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Поиск и сортировка списка серверов по индексу ServerIndex
+
+Запуск из корня репозитория: python benchmarks/bench_server_filter.py [--servers N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server_filter import ServerIndex
+
+WORDS = ["DarkRP", "TTT", "Sandbox", "Murder", "Prop_Hunt", "Jailbreak", "RU", "EU", "24/7",
+         "Classic", "Roleplay", "Fun", "Zombie", "Build", "PvP"]
+MAPS = ["rp_downtown_v4c", "gm_construct", "ttt_minecraft_b5", "gm_flatgrass", "mu_nightmare_church"]
+
+
+def make_row(rnd: random.Random, i: int) -> tuple:
+    name = " ".join(rnd.sample(WORDS, 4)) + f" #{i}"
+    return (name, f"{rnd.randint(0, 64)}/64", rnd.choice(MAPS), str(rnd.randint(5, 300)),
+            f"10.0.{i // 256}.{i % 256}:27015")
+
+
+def check_readded_token():
+    """Слово, пропавшее из индекса после переименования, снова находится поиском"""
+    index = ServerIndex()
+    index.set("a:1", ("Foo server", "0/8", "gm_construct", "10", "a:1"))
+    index.set("a:1", ("Bar server", "0/8", "gm_construct", "10", "a:1"))
+    assert index.view("bar") == ["a:1"]
+    index.set("c:1", ("Foo server", "0/8", "gm_construct", "10", "c:1"))
+    assert index.view("foo") == ["c:1"]
+    index.remove("c:1")
+    assert index.view("foo") == []
+    index.set("d:1", ("Foo", "0/8", "gm_construct", "10", "d:1"))
+    assert index.view("fo") == ["d:1"]
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", type=int, default=5000)
+    args = parser.parse_args()
+
+    check_readded_token()
+
+    rnd = random.Random(42)
+    index = ServerIndex()
+    rows = [make_row(rnd, i) for i in range(args.servers)]
+    _, build = timed(index.replace, [(row, ()) for row in rows])
+    _, typed = timed(lambda: [index.view(query) for query in ("d", "da", "dar", "dark", "darkrp", "darkrp e")])
+    _, by_ping = timed(index.view, "ttt", "ping")
+    # Переименования идут по одному серверу, как ответы опроса
+    _, renamed = timed(lambda: [index.set(row[4], make_row(rnd, i)[:4] + (row[4],))
+                                for i, row in enumerate(rows[:1000])])
+
+    print(f"серверов: {args.servers}")
+    print(f"построение индекса       {build * 1000:8.1f} мс")
+    print(f"набор запроса по буквам  {typed * 1000:8.1f} мс")
+    print(f"фильтр + сортировка      {by_ping * 1000:8.1f} мс")
+    print(f"1000 обновлений строк    {renamed * 1000:8.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
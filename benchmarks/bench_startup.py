@@ -0,0 +1,191 @@
+"""Время запуска GModLauncher по этапам на синтетическом дереве Steam
+
+Запуск из корня репозитория:
+    python benchmarks/bench_startup.py [--libraries N] [--addons M] [--servers K] [--runs R]
+                                       [--display auto|xvfb|stub] [--target MS]
+
+Каждый запуск - отдельный процесс (холодный импорт модулей). Первый запуск идёт
+без кэшей лаунчера и печатается отдельно, по остальным считаются перцентили.
+С дисплеем (или через xvfb-run) строится настоящий Tk, иначе - заглушка из
+tk_stub.py, и тогда время отрисовки виджетов в замер не входит.
+
+first_paint - от старта процесса до первой отрисовки окна, после которой
+начинается чтение диска и сети. Если его p50 больше --target, код выхода 1.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+IMAGES = ("gmo.png", "gar3main.png")
+# Цель по времени до первой отрисовки (p50 прогретых запусков), мс
+FIRST_PAINT_TARGET_MS = 150.0
+
+
+def make_steam(base: str, libraries: int, addons: int) -> str:
+    """Steam с N библиотеками; игра и M аддонов лежат в последней"""
+    from bench_addons import write_gma
+
+    steam = os.path.join(base, "steam")
+    folders = ['"libraryfolders"', "{"]
+    for i in range(libraries):
+        library = steam if i == 0 else os.path.join(base, f"library{i}")
+        os.makedirs(os.path.join(library, "steamapps", "common"), exist_ok=True)
+        apps = '"4000" "4000000000"' if i == libraries - 1 else f'"{1000 + i}" "1000"'
+        folders.append(f'"{i}" {{ "path" "{library}" "apps" {{ {apps} }} }}')
+    folders.append("}")
+    with open(os.path.join(steam, "steamapps", "libraryfolders.vdf"), "w") as f:
+        f.write("\n".join(folders))
+
+    library = steam if libraries == 1 else os.path.join(base, f"library{libraries - 1}")
+    with open(os.path.join(library, "steamapps", "appmanifest_4000.acf"), "w") as f:
+        f.write('"AppState" { "appid" "4000" "installdir" "GarrysMod" "SizeOnDisk" "4000000000" }')
+    game = os.path.join(library, "steamapps", "common", "GarrysMod")
+    addons_dir = os.path.join(game, "garrysmod", "addons")
+    os.makedirs(addons_dir)
+    for name in ("gmod.exe", "hl2_linux", "hl2_osx"):
+        with open(os.path.join(game, name), "wb") as f:
+            f.write(b"\0")
+    for i in range(addons):
+        write_gma(os.path.join(addons_dir, f"addon_{i}.gma"), f"Addon {i}", files=20, payload=4096)
+    return steam
+
+
+def make_workdir(base: str, servers: int) -> str:
+    """Папка запуска: картинки, избранные серверы и свежий кэш их ответов"""
+    from a2s import ServerInfo
+    from server_cache import ServerCache
+    from storage import LauncherStore
+
+    work = os.path.join(base, "work")
+    os.makedirs(work)
+    for name in IMAGES:
+        shutil.copy(os.path.join(ROOT, name), work)
+    store = LauncherStore(os.path.join(work, "launcher_data.json"))
+    cache = ServerCache(os.path.join(work, "server_cache.json"), ttl=3600)
+    for i in range(servers):
+        address = f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}:27015"
+        info = ServerInfo(address, f"Server {i}", "gm_construct", "garrysmod", "Sandbox",
+                          i % 32, 32, 0, 20.0 + i % 100)
+        store.put("favorites", address, list(info.as_row()))
+        cache.store(info)
+    store.compact()
+    cache.save()
+    return work
+
+
+def refresh_cache(work: str):
+    """Кэш ответов остаётся свежим, чтобы запуск не опрашивал серверы по сети"""
+    path = os.path.join(work, "server_cache.json")
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    for entry in data["servers"].values():
+        entry[1] = time.time()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def run_child(args):
+    """Один запуск лаунчера в этом процессе; результат - JSON в stdout"""
+    if args.display == "stub":
+        import tk_stub
+        tk_stub.install()
+    import profiling
+    import launcher
+
+    profiling.tracer.since_start("imports")
+    root = launcher.tk.Tk()
+    app = launcher.GModLauncher(root)
+    if args.display == "stub":
+        # Цикла событий нет, Expose не придёт - загрузку запускаем сами
+        app.finish_startup()
+    else:
+        # Данные грузятся только после того, как окно нарисовано
+        while "finish_startup" not in profiling.tracer.durations():
+            root.update()
+    profiling.tracer.since_start("total")
+    print(json.dumps(profiling.tracer.durations()))
+    sys.stdout.flush()
+    # Фоновые потоки (скан модов, наблюдатель) не ждём
+    os._exit(0)
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--libraries", type=int, default=3)
+    parser.add_argument("--addons", type=int, default=500)
+    parser.add_argument("--servers", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--display", choices=("auto", "xvfb", "stub"), default="auto")
+    parser.add_argument("--target", type=float, default=FIRST_PAINT_TARGET_MS,
+                        help="цель для first_paint, мс")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    display = args.display
+    if display == "auto":
+        display = ("real" if os.environ.get("DISPLAY") or sys.platform == "win32"
+                   else "xvfb" if shutil.which("xvfb-run") else "stub")
+    command = [sys.executable, os.path.abspath(__file__), "--child",
+               "--display", "stub" if display == "stub" else "auto"]
+    if display == "xvfb":
+        command = ["xvfb-run", "-a"] + command
+
+    base = tempfile.mkdtemp()
+    try:
+        steam = make_steam(base, args.libraries, args.addons)
+        work = make_workdir(base, args.servers)
+        env = dict(os.environ, GMOD_LAUNCHER_STEAM=steam, PYTHONPATH=ROOT)
+        print(f"библиотек: {args.libraries}, аддонов: {args.addons}, серверов: {args.servers}, "
+              f"Tk: {display}")
+
+        runs = []
+        for _ in range(args.runs + 1):
+            refresh_cache(work)
+            result = subprocess.run(command, cwd=work, env=env, capture_output=True, text=True)
+            lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+            if result.returncode or not lines:
+                print(result.stdout + result.stderr)
+                raise SystemExit("запуск лаунчера не удался")
+            runs.append(json.loads(lines[-1]))
+            # Даём фоновому скану модов первого запуска дописать индекс
+            time.sleep(0.2)
+
+        cold, warm = runs[0], runs[1:]
+        phases = sorted(cold, key=lambda name: -cold[name])
+        print(f"{'этап':<20}{'холодный':>10}{'p50':>9}{'p90':>9}{'max':>9}  мс")
+        for name in phases:
+            values = [run.get(name, 0.0) for run in warm]
+            print(f"{name:<20}{cold[name]:>10.1f}{percentile(values, 50):>9.1f}"
+                  f"{percentile(values, 90):>9.1f}{max(values):>9.1f}")
+
+        first_paint = percentile([run["first_paint"] for run in warm], 50)
+        verdict = "в пределах цели" if first_paint <= args.target else "цель превышена"
+        print(f"первая отрисовка: p50 {first_paint:.1f} мс, цель {args.target:.0f} мс - {verdict}")
+        if first_paint > args.target:
+            raise SystemExit(1)
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
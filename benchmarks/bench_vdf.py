@@ -0,0 +1,76 @@
+"""Микробенчмарк разбора VDF на синтетическом libraryfolders.vdf
+
+Запуск: python benchmarks/bench_vdf.py [--libraries N] [--apps N]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vdf
+from steam_library import SteamLibraryIndex
+
+
+def make_libraryfolders(libraries: int, apps: int) -> str:
+    rnd = random.Random(42)
+    lines = ['"libraryfolders"', "{", '\t"contentstatsid"\t\t"-123456789"']
+    for i in range(libraries):
+        lines += [
+            f'\t"{i}"', "\t{",
+            f'\t\t"path"\t\t"D:\\\\Steam Library {i}\\\\with \\"quotes\\""',
+            '\t\t"label"\t\t""',
+            f'\t\t"contentid"\t\t"{rnd.getrandbits(60)}"',
+            f'\t\t"totalsize"\t\t"{rnd.getrandbits(40)}"',
+            "\t\t// комментарий внутри блока",
+            '\t\t"apps"', "\t\t{",
+        ]
+        for _ in range(apps):
+            lines.append(f'\t\t\t"{rnd.randint(10, 2000000)}"\t\t"{rnd.getrandbits(34)}"')
+        lines += ["\t\t}", "\t}"]
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def bench(label: str, fn, repeat: int = 5) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    best = min(times)
+    print(f"{label:<40} {best * 1000:9.2f} мс (лучший из {repeat})")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--libraries", type=int, default=20)
+    parser.add_argument("--apps", type=int, default=2000)
+    args = parser.parse_args()
+    libraries = args.libraries
+    apps = args.apps
+    text = make_libraryfolders(libraries, apps)
+    print(f"Библиотек: {libraries}, приложений: {libraries * apps}, "
+          f"размер: {len(text) / 1024:.0f} КБ")
+
+    best = bench("vdf.loads", lambda: vdf.loads(text))
+    print(f"{'':<40} {len(text) / best / 2 ** 20:9.1f} МБ/с")
+
+    with tempfile.TemporaryDirectory() as steam:
+        os.makedirs(os.path.join(steam, "steamapps"))
+        with open(os.path.join(steam, "steamapps", "libraryfolders.vdf"), "w", encoding="utf-8") as f:
+            f.write(text)
+        index = SteamLibraryIndex(os.path.join(steam, "index_cache.json"))
+        bench("SteamLibraryIndex: холодный (разбор)",
+              lambda: (index.invalidate(), index.get(steam)), repeat=1)
+        bench("SteamLibraryIndex: тёплый (stat)", lambda: index.get(steam))
+        fresh = SteamLibraryIndex(os.path.join(steam, "index_cache.json"))
+        bench("SteamLibraryIndex: кэш с диска", lambda: fresh.get(steam), repeat=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Установка коллекции из 300 предметов через очередь с заменителем steamcmd
+
+Запуск из корня репозитория: python benchmarks/bench_workshop.py [--items N]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from workshop_queue import WorkshopQueue
+
+FAKE_STEAMCMD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_steamcmd.py")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=300)
+    args = parser.parse_args()
+    count = args.items
+    base = tempfile.mkdtemp()
+    ids = [str(2000000000 + i) for i in range(count)]
+    os.environ["FAKE_STEAMCMD_STATE"] = os.path.join(base, "state")
+    os.environ["FAKE_STEAMCMD_DELAY"] = "0.002"
+    os.environ["FAKE_STEAMCMD_FLAKY"] = ",".join(ids[::100])
+
+    events = {}
+    finished = threading.Event()
+
+    def on_event(event):
+        events[event.kind] = events.get(event.kind, 0) + 1
+        if event.kind == "finished":
+            finished.set()
+
+    try:
+        workshop = os.path.join(base, "library", "steamapps", "workshop", "content", "4000")
+        queue = WorkshopQueue([sys.executable, FAKE_STEAMCMD], on_event,
+                              install_dir=os.path.join(base, "library", "staging"), backoff=0.1,
+                              target_dir=workshop)
+        start = time.perf_counter()
+        queue.add(ids)
+        finished.wait(120)
+        elapsed = time.perf_counter() - start
+
+        installed = len(os.listdir(workshop))
+        assert installed == count, installed
+        # Повторная загрузка заменяет уже установленный предмет
+        finished.clear()
+        queue.add(ids[:1])
+        finished.wait(30)
+        assert os.listdir(os.path.join(workshop, ids[0])) == [f"{ids[0]}.bin"]
+        print(f"предметов: {count}, установлено: {installed}, за {elapsed:.2f} с")
+        print(f"сессий steamcmd: {queue.sessions} (из них с повторами: {queue.sessions - min(queue.workers, count)})")
+        print("события:", ", ".join(f"{k}={v}" for k, v in sorted(events.items())))
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
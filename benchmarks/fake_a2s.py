@@ -0,0 +1,118 @@
+"""Заменитель игрового сервера для проверки запросов A2S без сети
+
+FakeServer - asyncio-протокол на UDP, отвечающий на A2S_INFO, A2S_PLAYER и
+A2S_RULES так же, как сервер Source: с challenge, а длинные ответы - частями
+по MTU, при compress=True ещё и сжатыми bzip2. Задержка и потери пакетов
+настраиваются, чтобы проверять таймауты и повторные запросы.
+"""
+import asyncio
+import bz2
+import os
+import random
+import struct
+import sys
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import a2s
+
+CHALLENGE = b"\x01\x02\x03\x04"
+# Полезная часть одной датаграммы у сервера Source
+SPLIT_SIZE = 1248
+
+
+def _string(text: str) -> bytes:
+    return text.encode("utf-8") + b"\x00"
+
+
+class FakeServer(asyncio.DatagramProtocol):
+
+    def __init__(self, name: str = "Fake Server", players: Optional[List[Tuple[str, int, float]]] = None,
+                 rules: Optional[Dict[str, str]] = None, max_players: int = 32,
+                 delay: float = 0.0, loss: float = 0.0, compress: bool = False):
+        self.name = name
+        self.players = players or []
+        self.rules = rules or {}
+        self.max_players = max_players
+        self.delay = delay
+        self.loss = loss
+        self.compress = compress
+        self.requests = 0
+        self.transport = None
+        self._ids = iter(range(1, 1 << 30))
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    @property
+    def address(self) -> str:
+        host, port = self.transport.get_extra_info("sockname")[:2]
+        return f"{host}:{port}"
+
+    def info_payload(self) -> bytes:
+        return (b"I\x11" + _string(self.name) + _string("gm_construct") + _string("garrysmod")
+                + _string("Sandbox") + struct.pack("<h", 4000)
+                + bytes([len(self.players), self.max_players, 0]) + b"dw\x00\x01" + _string("1.0"))
+
+    def players_payload(self) -> bytes:
+        body = b"".join(bytes([i]) + _string(name) + struct.pack("<lf", score, duration)
+                        for i, (name, score, duration) in enumerate(self.players))
+        return b"D" + bytes([len(self.players)]) + body
+
+    def rules_payload(self) -> bytes:
+        body = b"".join(_string(k) + _string(v) for k, v in self.rules.items())
+        return b"E" + struct.pack("<h", len(self.rules)) + body
+
+    def packets(self, payload: bytes) -> List[bytes]:
+        """Ответ одной датаграммой или частями в формате Source"""
+        message = a2s.HEADER + payload
+        if len(message) <= SPLIT_SIZE:
+            return [message]
+        request_id = next(self._ids)
+        if self.compress:
+            request_id |= 0x80000000
+            message = struct.pack("<lL", len(message), zlib.crc32(message)) + bz2.compress(message)
+        chunks = [message[i:i + SPLIT_SIZE] for i in range(0, len(message), SPLIT_SIZE)]
+        return [a2s.SPLIT_HEADER + struct.pack("<LBBh", request_id, len(chunks), number, SPLIT_SIZE) + chunk
+                for number, chunk in enumerate(chunks)]
+
+    def reply(self, data: bytes) -> List[bytes]:
+        kind = data[4:5]
+        if kind == b"T":
+            if not data.endswith(CHALLENGE):
+                return [a2s.HEADER + b"A" + CHALLENGE]
+            return [a2s.HEADER + self.info_payload()]
+        if kind in (b"U", b"V"):
+            if data[5:9] != CHALLENGE:
+                return [a2s.HEADER + b"A" + CHALLENGE]
+            return self.packets(self.players_payload() if kind == b"U" else self.rules_payload())
+        return []
+
+    def datagram_received(self, data, addr):
+        self.requests += 1
+        if random.random() < self.loss:
+            return
+        packets = self.reply(data)
+        # Части длинного ответа приходят вперемешку, как бывает в сети
+        if len(packets) > 1:
+            random.shuffle(packets)
+
+        async def send():
+            await asyncio.sleep(self.delay)
+            for packet in packets:
+                self.transport.sendto(packet, addr)
+        asyncio.ensure_future(send())
+
+
+async def start(count: int = 1, **kwargs) -> List[FakeServer]:
+    """count серверов на 127.0.0.1 со случайными портами"""
+    loop = asyncio.get_running_loop()
+    servers = []
+    for _ in range(count):
+        _, server = await loop.create_datagram_endpoint(
+            lambda: FakeServer(**kwargs), local_addr=("127.0.0.1", 0))
+        servers.append(server)
+    return servers
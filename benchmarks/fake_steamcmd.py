@@ -0,0 +1,74 @@
+"""Заменитель steamcmd для проверки очереди загрузок без сети
+
+Понимает +force_install_dir, +login, +workshop_download_item <appid> <id> и +quit,
+печатает те же строки, что и настоящий steamcmd. При заданном force_install_dir
+кладёт в steamapps/workshop/content/<appid>/<id> маленький файл, чтобы сработал
+наблюдатель за папками лаунчера.
+
+Переменные окружения:
+  FAKE_STEAMCMD_DELAY  - пауза на предмет в секундах (по умолчанию 0.01)
+  FAKE_STEAMCMD_FLAKY  - ID через запятую, которые падают с первой попытки
+  FAKE_STEAMCMD_STATE  - папка для счётчиков попыток и журнала сессий
+"""
+import os
+import sys
+import time
+
+
+def main(argv):
+    delay = float(os.environ.get("FAKE_STEAMCMD_DELAY", "0.01"))
+    flaky = set(filter(None, os.environ.get("FAKE_STEAMCMD_FLAKY", "").split(",")))
+    state = os.environ.get("FAKE_STEAMCMD_STATE")
+
+    install_dir = None
+    items = []
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "+force_install_dir":
+            install_dir = argv[i + 1]
+            i += 2
+        elif arg == "+workshop_download_item":
+            items.append((argv[i + 1], argv[i + 2]))
+            i += 3
+        elif arg == "+login":
+            i += 2
+        else:
+            i += 1
+
+    print("Steam Console Client (c) Valve Corporation - version 1700000000", flush=True)
+    print("Logging in user 'anonymous' to Steam Public...OK", flush=True)
+    if state:
+        os.makedirs(state, exist_ok=True)
+        with open(os.path.join(state, "sessions.log"), "a") as f:
+            f.write(f"{len(items)}\n")
+
+    for appid, item_id in items:
+        print(f"Downloading item {item_id} ...", flush=True)
+        for progress in (25.0, 50.0, 75.0):
+            time.sleep(delay / 3)
+            print(f" Update state (0x61) downloading, progress: {progress:.2f}", flush=True)
+
+        attempt = 1
+        if state:
+            counter = os.path.join(state, f"{item_id}.attempts")
+            if os.path.exists(counter):
+                with open(counter) as f:
+                    attempt = int(f.read()) + 1
+            with open(counter, "w") as f:
+                f.write(str(attempt))
+        if item_id in flaky and attempt == 1:
+            print(f"ERROR! Download item {item_id} failed (Failure).", flush=True)
+            continue
+
+        target = os.path.join(install_dir or ".", "steamapps", "workshop", "content", appid, item_id)
+        if install_dir:
+            os.makedirs(target, exist_ok=True)
+            with open(os.path.join(target, f"{item_id}.bin"), "wb") as f:
+                f.write(b"\0" * 64)
+        print(f'Success. Downloaded item {item_id} to "{target}" (64 bytes)', flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,220 @@
+"""Заглушка tkinter для замеров запуска без дисплея
+
+install() подменяет tkinter, tkinter.ttk/messagebox/filedialog/simpledialog и
+PIL.ImageTk в sys.modules. Виджеты принимают любые вызовы, а Treeview, Listbox
+и переменные хранят состояние, от которого зависит логика лаунчера. Время
+отрисовки Tk такие замеры не учитывают - для него нужен Xvfb.
+"""
+import itertools
+import sys
+import types
+
+END = "end"
+
+
+class Widget:
+    """Виджет, молча принимающий любые вызовы методов"""
+
+    def __init__(self, master=None, *args, **kwargs):
+        self.master = master
+        self.options = dict(kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: None
+
+    def config(self, *args, **kwargs):
+        # ttk.Style().configure(стиль, ...) тоже попадает сюда
+        self.options.update(kwargs)
+
+    configure = config
+
+    def cget(self, key):
+        return self.options.get(key, "")
+
+    def winfo_height(self):
+        return 600
+
+    def winfo_width(self):
+        return 1000
+
+
+class Tk(Widget):
+    _ids = itertools.count(1)
+    # Интерпретатор: TaskRunner спрашивает, собран ли Tcl с потоками
+    tk = types.SimpleNamespace(call=lambda *args: 1)
+
+    def after(self, ms, func=None, *args):
+        # Цикла событий нет: отложенные вызовы не выполняются
+        return f"after#{next(self._ids)}"
+
+    def after_idle(self, func, *args):
+        return self.after(0, func, *args)
+
+
+class Treeview(Widget):
+    _ids = itertools.count(1)
+
+    def __init__(self, master=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.items = {}
+        self.children = []
+        self._selection = ()
+
+    def insert(self, parent, index, iid=None, values=(), **kwargs):
+        iid = iid or f"I{next(self._ids)}"
+        self.items[iid] = {"values": tuple(values), **kwargs}
+        if index == END:
+            self.children.append(iid)
+        else:
+            self.children.insert(int(index), iid)
+        return iid
+
+    def item(self, iid, option=None, **kwargs):
+        if kwargs:
+            self.items[iid].update(kwargs)
+            return None
+        return self.items[iid] if option is None else self.items[iid].get(option)
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.items.pop(iid, None)
+            if iid in self.children:
+                self.children.remove(iid)
+
+    def detach(self, *iids):
+        for iid in iids:
+            if iid in self.children:
+                self.children.remove(iid)
+
+    def move(self, iid, parent, index):
+        if iid in self.children:
+            self.children.remove(iid)
+        self.children.insert(int(index), iid)
+
+    def get_children(self, item=""):
+        return tuple(self.children)
+
+    def selection(self):
+        return self._selection
+
+    def selection_set(self, *iids):
+        self._selection = tuple(iids)
+
+    def focus(self, *args):
+        return ""
+
+    def yview(self, *args):
+        return (0.0, 1.0)
+
+
+class Listbox(Widget):
+    def __init__(self, master=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.lines = []
+
+    def insert(self, index, *lines):
+        if index == END:
+            self.lines.extend(lines)
+        else:
+            self.lines[int(index):int(index)] = lines
+
+    def delete(self, first, last=None):
+        if last == END:
+            del self.lines[int(first):]
+        else:
+            del self.lines[int(first)]
+
+    def size(self):
+        return len(self.lines)
+
+    def curselection(self):
+        return ()
+
+
+class Variable:
+    def __init__(self, master=None, value=None):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+    def trace_add(self, mode, callback):
+        return "trace"
+
+
+class IntVar(Variable):
+    def __init__(self, master=None, value=0):
+        super().__init__(master, value)
+
+
+class StringVar(Variable):
+    def __init__(self, master=None, value=""):
+        super().__init__(master, value)
+
+
+class BooleanVar(Variable):
+    def __init__(self, master=None, value=False):
+        super().__init__(master, value)
+
+
+class PhotoImage:
+    def __init__(self, image=None, **kwargs):
+        self.image = image
+
+    def width(self):
+        return self.image.size[0] if self.image is not None else 0
+
+    def height(self):
+        return self.image.size[1] if self.image is not None else 0
+
+
+class _WidgetModule(types.ModuleType):
+    """Модуль, где любой неизвестный атрибут - класс Widget (Frame, Button, ...)"""
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        if name.isupper():
+            return name.lower()
+        return Widget
+
+
+def _dialog_module(name: str) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__getattr__ = lambda attr: (lambda *args, **kwargs: None)
+    return module
+
+
+def install():
+    tkinter = _WidgetModule("tkinter")
+    tkinter.Tk = tkinter.Toplevel = Tk
+    tkinter.Listbox = Listbox
+    tkinter.IntVar, tkinter.StringVar, tkinter.BooleanVar = IntVar, StringVar, BooleanVar
+    tkinter.TclError = RuntimeError
+    tkinter.END = END
+
+    ttk = _WidgetModule("tkinter.ttk")
+    ttk.Treeview = Treeview
+
+    modules = {
+        "tkinter": tkinter,
+        "tkinter.ttk": ttk,
+        "tkinter.messagebox": _dialog_module("tkinter.messagebox"),
+        "tkinter.filedialog": _dialog_module("tkinter.filedialog"),
+        "tkinter.simpledialog": _dialog_module("tkinter.simpledialog"),
+    }
+    for name, module in modules.items():
+        sys.modules[name] = module
+        if "." in name:
+            setattr(tkinter, name.split(".", 1)[1], module)
+
+    image_tk = types.ModuleType("PIL.ImageTk")
+    image_tk.PhotoImage = PhotoImage
+    sys.modules["PIL.ImageTk"] = image_tk
+    import PIL
+    PIL.ImageTk = image_tk
@@ -0,0 +1,196 @@
+"""Командная строка лаунчера без окна: опрос серверов, список модов, запуск игры
+
+    python cli.py servers query [ADDRESS ...] [--timeout S] [--format json|ndjson]
+    python cli.py mods scan [--addons PATH] [--workshop PATH] [--format json|ndjson]
+    python cli.py mods activate NAME
+    python cli.py launch [--profile NAME] [--console] [--wait] [--dry-run]
+    python cli.py connect ADDRESS [--profile NAME] [--wait] [--dry-run]
+
+Без адресов servers query опрашивает избранное, свои серверы и историю.
+В формате ndjson каждая запись печатается отдельной строкой сразу по
+готовности, json - один массив в конце. Код выхода 1 - игра не найдена
+или ни один сервер не ответил. mods activate включает сохранённый в окне
+набор аддонов (* - все аддоны).
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import supervisor
+from addon_profiles import SwitchError
+from engine import LauncherEngine
+
+
+class Output:
+    """Записи в stdout: построчно (ndjson) или одним массивом (json)"""
+
+    def __init__(self, fmt: str, stream=None):
+        self.fmt = fmt
+        self.stream = stream or sys.stdout
+        self.records: List[Dict] = []
+
+    def write(self, record: Dict):
+        if self.fmt == "ndjson":
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.stream.flush()
+        else:
+            self.records.append(record)
+
+    def close(self):
+        if self.fmt == "json":
+            json.dump(self.records, self.stream, ensure_ascii=False, indent=2)
+            self.stream.write("\n")
+
+
+def server_record(address: str, info) -> Dict:
+    if info is None:
+        return {"address": address, "online": False}
+    return {**info._asdict(), "online": True, "ping": round(info.ping, 1)}
+
+
+def cmd_servers_query(engine: LauncherEngine, args) -> int:
+    addresses = args.addresses or engine.server_addresses()
+    out = Output(args.format)
+    results = engine.query_servers(addresses, timeout=args.timeout,
+                                   on_result=lambda a, info: out.write(server_record(a, info)))
+    out.close()
+    return 0 if any(results.values()) or not addresses else 1
+
+
+def cmd_mods_scan(engine: LauncherEngine, args) -> int:
+    mods_path = args.addons or engine.addons_path()
+    workshop_path = args.workshop or engine.workshop_path()
+    if not mods_path:
+        print("Не найден путь к Steam!", file=sys.stderr)
+        return 1
+    out = Output(args.format)
+    for mod in engine.scan_mods(mods_path, workshop_path):
+        out.write(mod._asdict())
+    out.close()
+    engine.addon_index.save()
+    return 0
+
+
+def cmd_mods_activate(engine: LauncherEngine, args) -> int:
+    names = engine.addon_profile_names()
+    if args.name not in names:
+        print(f"Набор {args.name} не найден, есть: {', '.join(names)}", file=sys.stderr)
+        return 2
+    try:
+        result = engine.activate_addon_profile(args.name)
+    except (OSError, SwitchError) as e:
+        print(f"Ошибка смены набора аддонов: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result._asdict(), ensure_ascii=False))
+    return 0
+
+
+def _start(engine: LauncherEngine, argv: List[str], args) -> int:
+    if args.dry_run:
+        print(json.dumps({"args": argv}, ensure_ascii=False))
+        return 0
+    finished = threading.Event()
+    sessions = []
+    runner = supervisor.ProcessSupervisor(lambda session: (sessions.append(session), finished.set()))
+    try:
+        session = runner.launch(argv)
+    except OSError as e:
+        print(f"Не удалось запустить игру: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps({"pid": session.pid, "args": argv}, ensure_ascii=False), flush=True)
+    if not args.wait:
+        return 0
+    finished.wait()
+    session = sessions[0]
+    engine.record_session(session)
+    print(json.dumps({"pid": session.pid, "exit_code": session.exit_code,
+                      "runtime": round(session.runtime, 1), "peak_rss": session.peak_rss}))
+    return 0
+
+
+def _check_launch(engine: LauncherEngine, args) -> int:
+    """0 - можно запускать, иначе код выхода"""
+    if args.profile and args.profile not in engine.profiles:
+        print(f"Профиль {args.profile} не найден, есть: {', '.join(engine.profiles.names())}",
+              file=sys.stderr)
+        return 2
+    if not engine.gmod_path:
+        print("Garry's Mod не найден!", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_launch(engine: LauncherEngine, args) -> int:
+    error = _check_launch(engine, args)
+    if error:
+        return error
+    return _start(engine, engine.argv(args.profile, console=args.console), args)
+
+
+def cmd_connect(engine: LauncherEngine, args) -> int:
+    error = _check_launch(engine, args)
+    if error:
+        return error
+    address = args.address
+    info = engine.server_cache.info(address)
+    if not args.dry_run:
+        engine.remember_server(list(info.as_row()) if info else [address, "", "", "", address])
+    return _start(engine, engine.argv(args.profile, connect=address, console=args.console), args)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cli.py", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def with_format(p):
+        p.add_argument("--format", choices=("json", "ndjson"), default="ndjson")
+        return p
+
+    servers = commands.add_parser("servers").add_subparsers(dest="action", required=True)
+    query = with_format(servers.add_parser("query", help="опрос серверов по A2S_INFO"))
+    query.add_argument("addresses", nargs="*", metavar="ADDRESS")
+    query.add_argument("--timeout", type=float, default=1.5)
+    query.set_defaults(handler=cmd_servers_query)
+
+    mods = commands.add_parser("mods").add_subparsers(dest="action", required=True)
+    scan = with_format(mods.add_parser("scan", help="аддоны из addons и Мастерской"))
+    scan.add_argument("--addons", help="папка addons (по умолчанию - у найденной игры)")
+    scan.add_argument("--workshop", help="папка workshop/content/4000")
+    scan.set_defaults(handler=cmd_mods_scan)
+    activate = mods.add_parser("activate", help="включить набор аддонов, остальные выключить")
+    activate.add_argument("name")
+    activate.set_defaults(handler=cmd_mods_activate)
+
+    for name, handler in (("launch", cmd_launch), ("connect", cmd_connect)):
+        p = commands.add_parser(name)
+        if name == "connect":
+            p.add_argument("address")
+        p.add_argument("--profile", help="профиль запуска (по умолчанию - активный или закреплённый за сервером)")
+        p.add_argument("--console", action="store_true")
+        p.add_argument("--wait", action="store_true", help="дождаться выхода игры")
+        p.add_argument("--dry-run", action="store_true", help="только напечатать командную строку")
+        p.set_defaults(handler=handler)
+    return parser
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    args = build_parser().parse_args(None if argv is None else list(argv))
+    engine = LauncherEngine()
+    try:
+        return args.handler(engine, args)
+    except BrokenPipeError:
+        # Вывод обрезали (например, через head) - это не ошибка
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    finally:
+        try:
+            engine.store.flush()
+        except Exception as e:
+            print(f"Ошибка сохранения данных: {e}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""Поиск конфликтов и дубликатов файлов между аддонами"""
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from addons import AddonInfo, GmaError, read_gma_header
+from file_hashes import Range, hash_batch
+
+HASH_CACHE_FILE = "addon_hashes.json"
+CACHE_VERSION = 1
+# Мелкие файлы из папок отправляются в процесс пачками, чтобы не платить за каждый
+BATCH_FILES = 64
+
+
+class AddonFile(NamedTuple):
+    addon: str       # название аддона
+    path: str        # путь внутри игры: lua/autorun/foo.lua
+    size: int
+    source: str      # файл на диске: пакет .gma или сам файл
+    index: int       # номер диапазона внутри source
+    owner: str = ""  # путь аддона: названия у разных аддонов могут совпадать
+
+
+class DuplicateGroup(NamedTuple):
+    digest: str
+    size: int
+    copies: List[Tuple[str, str]]   # (аддон, путь)
+
+
+class ConflictReport(NamedTuple):
+    addons: int
+    files: int
+    # Путь -> аддоны, которые кладут по нему разное содержимое
+    conflicts: Dict[str, List[str]]
+    duplicates: List[DuplicateGroup]
+    wasted_bytes: int
+    hashed_files: int
+
+
+def addon_files(addon: AddonInfo) -> List[Tuple[str, int, str, Range]]:
+    """Содержимое аддона: (путь в игре, размер, файл на диске, диапазон в нём)"""
+    files = []
+    if addon.kind == "gma":
+        header = read_gma_header(addon.path)
+        offset = header.data_offset
+        for entry in header.files:
+            files.append((entry.name.lower(), entry.size, addon.path, (offset, entry.size)))
+            offset += entry.size
+        return files
+
+    # В папке игра монтирует только подпапки (lua, materials, ...), addon.json не в счёт
+    for dirpath, _, filenames in os.walk(addon.path):
+        if dirpath == addon.path:
+            continue
+        for name in filenames:
+            full = os.path.join(dirpath, name)
+            try:
+                size = os.path.getsize(full)
+            except OSError:
+                continue
+            rel = os.path.relpath(full, addon.path).replace(os.sep, "/").lower()
+            files.append((rel, size, full, (0, size)))
+    return files
+
+
+class ConflictAnalyzer:
+    """Инвертированный индекс "путь -> аддоны" и поиск одинаковых файлов.
+
+    Хэши считаются в пуле процессов и кэшируются на диске по каждому
+    файлу (пакет .gma или файл из папки) с ключом mtime и размер, так что
+    повторный анализ после установки одного аддона хэширует только его.
+    """
+
+    def __init__(self, cache_path: str = HASH_CACHE_FILE, workers: Optional[int] = None):
+        self.cache_path = cache_path
+        self.workers = workers
+        self.cache: Optional[Dict[str, Dict]] = None
+        self._lock = threading.Lock()
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        if self.cache is None:
+            try:
+                with open(self.cache_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.cache = data["files"] if data.get("version") == CACHE_VERSION else {}
+            except (OSError, ValueError, KeyError):
+                self.cache = {}
+        return self.cache
+
+    def _save_cache(self):
+        tmp_path = self.cache_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_VERSION, "files": self.cache}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Ошибка сохранения кэша хэшей: {e}")
+
+    def analyze(self, mods: Sequence[AddonInfo], cancel=None) -> Optional[ConflictReport]:
+        """Полный отчёт (вызывать из фонового потока); None - анализ отменён"""
+        with self._lock:
+            return self._analyze(mods, cancel)
+
+    def _analyze(self, mods, cancel) -> Optional[ConflictReport]:
+        cache = self._load_cache()
+        files: List[AddonFile] = []
+        # Файл на диске -> (ключ кэша, диапазоны)
+        sources: Dict[str, Tuple[List[int], List[Range]]] = {}
+        for addon in mods:
+            if cancel is not None and cancel.is_set():
+                return None
+            try:
+                entries = addon_files(addon)
+            except (OSError, GmaError) as e:
+                print(f"Ошибка чтения аддона {addon.path}: {e}")
+                continue
+            for path, size, source, rng in entries:
+                if source not in sources:
+                    try:
+                        st = os.stat(source)
+                    except OSError:
+                        continue
+                    sources[source] = ([st.st_mtime_ns, st.st_size], [])
+                ranges = sources[source][1]
+                files.append(AddonFile(addon.title, path, size, source, len(ranges), addon.path))
+                ranges.append(rng)
+
+        digests: Dict[str, List[str]] = {}
+        jobs = []
+        for source, (key, ranges) in sources.items():
+            entry = cache.get(source)
+            if entry and entry["key"] == key and len(entry["hashes"]) == len(ranges):
+                digests[source] = entry["hashes"]
+            else:
+                jobs.append((source, ranges))
+
+        if jobs:
+            # Пакеты .gma - по одному на задачу, мелкие файлы - пачками
+            batches = [[job] for job in jobs if len(job[1]) > 1]
+            singles = [job for job in jobs if len(job[1]) <= 1]
+            batches += [singles[i:i + BATCH_FILES] for i in range(0, len(singles), BATCH_FILES)]
+            # Пул запускается из фонового потока процесса с Tk: fork скопировал бы
+            # чужие потоки и состояние Tcl, поэтому процессы всегда стартуют заново
+            with ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                for batch, results in zip(batches, pool.map(hash_batch, batches)):
+                    if cancel is not None and cancel.is_set():
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        return None
+                    for (source, _), hashes in zip(batch, results):
+                        if hashes is not None:
+                            digests[source] = hashes
+
+        # Кэш хранит только файлы текущего набора аддонов
+        self.cache = {source: {"key": sources[source][0], "hashes": hashes}
+                      for source, hashes in digests.items()}
+        self._save_cache()
+        return build_report(len(mods), files, digests, sum(len(job[1]) for job in jobs))
+
+
+def build_report(addon_count: int, files: Sequence[AddonFile],
+                 digests: Dict[str, List[str]], hashed_files: int = 0) -> ConflictReport:
+    # Путь в игре -> {аддон: (название, хэш)}
+    by_path: Dict[str, Dict[str, Tuple[str, str]]] = {}
+    by_digest: Dict[str, List[AddonFile]] = {}
+    for file in files:
+        hashes = digests.get(file.source)
+        digest = hashes[file.index] if hashes else None
+        # Файл, который не удалось прочитать, ни с чем не сравнить
+        if digest is None:
+            continue
+        by_path.setdefault(file.path, {})[file.owner or file.addon] = (file.addon, digest)
+        if file.size:
+            by_digest.setdefault(digest, []).append(file)
+
+    conflicts = {}
+    for path, owners in by_path.items():
+        # Одинаковое содержимое по одному пути - это дубликат, а не конфликт
+        if len(owners) > 1 and len({digest for _, digest in owners.values()}) > 1:
+            conflicts[path] = sorted(title for title, _ in owners.values())
+
+    duplicates = []
+    wasted = 0
+    for digest, copies in by_digest.items():
+        if len(copies) > 1:
+            size = copies[0].size
+            duplicates.append(DuplicateGroup(digest, size, [(f.addon, f.path) for f in copies]))
+            wasted += size * (len(copies) - 1)
+    duplicates.sort(key=lambda group: group.size * (len(group.copies) - 1), reverse=True)
+    return ConflictReport(addon_count, len(files), conflicts, duplicates, wasted, hashed_files)
@@ -0,0 +1,388 @@
+"""Место на диске: addons, Workshop, cache и download с кэшем размеров по папкам"""
+import json
+import os
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import vdf
+
+USAGE_CACHE_FILE = "disk_usage.json"
+CACHE_VERSION = 1
+SCAN_WORKERS = 8
+# Элементов верхнего уровня на задачу пула: тысячи предметов Workshop
+# не должны превращаться в тысячи задач
+JOB_SIZE = 64
+# Кэш и загрузки с серверов, не менявшиеся дольше этого, предлагается удалить
+STALE_AGE = 30 * 86400
+# Мелочь в подсказки не попадает
+MIN_SUGGESTION_BYTES = 1 << 20
+# Корни, содержимое которых игра скачивает сама и может скачать заново
+CACHE_ROOTS = ("cache", "download")
+
+
+class UsageRoot(NamedTuple):
+    name: str            # "addons", "workshop", "cache" или "download"
+    path: str
+
+
+class Suggestion(NamedTuple):
+    kind: str            # "stale_cache" или "unsubscribed"
+    path: str
+    size: int
+    modified: float      # последнее изменение внутри папки
+
+
+class UsageReport(NamedTuple):
+    tree: "DiskTree"
+    suggestions: List[Suggestion]
+
+    @property
+    def reclaimable(self) -> int:
+        return sum(s.size for s in self.suggestions)
+
+
+class DiskTree:
+    """Дерево папок в параллельных массивах, узел - индекс.
+
+    Родитель всегда добавляется раньше детей, поэтому суммы по
+    поддеревьям считаются одним проходом с конца.
+    Дети связаны списком first_child/next_sibling.
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.parent = array("i")
+        self.first_child = array("i")
+        self.next_sibling = array("i")
+        # Файлы прямо в папке и вместе с подпапками
+        self.own = array("q")
+        self.size = array("q")
+        self.files = array("q")
+        # Самое позднее mtime в поддереве, сек
+        self.newest = array("d")
+        # Узел корня -> (имя корня, путь на диске)
+        self.roots: Dict[int, UsageRoot] = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name: str, parent: int = -1) -> int:
+        node = len(self.names)
+        self.names.append(name)
+        self.parent.append(parent)
+        self.first_child.append(-1)
+        self.next_sibling.append(-1)
+        self.own.append(0)
+        self.size.append(0)
+        self.files.append(0)
+        self.newest.append(0.0)
+        if parent >= 0:
+            self.next_sibling[node] = self.first_child[parent]
+            self.first_child[parent] = node
+        return node
+
+    def add_root(self, root: UsageRoot) -> int:
+        node = self.add(root.name)
+        self.roots[node] = root
+        return node
+
+    def extend(self, root: int, nodes: Sequence[tuple]):
+        """Узлы (имя, родитель, байт, файлов, свежесть) пачкой; родитель -1 - это root,
+        иначе номер внутри nodes"""
+        offset = len(self.names)
+        parents = [root if parent < 0 else offset + parent for _, parent, _, _, _ in nodes]
+        self.names.extend(node[0] for node in nodes)
+        self.parent.extend(parents)
+        self.own.extend(node[2] for node in nodes)
+        self.files.extend(node[3] for node in nodes)
+        self.newest.extend(node[4] for node in nodes)
+        self.size.extend([0] * len(nodes))
+        self.first_child.extend([-1] * len(nodes))
+        self.next_sibling.extend([-1] * len(nodes))
+        first_child, next_sibling = self.first_child, self.next_sibling
+        for node, parent in enumerate(parents, offset):
+            next_sibling[node] = first_child[parent]
+            first_child[parent] = node
+
+    def set(self, node: int, own: int, files: int, newest: float):
+        self.own[node] = own
+        self.files[node] = files
+        self.newest[node] = newest
+
+    def aggregate(self):
+        """Размеры, число файлов и свежесть поддеревьев снизу вверх"""
+        size, files, newest, parent = self.size, self.files, self.newest, self.parent
+        size[:] = self.own
+        for node in range(len(self.names) - 1, -1, -1):
+            up = parent[node]
+            if up >= 0:
+                size[up] += size[node]
+                files[up] += files[node]
+                if newest[node] > newest[up]:
+                    newest[up] = newest[node]
+
+    def children(self, node: int) -> List[int]:
+        result = []
+        child = self.first_child[node]
+        while child >= 0:
+            result.append(child)
+            child = self.next_sibling[child]
+        return result
+
+    def ranked(self, node: Optional[int] = None, limit: Optional[int] = None) -> List[int]:
+        """Дети узла (без node - корни) от больших к меньшим"""
+        nodes = list(self.roots) if node is None else self.children(node)
+        nodes.sort(key=lambda n: -self.size[n])
+        return nodes if limit is None else nodes[:limit]
+
+    def path(self, node: int) -> str:
+        parts = []
+        while self.parent[node] >= 0:
+            parts.append(self.names[node])
+            node = self.parent[node]
+        return os.path.join(self.roots[node].path, *reversed(parts))
+
+    @property
+    def total(self) -> int:
+        return sum(self.size[node] for node in self.roots)
+
+
+def format_size(size: int) -> str:
+    if size >= 1 << 30:
+        return f"{size / (1 << 30):.1f} GB"
+    return f"{size / (1 << 20):.1f} MB"
+
+
+def _read_listing(path: str, mtime_ns: int) -> list:
+    """[mtime папки, байт и файлов прямо в ней, свежайший файл, подпапки]"""
+    own = files = 0
+    newest = mtime_ns / 1e9
+    subdirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                # Ссылки не разворачиваются: без циклов и двойного счёта
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    own += st.st_size
+                    files += 1
+                    if st.st_mtime > newest:
+                        newest = st.st_mtime
+            except OSError:
+                continue
+    return [mtime_ns, own, files, newest, subdirs]
+
+
+def workshop_manifest(workshop_path: str) -> str:
+    """appworkshop_4000.acf для папки workshop/content/4000"""
+    return os.path.join(os.path.dirname(os.path.dirname(workshop_path)), "appworkshop_4000.acf")
+
+
+def subscribed_items(manifest_path: str) -> Optional[Set[str]]:
+    """ID предметов, на которые подписан аккаунт; None - манифест не прочитать"""
+    try:
+        data = vdf.load(manifest_path)
+    except (OSError, vdf.VdfError) as e:
+        print(f"Ошибка чтения {manifest_path}: {e}")
+        return None
+    workshop = vdf.get_ci(data, "AppWorkshop", {})
+    details = vdf.get_ci(workshop, "WorkshopItemDetails", {}) if isinstance(workshop, dict) else {}
+    if not isinstance(details, dict):
+        return None
+    # Предметы, скачанные для сервера без подписки, идут с subscribedby 0 или без него
+    return {item_id for item_id, item in details.items()
+            if isinstance(item, dict) and str(vdf.get_ci(item, "subscribedby", "0")) != "0"}
+
+
+def suggest(tree: DiskTree, subscribed: Optional[Set[str]] = None,
+            now: Optional[float] = None, stale_age: float = STALE_AGE,
+            downloaded: Optional[Set[str]] = None) -> List[Suggestion]:
+    """Что можно удалить: давно не менявшийся кэш и предметы Workshop без подписки.
+
+    downloaded - предметы, скачанные самим лаунчером через steamcmd: подписки
+    на них нет, но удалять их не предлагается.
+    """
+    downloaded = downloaded or set()
+    now = time.time() if now is None else now
+    result = []
+    for root, info in tree.roots.items():
+        for node in tree.children(root):
+            if tree.size[node] < MIN_SUGGESTION_BYTES:
+                continue
+            if info.name in CACHE_ROOTS and tree.newest[node] < now - stale_age:
+                kind = "stale_cache"
+            elif (info.name == "workshop" and subscribed is not None
+                  and tree.names[node].isdigit() and tree.names[node] not in subscribed
+                  and tree.names[node] not in downloaded):
+                kind = "unsubscribed"
+            else:
+                continue
+            result.append(Suggestion(kind, tree.path(node), tree.size[node], tree.newest[node]))
+    result.sort(key=lambda s: -s.size)
+    return result
+
+
+class DiskUsage:
+    """Обход папок через os.scandir в пуле потоков с кэшем на диске.
+
+    Для каждой папки запоминаются её mtime, размер и число файлов прямо
+    в ней и список подпапок. Пока mtime папки не изменился, она не
+    читается заново, так что повторный скан - это один stat на папку.
+    Файл, перезаписанный на месте, mtime папки не меняет: его новый размер
+    учтётся, когда в папке что-то добавят или удалят.
+    """
+
+    def __init__(self, path: str = USAGE_CACHE_FILE, workers: int = SCAN_WORKERS):
+        self.path = path
+        self.workers = workers
+        self.dirs: Optional[Dict[str, list]] = None
+        # Разобранный манифест Workshop: {"key": [путь, mtime, размер], "items": [...]}
+        self.manifest: Optional[Dict] = None
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != CACHE_VERSION:
+                raise ValueError("другая версия кэша")
+            self.dirs = data["dirs"]
+            self.manifest = data.get("manifest")
+        except (OSError, ValueError, KeyError):
+            self.dirs = {}
+            self.manifest = None
+
+    def save(self):
+        with self._lock:
+            if not self.dirty:
+                return
+            tmp_path = self.path + ".tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"version": CACHE_VERSION, "dirs": self.dirs, "manifest": self.manifest},
+                              f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+                self.dirty = False
+            except OSError as e:
+                print(f"Ошибка сохранения кэша размеров: {e}")
+
+    def _listing(self, path: str) -> Optional[list]:
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            cached = self.dirs.get(path)
+        if cached and cached[0] == mtime_ns:
+            return cached
+        try:
+            listing = _read_listing(path, mtime_ns)
+        except OSError:
+            return None
+        with self._lock:
+            self.dirs[path] = listing
+            self.dirty = True
+        return listing
+
+    def _walk(self, top: Sequence[str], cancel=None) -> Tuple[List[tuple], List[str]]:
+        """Поддеревья папок top в прямом порядке (задача пула).
+
+        Узел - (имя, номер родителя в списке или -1, байт, файлов, свежесть);
+        вторым списком идут прочитанные пути.
+        """
+        nodes: List[tuple] = []
+        paths: List[str] = []
+        stack = [(path, -1, os.path.basename(path)) for path in reversed(top)]
+        while stack:
+            if cancel is not None and cancel.is_set():
+                break
+            folder, parent, name = stack.pop()
+            listing = self._listing(folder)
+            if listing is None:
+                continue
+            _, own, files, newest, subdirs = listing
+            nodes.append((name, parent, own, files, newest))
+            paths.append(folder)
+            index = len(nodes) - 1
+            stack.extend((os.path.join(folder, sub), index, sub) for sub in subdirs)
+        return nodes, paths
+
+    def scan(self, roots: Sequence[UsageRoot], cancel=None) -> Optional[DiskTree]:
+        """Дерево размеров (вызывать из фонового потока); None - скан отменён"""
+        if self.dirs is None:
+            self.load()
+        tree = DiskTree()
+        seen: Set[str] = set()
+        # Задача пула - пачка элементов верхнего уровня одного корня (аддоны, предметы Workshop)
+        jobs: List[Tuple[int, List[str]]] = []
+        for root in roots:
+            listing = self._listing(root.path) if root.path else None
+            if listing is None:
+                continue
+            node = tree.add_root(root)
+            _, own, files, newest, subdirs = listing
+            tree.set(node, own, files, newest)
+            seen.add(root.path)
+            for start in range(0, len(subdirs), JOB_SIZE):
+                jobs.append((node, [os.path.join(root.path, sub) for sub in subdirs[start:start + JOB_SIZE]]))
+
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="disk_usage") as pool:
+            results = pool.map(lambda top: self._walk(top, cancel), [top for _, top in jobs])
+            for (root, _), (nodes, paths) in zip(jobs, results):
+                if cancel is not None and cancel.is_set():
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    return None
+                tree.extend(root, nodes)
+                seen.update(paths)
+
+        tree.aggregate()
+        self._forget_missing(seen, [root.path for root in tree.roots.values()])
+        self.save()
+        return tree
+
+    def _forget_missing(self, seen: Set[str], roots: Iterable[str]):
+        """Убрать из кэша папки, которых в просканированных корнях больше нет"""
+        roots = set(roots)
+        prefixes = tuple(os.path.join(root, "") for root in roots)
+        with self._lock:
+            stale = [path for path in self.dirs
+                     if (path in roots or path.startswith(prefixes)) and path not in seen]
+            for path in stale:
+                del self.dirs[path]
+            if stale:
+                self.dirty = True
+
+    def subscribed(self, manifest_path: str) -> Optional[Set[str]]:
+        """Подписки из манифеста; разбор повторяется, только если файл изменился"""
+        try:
+            st = os.stat(manifest_path)
+        except OSError:
+            return None
+        if self.dirs is None:
+            self.load()
+        key = [manifest_path, st.st_mtime_ns, st.st_size]
+        with self._lock:
+            if self.manifest and self.manifest["key"] == key:
+                return set(self.manifest["items"])
+        items = subscribed_items(manifest_path)
+        if items is not None:
+            with self._lock:
+                self.manifest = {"key": key, "items": sorted(items)}
+                self.dirty = True
+        return items
+
+    def analyze(self, roots: Sequence[UsageRoot], manifest_path: Optional[str] = None,
+                cancel=None, downloaded: Optional[Set[str]] = None) -> Optional[UsageReport]:
+        """Скан и подсказки; без манифеста Workshop подписки не проверяются"""
+        tree = self.scan(roots, cancel)
+        if tree is None:
+            return None
+        subscribed = self.subscribed(manifest_path) if manifest_path else None
+        self.save()
+        return UsageReport(tree, suggest(tree, subscribed, downloaded=downloaded))
@@ -0,0 +1,299 @@
+"""Логика лаунчера без интерфейса: пути, хранилище, серверы, моды и запуск игры.
+
+Модуль не импортирует tkinter и PIL, поэтому годится для CLI и скриптов.
+GModLauncher строит окно поверх того же движка.
+"""
+import os
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Set
+
+import steam_paths
+import supervisor
+from addon_profiles import ALL_ADDONS, AddonSwitcher, SwitchError, SwitchResult
+from addons import AddonIndex, AddonInfo
+from disk_usage import DiskUsage, UsageReport, UsageRoot, workshop_manifest
+from launch_profiles import DEFAULT_PROFILE, PRESETS, ProfileSet
+from profiling import span, traced
+from steam_library import SteamLibraryIndex
+from storage import LauncherStore
+from supervisor import GameSession
+
+if TYPE_CHECKING:
+    from a2s import ServerInfo
+    from server_cache import ServerCache
+
+
+class LauncherEngine:
+    """Состояние лаунчера, общее для окна и командной строки.
+
+    Пути к Steam и игре ищутся при первом обращении, а не в конструкторе:
+    запрос к серверам не должен ждать реестр и обход библиотек Steam.
+    """
+
+    def __init__(self, store: Optional[LauncherStore] = None):
+        # Избранное, свои серверы и история - по адресу сервера
+        self.store = store or LauncherStore()
+        # Данные нужны до поиска путей: там хранятся заданные вручную пути
+        self.load_data()
+
+        # Профили запуска разбираются один раз, при запуске берётся готовый argv
+        self.profiles = ProfileSet({**PRESETS, **self.store.section("launch_profiles")})
+
+        self._paths_found = False
+        self._steam_path: Optional[str] = None
+        self._gmod_path: Optional[str] = None
+        self.path_resolver = steam_paths.SteamPathResolver(
+            [self.store.get("settings", "steam_path")])
+        self.library_index = SteamLibraryIndex()
+
+        self._server_cache: Optional["ServerCache"] = None
+        # Индекс аддонов: при повторном скане разбираются только изменённые пакеты
+        self.addon_index = AddonIndex()
+        # Размеры папок: повторный анализ читает только изменившиеся
+        self.disk_usage = DiskUsage()
+
+    @traced
+    def load_data(self):
+
+        try:
+            self.store.load()
+        except Exception as e:
+            print(f"Ошибка загрузки данных: {e}")
+
+    @property
+    def server_cache(self) -> "ServerCache":
+        # a2s тянет за собой asyncio: запуску игры и списку модов он не нужен
+        if self._server_cache is None:
+            from server_cache import ServerCache
+            self._server_cache = ServerCache()
+            with span("server_cache.load"):
+                self._server_cache.load()
+        return self._server_cache
+
+    def save(self):
+        """Запись хранилища и кэшей на диск"""
+        try:
+            self.store.flush()
+        except Exception as e:
+            print(f"Ошибка сохранения данных: {e}")
+        if self._server_cache is not None:
+            self._server_cache.save()
+        self.addon_index.save()
+
+    # --- пути ---
+
+    @property
+    def steam_path(self) -> Optional[str]:
+        if not self._paths_found:
+            self.update_paths()
+        return self._steam_path
+
+    @property
+    def gmod_path(self) -> Optional[str]:
+        if not self._paths_found:
+            self.update_paths()
+        return self._gmod_path
+
+    @property
+    def paths_found(self) -> bool:
+        return self._paths_found
+
+    def set_paths(self, paths):
+        self._steam_path, self._gmod_path = paths
+        self._paths_found = True
+
+    @traced
+    def update_paths(self):
+        """Обновление путей к Steam и GMod"""
+        self.set_paths(self.find_paths())
+
+    @traced
+    def find_paths(self):
+        """Поиск путей без изменения состояния (безопасно вызывать из потока)"""
+        steam_path = self.find_steam_path()
+        return steam_path, self.find_gmod_path(steam_path)
+
+    def find_steam_path(self) -> Optional[str]:
+        """Поиск Steam: ручные пути, реестр Windows, стандартные папки Linux/macOS"""
+        return self.path_resolver.steam_path()
+
+    def find_gmod_path(self, steam_path: Optional[str] = None) -> Optional[str]:
+        """Поиск пути к Garry's Mod"""
+        # Выбранный вручную файл важнее найденного автоматически
+        manual_path = self.store.get("settings", "gmod_path")
+        if manual_path and os.path.isfile(manual_path):
+            return manual_path
+
+        steam_path = steam_path or self._steam_path
+        if not steam_path:
+            return None
+
+        # Библиотеки и приложения в них берутся из индекса, который
+        # пересобирается только при изменении libraryfolders.vdf
+        for attempt in range(2):
+            app = self.library_index.find_app(steam_path)
+            gmod_path = steam_paths.find_gmod_binary(app.path) if app else None
+            if gmod_path:
+                return gmod_path
+            # Игру перенесли или удалили без правки vdf - индекс пересобирается,
+            # но не чаще раза на одну версию vdf
+            if not app or not self.library_index.refresh(steam_path):
+                break
+        # Установка без appmanifest: стандартная папка в основной библиотеке
+        return steam_paths.find_gmod_binary(
+            os.path.join(steam_path, "steamapps", "common", "GarrysMod"))
+
+    def addons_path(self) -> Optional[str]:
+        """Папка garrysmod/addons рядом с найденной игрой"""
+        return self._addons_path(self.steam_path, self.gmod_path)
+
+    @staticmethod
+    def _addons_path(steam_path: Optional[str], gmod_path: Optional[str]) -> Optional[str]:
+        if gmod_path:
+            return os.path.join(os.path.dirname(gmod_path), "garrysmod", "addons")
+        if steam_path:
+            return os.path.join(steam_path, "steamapps", "common", "GarrysMod", "garrysmod", "addons")
+        return None
+
+    def workshop_path(self) -> Optional[str]:
+        """Папка steamapps/workshop/content/4000 в библиотеке с игрой"""
+        if self.gmod_path:
+            steamapps = os.path.dirname(os.path.dirname(os.path.dirname(self.gmod_path)))
+        elif self.steam_path:
+            steamapps = os.path.join(self.steam_path, "steamapps")
+        else:
+            return None
+        return os.path.join(steamapps, "workshop", "content", "4000")
+
+    # --- серверы и моды ---
+
+    def server_addresses(self, sections: Iterable[str] = ("favorites", "custom_servers", "history")) -> List[str]:
+        """Адреса из разделов хранилища без повторов"""
+        addresses: Dict[str, None] = {}
+        for section in sections:
+            addresses.update(dict.fromkeys(str(row[4]) for row in self.store.section(section).values()))
+        return list(addresses)
+
+    def query_servers(self, addresses: Iterable[str],
+                      on_result: Optional[Callable[[str, Optional["ServerInfo"]], None]] = None,
+                      cancel=None, **kwargs) -> Dict[str, Optional["ServerInfo"]]:
+        """Опрос A2S_INFO с записью ответов и отказов в кэш серверов"""
+        import a2s
+
+        def record(address, info):
+            if info:
+                self.server_cache.store(info)
+            else:
+                self.server_cache.record_failure(address)
+            if on_result:
+                on_result(address, info)
+
+        results = a2s.query_servers(addresses, on_result=record, cancel=cancel, **kwargs)
+        self.server_cache.save()
+        return results
+
+    @traced
+    def scan_mods(self, mods_path=None, workshop_path=None, cancel=None) -> List[AddonInfo]:
+        """Аддоны из addons и Workshop (по умолчанию - у найденной игры)"""
+        if mods_path is None:
+            mods_path, workshop_path = self.addons_path(), self.workshop_path()
+        if not mods_path:
+            return []
+        return self.addon_index.scan(mods_path, workshop_path, cancel=cancel)
+
+    def recover_addons(self, paths=None) -> int:
+        """Откат смены набора аддонов, прерванной сбоем (при запуске окна).
+
+        paths - результат find_paths, ещё не переданный в set_paths.
+        Если смена идёт прямо сейчас в другом процессе, ничего не делает.
+        """
+        mods_path = self._addons_path(*paths) if paths else self.addons_path()
+        return AddonSwitcher(mods_path).recover(wait=False) if mods_path else 0
+
+    def addon_profile_names(self) -> List[str]:
+        return [ALL_ADDONS] + sorted(self.store.section("addon_profiles"))
+
+    def save_addon_profile(self, name: str, entries: Iterable[str]):
+        """Набор - имена элементов addons (папок и .gma)"""
+        self.store.put("addon_profiles", name, sorted(entries))
+
+    def activate_addon_profile(self, name: str) -> SwitchResult:
+        """Включить аддоны набора и выключить остальные (переносит только разницу)"""
+        mods_path = self.addons_path()
+        if not mods_path:
+            raise FileNotFoundError("Не найден путь к Steam!")
+        # Игра держит файлы аддонов открытыми; её могли запустить и из окна, и из CLI
+        if self.gmod_path and supervisor.game_running(self.gmod_path):
+            raise SwitchError("Закройте игру перед сменой набора аддонов")
+        if name == ALL_ADDONS:
+            entries = None
+        elif name in self.store.section("addon_profiles"):
+            entries = self.store.get("addon_profiles", name)
+        else:
+            raise KeyError(name)
+        result = AddonSwitcher(mods_path).apply(entries)
+        self.store.put("settings", "addon_profile", name)
+        return result
+
+    def usage_roots(self) -> List[UsageRoot]:
+        """Папки для анализа места: addons, Workshop, cache и download игры"""
+        addons = self.addons_path()
+        if not addons:
+            return []
+        garrysmod = os.path.dirname(addons)
+        roots = [UsageRoot("addons", addons), UsageRoot("workshop", self.workshop_path() or ""),
+                 UsageRoot("cache", os.path.join(garrysmod, "cache")),
+                 UsageRoot("download", os.path.join(garrysmod, "download"))]
+        return [root for root in roots if root.path]
+
+    def record_download(self, item_id: str):
+        """Запомнить предмет, скачанный через steamcmd: в подписках Steam его нет"""
+        self.store.put("downloaded_items", item_id, int(time.time()))
+
+    def downloaded_items(self) -> Set[str]:
+        return set(self.store.section("downloaded_items"))
+
+    def analyze_disk(self, cancel=None, downloaded: Optional[Set[str]] = None) -> Optional[UsageReport]:
+        """Занятое место и подсказки по очистке (вызывать из фонового потока).
+
+        downloaded берётся в потоке, который пишет в хранилище; по умолчанию - здесь же.
+        """
+        workshop = self.workshop_path()
+        if downloaded is None:
+            downloaded = self.downloaded_items()
+        return self.disk_usage.analyze(self.usage_roots(),
+                                       workshop_manifest(workshop) if workshop else None, cancel,
+                                       downloaded)
+
+    # --- запуск ---
+
+    def default_profile(self) -> str:
+        name = self.store.get("settings", "launch_profile", DEFAULT_PROFILE)
+        return name if name in self.profiles else DEFAULT_PROFILE
+
+    def profile_for(self, connect: Optional[str] = None, default: Optional[str] = None) -> str:
+        """Профиль, закреплённый за сервером, иначе default (активный)"""
+        name = default or self.default_profile()
+        if connect:
+            name = self.store.get("server_profiles", str(connect)) or name
+        return name
+
+    def argv(self, profile: Optional[str] = None, connect: Optional[str] = None,
+             console: bool = False, options: Optional[str] = None) -> List[str]:
+        return self.profiles.argv(self.gmod_path, profile or self.profile_for(connect),
+                                  connect, console, options)
+
+    def remember_server(self, row: List):
+        """Строка сервера в историю; старые записи вытесняются"""
+        self.store.put("history", str(row[4]), list(row))
+
+    def record_session(self, session: GameSession):
+        """Запись о запуске сохраняется; хранятся последние HISTORY_LIMIT"""
+        launches = self.store.section("launches")
+        self.store.put("launches", f"{session.started:.3f}", session._asdict())
+        while len(launches) > supervisor.HISTORY_LIMIT:
+            self.store.delete("launches", next(iter(launches)))
+
+    def launch_history(self) -> List[Dict]:
+        """Прошлые запуски из хранилища, самые новые в конце"""
+        return list(self.store.section("launches").values())
@@ -0,0 +1,44 @@
+"""Хэши диапазонов файлов для пула процессов поиска конфликтов.
+
+Модуль импортируется в дочерних процессах, поэтому тянет только
+стандартную библиотеку: ни tkinter, ни модулей лаунчера.
+"""
+import hashlib
+import mmap
+import os
+from typing import List, Optional, Sequence, Tuple
+
+CHUNK_SIZE = 1 << 20
+
+Range = Tuple[int, int]
+
+
+def hash_ranges(path: str, ranges: Sequence[Range]) -> List[str]:
+    """Хэши диапазонов файла; чтение через mmap кусками по CHUNK_SIZE"""
+    digests = []
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return [hashlib.blake2b(digest_size=16).hexdigest() for _ in ranges]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            view = memoryview(data)
+            try:
+                for offset, size in ranges:
+                    h = hashlib.blake2b(digest_size=16)
+                    end = offset + size
+                    for pos in range(offset, end, CHUNK_SIZE):
+                        h.update(view[pos:min(pos + CHUNK_SIZE, end)])
+                    digests.append(h.hexdigest())
+            finally:
+                view.release()
+    return digests
+
+
+def hash_batch(jobs: Sequence[Tuple[str, Sequence[Range]]]) -> List[Optional[List[str]]]:
+    """Выполняется в дочернем процессе; None - файл не прочитался"""
+    results = []
+    for path, ranges in jobs:
+        try:
+            results.append(hash_ranges(path, ranges))
+        except (OSError, ValueError):
+            results.append(None)
+    return results
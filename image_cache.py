@@ -0,0 +1,104 @@
+"""Кэш масштабированных и затемнённых вариантов картинок лаунчера"""
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+CACHE_DIR = os.path.join(".cache", "images")
+MANIFEST = "manifest.json"
+DARK_FACTOR = 0.4
+
+
+def darken(image: "Image.Image", factor: float = DARK_FACTOR) -> "Image.Image":
+    """Затемнение одной таблицей на все пиксели; альфа-канал не меняется"""
+    table = [int(i * factor) for i in range(256)]
+    if image.mode == "RGBA":
+        return image.point(table * 3 + list(range(256)))
+    return image.convert("RGB").point(table * 3)
+
+
+VARIANTS = {
+    "normal": lambda image: image,
+    "dark": darken,
+}
+
+
+class ImageCache:
+    """Готовые варианты картинок на диске, ключ - хэш исходника, размер и вариант.
+
+    Хэш исходника пересчитывается, только если у файла изменились mtime или
+    размер, так что тёплый запуск читает лишь маленький готовый файл.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._manifest: Optional[Dict[str, Dict]] = None
+        self._lock = threading.Lock()
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.cache_dir, MANIFEST)
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        if self._manifest is None:
+            try:
+                with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            except (OSError, ValueError):
+                self._manifest = {}
+        return self._manifest
+
+    def _save_manifest(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._manifest_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f)
+        os.replace(tmp_path, self._manifest_path())
+
+    def source_hash(self, path: str) -> str:
+        st = os.stat(path)
+        stamp = [st.st_mtime_ns, st.st_size]
+        with self._lock:
+            entry = self._load_manifest().get(os.path.abspath(path))
+            if entry and entry["stat"] == stamp:
+                return entry["sha1"]
+        with open(path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        with self._lock:
+            self._load_manifest()[os.path.abspath(path)] = {"stat": stamp, "sha1": digest}
+            try:
+                self._save_manifest()
+            except OSError as e:
+                print(f"Ошибка сохранения кэша изображений: {e}")
+        return digest
+
+    def variant_path(self, path: str, size: Tuple[int, int], variant: str) -> str:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name = f"{stem}-{self.source_hash(path)[:16]}-{size[0]}x{size[1]}-{variant}.png"
+        return os.path.join(self.cache_dir, name)
+
+    def get(self, path: str, size: Tuple[int, int], variant: str = "normal",
+            persist: bool = True) -> "Image.Image":
+        """Картинка нужного размера и варианта (потокобезопасно, без Tk)"""
+        cached = self.variant_path(path, size, variant)
+        if os.path.exists(cached):
+            try:
+                with Image.open(cached) as image:
+                    image.load()
+                    return image
+            except OSError:
+                pass
+
+        with Image.open(path) as source:
+            image = VARIANTS[variant](source.resize(size, Image.LANCZOS))
+        if persist:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = cached + ".tmp"
+                image.save(tmp_path, format="PNG", compress_level=1)
+                os.replace(tmp_path, cached)
+            except OSError as e:
+                print(f"Ошибка сохранения кэша изображений: {e}")
+        return image
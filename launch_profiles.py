@@ -0,0 +1,123 @@
+"""Профили параметров запуска игры с заранее собранной командной строкой"""
+import shlex
+import sys
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+DEFAULT_PROFILE = "windowed"
+
+PRESETS: Dict[str, str] = {
+    "windowed": "-windowed -w 1920 -h 1080",
+    "fullscreen": "-fullscreen",
+    "benchmark": "-novid -high +fps_max 0 +cl_showfps 1",
+    "dev": "-console -condebug -dev",
+}
+
+# Флаги, за которыми идёт значение (у +команд значение есть всегда)
+VALUE_FLAGS = {"-w", "-h", "-dxlevel", "-refresh", "-threads", "-game", "-heapsize", "-port"}
+# Пары взаимоисключающих групп флагов
+EXCLUSIVE = (
+    ({"-windowed", "-sw", "-window"}, {"-fullscreen", "-full"}),
+)
+
+
+class ProfileError(ValueError):
+    """Строку параметров не удалось разобрать"""
+
+
+class LaunchProfile(NamedTuple):
+    name: str
+    options: str
+    args: Tuple[str, ...]
+    conflicts: Tuple[str, ...]
+
+
+def split_options(text: str) -> List[str]:
+    """Разбор с учётом кавычек; на Windows обратные слэши путей не трогаются"""
+    try:
+        if sys.platform == "win32":
+            return [token[1:-1] if len(token) > 1 and token[0] == token[-1] == '"' else token
+                    for token in shlex.split(text, posix=False)]
+        return shlex.split(text)
+    except ValueError as e:
+        raise ProfileError(f"Ошибка в параметрах запуска: {e}") from None
+
+
+def _flag_values(args: List[str]) -> Iterable[Tuple[str, Optional[str]]]:
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        takes_value = arg.startswith("+") or arg.lower() in VALUE_FLAGS
+        if takes_value and i + 1 < len(args) and not args[i + 1].startswith(("-", "+")):
+            yield arg.lower(), args[i + 1]
+            i += 2
+        else:
+            yield arg.lower(), None
+            i += 1
+
+
+def find_conflicts(args: List[str]) -> List[str]:
+    """Повторы флага с разными значениями и взаимоисключающие флаги"""
+    conflicts = []
+    seen: Dict[str, Optional[str]] = {}
+    for flag, value in _flag_values(args):
+        if flag in seen and seen[flag] != value:
+            conflicts.append(f"{flag}: {seen[flag]} / {value}")
+        seen[flag] = value
+    for first, second in EXCLUSIVE:
+        a, b = first & seen.keys(), second & seen.keys()
+        if a and b:
+            conflicts.append(" / ".join(sorted(a) + sorted(b)))
+    return conflicts
+
+
+def compile_profile(name: str, options: str) -> LaunchProfile:
+    args = split_options(options)
+    return LaunchProfile(name, options, tuple(args), tuple(find_conflicts(args)))
+
+
+class ProfileSet:
+    """Именованные профили с уже разобранными аргументами.
+
+    Строка разбирается один раз при сохранении профиля, поэтому запуск
+    только склеивает готовые кортежи.
+    """
+
+    def __init__(self, options: Optional[Dict[str, str]] = None):
+        self.profiles: Dict[str, LaunchProfile] = {}
+        for name, text in (options or PRESETS).items():
+            try:
+                self.profiles[name] = compile_profile(name, text)
+            except ProfileError as e:
+                print(f"Профиль {name} пропущен: {e}")
+
+    def __contains__(self, name):
+        return name in self.profiles
+
+    def names(self) -> List[str]:
+        return list(self.profiles)
+
+    def get(self, name: str) -> LaunchProfile:
+        return self.profiles.get(name) or self.profiles.get(DEFAULT_PROFILE) \
+            or LaunchProfile(name, "", (), ())
+
+    def set(self, name: str, options: str) -> LaunchProfile:
+        """Сохранить профиль; ProfileError, если строку не разобрать"""
+        profile = self.profiles.get(name)
+        if profile is None or profile.options != options:
+            profile = self.profiles[name] = compile_profile(name, options)
+        return profile
+
+    def remove(self, name: str):
+        self.profiles.pop(name, None)
+
+    def argv(self, binary: str, name: str, connect: Optional[str] = None,
+             console: bool = False, options: Optional[str] = None) -> List[str]:
+        """options - разовая строка вместо сохранённой (профиль не меняется);
+        ProfileError, если её не разобрать"""
+        args = [binary]
+        if connect:
+            args += ["-connect", connect]
+        args += self.get(name).args if options is None else compile_profile(name, options).args
+        if console and "-console" not in args:
+            args.append("-console")
+        return args
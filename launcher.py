@@ -1,46 +1,191 @@
 #The source code
+# Первым: отсчёт времени запуска идёт от импорта profiling
+import profiling
+from profiling import traced
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog, simpledialog
-import subprocess
+from tkinter import ttk, messagebox
 import os
-import winreg
-import json
-import webbrowser
-from PIL import Image, ImageTk
-from typing import Optional, List, Dict
+import sys
+import bisect
+import time
+from typing import TYPE_CHECKING, Optional, List, Dict
+
+from server_model import ServerTable
+from server_filter import ServerIndex
+from workers import Batcher, CancelToken, TaskRunner
+
+# Остальное импортируется при первом использовании: asyncio, PIL, urllib
+# и subprocess не нужны, чтобы нарисовать окно
+if TYPE_CHECKING:
+    from PIL.ImageTk import PhotoImage
+    from addons import AddonInfo
+    from conflicts import ConflictAnalyzer, ConflictReport
+    from disk_usage import UsageReport
+    from image_cache import ImageCache
+    from supervisor import GameSession
+    from watcher import DirectoryWatcher
+    from workshop_queue import WorkshopQueue
+
+# Если окно так и не получило Expose (например, запущено свёрнутым),
+# загрузка данных начинается по таймеру
+STARTUP_FALLBACK_MS = 500
+# Строк на уровень в окне места на диске; остальные сводятся в одну
+USAGE_ROWS = 500
 
 class GModLauncher:
+    @traced(name="startup")
     def __init__(self, root):
         self.root = root
         self.dark_mode = False
         self.language = "ru"
-        self.favorite_servers = []
-        self.custom_servers = []
-        self.server_history = []
-        
-        self.steam_path: Optional[str] = None
-        self.gmod_path: Optional[str] = None
-        self.update_paths()
-        
-        self.load_data()
+        self.save_pending = False
+
+        # Фоновые задачи и флаги отмены для каждого вида обновления
+        self.tasks = TaskRunner(self.root)
+        self.refresh_token = CancelToken()
+        self.servers_token = CancelToken()
+        self.mods_token = CancelToken()
+        self.browse_token = CancelToken()
+        self.quick_join_token = CancelToken()
+
+        # Поиск и сортировка списка серверов
+        self.server_index = ServerIndex()
+        self.server_sort: tuple = (None, False)
+        self.server_view_pending = False
+
+        # None - список модов ещё не собирали (вкладку не открывали)
+        self.mods: Optional[List["AddonInfo"]] = None
+        # Наблюдатель за addons и Workshop переносит изменения в список без пересканирования
+        self.mod_watcher: Optional["DirectoryWatcher"] = None
+        self.watch_token = CancelToken()
+        self.conflict_analyzer: Optional["ConflictAnalyzer"] = None
+        self.analyze_token = CancelToken()
+        self.usage_token = CancelToken()
+        self.switch_token = CancelToken()
+        # Очередь steamcmd создаётся при первой установке
+        self.download_queue: Optional["WorkshopQueue"] = None
+        # (steamcmd, папка библиотеки, потоки), с которыми собрана очередь
+        self.download_config: Optional[tuple] = None
+        self.download_token = CancelToken()
+        self.download_stats = {"total": 0, "done": 0, "failed": 0}
+        self.game_token = CancelToken()
+        self.ping_token = CancelToken()
+        self.ping_tip: Optional[tk.Toplevel] = None
+        self.ping_targets_job = None
+        self.details_token = CancelToken()
+        self.details_after = None
+        self.prefetch_token = CancelToken()
+        self.details_address: Optional[str] = None
+
+        # Картинки читаются с диска после первой отрисовки окна
+        self.image_cache: Optional["ImageCache"] = None
+        self.image_token = CancelToken()
+        # Размер фона -> {вариант: PhotoImage}; второй вариант темы строится при первом переключении
+        self.bg_size = (1000, 700)
+        self.bg_images: Dict[str, "PhotoImage"] = {}
+        self.resize_job = None
+        self.icon_image = None
+        self.small_icon = None
 
         self.setup_localization()
-        
-        self.load_images()
-        
 
+        # До первой отрисовки строится только видимая вкладка и ничего не читается
+        # с диска: хранилище, пути, кэши и списки загружает finish_startup
         self.setup_ui()
-        self.load_servers()
-        self.load_mods()
-        
-
         self.apply_theme()
         self.update_language()
-        
+        # Кнопкам нужны движок и хранилище: до finish_startup они неактивны
+        self.startup_buttons = [self.launch_btn, self.refresh_btn, self.connect_btn,
+                                self.add_server_btn, self.favorite_btn, self.browse_btn,
+                                self.server_profile_btn, self.quick_join_btn, self.prefetch_btn]
+        for button in self.startup_buttons:
+            button.config(state=tk.DISABLED)
+
+        self.main_frame.bind("<Expose>", self.on_first_paint, add="+")
+        self.startup_job = self.root.after(STARTUP_FALLBACK_MS, self.on_first_paint)
+        # Трасса этапов запуска пишется при закрытии (--trace или GMOD_LAUNCHER_TRACE)
+        self.trace_file = profiling.trace_path()
+
+    def on_first_paint(self, event=None):
+        """Окно получило Expose: дальше можно читать диск и сеть"""
+        if self.startup_job is None:
+            return
+        self.root.after_cancel(self.startup_job)
+        self.startup_job = None
+        # Перерисовка виджетов тоже ждёт простоя цикла Tk - встаём в очередь за ней
+        self.root.after_idle(self.finish_startup)
+
+    @traced
+    def finish_startup(self):
+        """Загрузка данных после того, как окно нарисовано"""
+        profiling.tracer.since_start("first_paint")
+        from engine import LauncherEngine
+        import server_details
+        import supervisor
+        from ping_monitor import PingMonitor
+
+        # Хранилище, профили, пути и кэши живут в движке, общем с CLI
+        self.engine = LauncherEngine()
+        self.store = self.engine.store
+        self.profiles = self.engine.profiles
+        self.active_profile = self.engine.default_profile()
+        # Поля вкладки настроек нужны запуску, даже если вкладку не открывали
+        self.options_var = tk.StringVar(value=self.profiles.get(self.active_profile).options)
+        self.console_var = tk.IntVar()
+        # Последние известные данные серверов показываются сразу
+        self.server_cache = self.engine.server_cache
+        # Индекс аддонов: при повторном скане разбираются только изменённые пакеты
+        self.addon_index = self.engine.addon_index
+
+        # Запущенные копии игры; выход каждой приходит событием в цикл Tk
+        self.supervisor = supervisor.ProcessSupervisor(
+            lambda session: self.tasks.post(self.game_token, self.on_game_exit, session))
+        # Фоновый замер пинга видимых и избранных серверов
+        self.ping_monitor = PingMonitor(on_sample=self.on_ping_sample)
+        # Игроки и правила выбранного сервера: запрос уходит, когда выбор замер
+        self.details_cache = server_details.DetailsCache()
 
+        self.load_images()
+        self.load_servers()
+        # Пути ищутся в фоне, чтобы запуск их не ждал; моды загрузятся,
+        # когда откроют их вкладку
+        self.tasks.submit(self.refresh_token, self.startup_paths,
+                          on_done=self.on_startup_paths)
+        self.ping_monitor.start()
+        self.update_ping_targets()
+        self.server_table.on_view_change = self.schedule_ping_targets
+
+        # Выбор строки и подсказка пинга обращаются к кэшам, созданным выше
+        self.servers_tree.bind("<<TreeviewSelect>>", self.on_server_select, add="+")
+        self.servers_tree.bind("<Motion>", self.show_ping_tip, add="+")
+        self.servers_tree.bind("<Leave>", self.hide_ping_tip, add="+")
+        for button in self.startup_buttons:
+            button.config(state=tk.NORMAL)
+
+        # Остальные вкладки строятся при первом переключении на них
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed, add="+")
+        self.on_tab_changed()
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
-        self.gmod_process = None
-    
+
+    def startup_paths(self):
+        """Поиск путей и откат прерванной смены набора аддонов (фоновый поток).
+
+        Откат идёт до того, как пути попадут в движок: вкладка модов ждёт
+        путей и не застанет папку addons восстановленной наполовину.
+        """
+        paths = self.engine.find_paths()
+        try:
+            self.engine.recover_addons(paths)
+        except OSError as e:
+            print(f"Ошибка отката набора аддонов: {e}")
+        return paths
+
+    def on_startup_paths(self, paths):
+        self.engine.set_paths(paths)
+        # Вкладку модов или настроек могли открыть, пока шёл поиск путей
+        self.on_tab_changed()
+
+    @traced
     def setup_localization(self):
         
         self.localization = {
@@ -63,6 +208,15 @@ class GModLauncher:
                     "add_favorite": "В избранное",
                     "remove_favorite": "Удалить из избранного",
                     "install_mod": "Установить мод",
+                    "browse": "Найти серверы",
+                    "save_profile": "Сохранить профиль",
+                    "server_profile": "Профиль для сервера",
+                    "conflicts": "Конфликты модов",
+                    "quick_join": "Быстрый вход",
+                    "prefetch": "Докачать контент",
+                    "disk_usage": "Место на диске",
+                    "save_addon_profile": "Сохранить набор",
+                    "activate_addon_profile": "Включить набор",
                     "workshop": "Мастерская Steam"
                 },
                 "settings": {
@@ -77,12 +231,58 @@ class GModLauncher:
                     "not_gmod": "Выбранный файл не является gmod.exe",
                     "updated": "Обновлено",
                     "all_updated": "Все данные успешно обновлены",
+                    "refreshing": "Обновление...",
+                    "searching": "Поиск серверов...",
+                    "servers_found": "Найдено серверов: {}",
+                    "search": "Поиск:",
+                    "profile": "Профиль:",
+                    "profile_saved": "Профиль {} сохранён",
+                    "profile_conflicts": "Конфликтующие параметры:\n{}",
+                    "server_profile_set": "Сервер {} запускается с профилем {}",
+                    "server_profile_cleared": "Сервер {} запускается с активным профилем",
+                    "analyzing": "Анализ модов...",
+                    "conflicts_title": "Конфликты и дубликаты",
+                    "conflicts_summary": "Аддонов: {}, файлов: {}\nКонфликтов путей: {}\nГрупп дубликатов: {}, лишних данных: {:.1f} MB",
+                    "usage_scanning": "Подсчёт места...",
+                    "usage_title": "Место на диске",
+                    "usage_summary": "Всего {} в {} папках, можно освободить {}",
+                    "usage_columns": ["Папка", "Размер", "Доля", "Файлов"],
+                    "usage_suggestions": "Можно удалить (двойной щелчок открывает папку):",
+                    "usage_stale": "Не менялся {:.0f} дн.",
+                    "usage_unsubscribed": "Нет в подписках Steam",
+                    "usage_more": "...и ещё папок: {}",
+                    "addon_profile": "Набор аддонов (* - все):",
+                    "addon_profile_name": "Введите имя набора",
+                    "addon_profile_saved": "Набор {} сохранён, аддонов: {}",
+                    "addon_profile_switched": "Набор {}: включено {}, выключено {}",
+                    "addon_profile_missing": "Не найдены аддоны набора:\n{}",
+                    "addon_profile_running": "Закройте игру перед сменой набора аддонов",
                     "enter_ip": "Введите IP сервера:",
                     "enter_port": "Введите порт сервера (по умолчанию 27015):",
                     "server_added": "Сервер добавлен!",
-                    "mod_install": "Введите ID мода из мастерской Steam:",
-                    "mod_installed": "Мод установлен!",
-                    "no_steam": "Steam не найден, установка невозможна"
+                    "mod_install": "Введите ID модов или ссылки из мастерской Steam (можно целую коллекцию):",
+                    "mod_installed": "Установлено модов: {}, ошибок: {}",
+                    "downloading": "Мастерская: {} из {}, ошибок: {}",
+                    "game_exited": "Игра закрыта: {:.0f} мин, код выхода {}",
+                    "no_steamcmd": "steamcmd не найден",
+                    "no_steam": "Steam не найден, установка невозможна",
+                    "probing": "Проверка серверов: {}...",
+                    "ping_stats": "Пинг p50 {:.0f} мс, p95 {:.0f} мс\nДжиттер {:.1f} мс, потери {:.0%}\nЗамеров: {}",
+                    "ping_lost": "Не отвечает, замеров: {}",
+                    "details": "Сервер",
+                    "server_content": "Сервер не сообщает свой контент. Вставьте ссылку на коллекцию или ID предметов:",
+                    "prefetch_checking": "Проверка контента сервера: {} предметов...",
+                    "prefetch_ready": "Весь контент сервера установлен ({} предметов)",
+                    "prefetch_queued": "Докачка: нет {}, устарело {}, {:.0f} MB",
+                    "prefetch_offline": "Steam Web API недоступен: коллекции не раскрыты, не проверено ID: {}",
+                    "details_loading": "Загрузка...",
+                    "details_players": "Игроков: {}",
+                    "details_no_players": "Список игроков скрыт",
+                    "details_rules": "Правил: {}, предметов Мастерской: {}",
+                    "details_no_rules": "Правила скрыты",
+                    "details_failed": "Сервер не отвечает",
+                    "player_columns": ["Игрок", "Счёт", "Время"],
+                    "no_server_found": "Нет доступных серверов: ответили {} из {}, свободных мест нет"
                 }
             },
             "en": {
@@ -104,6 +304,15 @@ class GModLauncher:
                     "add_favorite": "Add to Favorites",
                     "remove_favorite": "Remove from Favorites",
                     "install_mod": "Install Mod",
+                    "browse": "Browse Servers",
+                    "save_profile": "Save Profile",
+                    "server_profile": "Server Profile",
+                    "conflicts": "Mod Conflicts",
+                    "quick_join": "Quick Join",
+                    "prefetch": "Prefetch Content",
+                    "disk_usage": "Disk Usage",
+                    "save_addon_profile": "Save Set",
+                    "activate_addon_profile": "Activate Set",
                     "workshop": "Steam Workshop"
                 },
                 "settings": {
@@ -118,61 +327,143 @@ class GModLauncher:
                     "not_gmod": "Selected file is not gmod.exe",
                     "updated": "Updated",
                     "all_updated": "All data updated successfully",
+                    "refreshing": "Refreshing...",
+                    "searching": "Searching for servers...",
+                    "servers_found": "Servers found: {}",
+                    "search": "Search:",
+                    "profile": "Profile:",
+                    "profile_saved": "Profile {} saved",
+                    "profile_conflicts": "Conflicting options:\n{}",
+                    "server_profile_set": "Server {} launches with profile {}",
+                    "server_profile_cleared": "Server {} launches with the active profile",
+                    "analyzing": "Analyzing mods...",
+                    "conflicts_title": "Conflicts and Duplicates",
+                    "conflicts_summary": "Addons: {}, files: {}\nPath conflicts: {}\nDuplicate groups: {}, wasted: {:.1f} MB",
+                    "usage_scanning": "Measuring disk usage...",
+                    "usage_title": "Disk Usage",
+                    "usage_summary": "Total {} in {} folders, {} can be freed",
+                    "usage_columns": ["Folder", "Size", "Share", "Files"],
+                    "usage_suggestions": "Can be removed (double-click opens the folder):",
+                    "usage_stale": "Unchanged for {:.0f} days",
+                    "usage_unsubscribed": "Not subscribed in Steam",
+                    "usage_more": "...and {} more folders",
+                    "addon_profile": "Addon set (* - all):",
+                    "addon_profile_name": "Enter a set name",
+                    "addon_profile_saved": "Set {} saved, addons: {}",
+                    "addon_profile_switched": "Set {}: {} enabled, {} disabled",
+                    "addon_profile_missing": "Addons of the set not found:\n{}",
+                    "addon_profile_running": "Close the game before switching addon sets",
                     "enter_ip": "Enter server IP:",
                     "enter_port": "Enter server port (default 27015):",
                     "server_added": "Server added!",
-                    "mod_install": "Enter Steam Workshop mod ID:",
-                    "mod_installed": "Mod installed!",
-                    "no_steam": "Steam not found, installation impossible"
+                    "mod_install": "Enter Steam Workshop mod IDs or links (a whole collection is fine):",
+                    "mod_installed": "Mods installed: {}, failed: {}",
+                    "downloading": "Workshop: {} of {}, failed: {}",
+                    "game_exited": "Game closed: {:.0f} min, exit code {}",
+                    "no_steamcmd": "steamcmd not found",
+                    "no_steam": "Steam not found, installation impossible",
+                    "probing": "Probing servers: {}...",
+                    "ping_stats": "Ping p50 {:.0f} ms, p95 {:.0f} ms\nJitter {:.1f} ms, loss {:.0%}\nSamples: {}",
+                    "ping_lost": "Not responding, samples: {}",
+                    "details": "Server",
+                    "server_content": "The server does not list its content. Paste a collection link or item IDs:",
+                    "prefetch_checking": "Checking server content: {} items...",
+                    "prefetch_ready": "All server content is installed ({} items)",
+                    "prefetch_queued": "Prefetching: {} missing, {} outdated, {:.0f} MB",
+                    "prefetch_offline": "Steam Web API unreachable: collections not expanded, {} IDs unchecked",
+                    "details_loading": "Loading...",
+                    "details_players": "Players: {}",
+                    "details_no_players": "Player list hidden",
+                    "details_rules": "Rules: {}, Workshop items: {}",
+                    "details_no_rules": "Rules hidden",
+                    "details_failed": "Server not responding",
+                    "player_columns": ["Player", "Score", "Time"],
+                    "no_server_found": "No server available: {} of {} answered, none has a free slot"
                 }
             }
         }
     
-    def load_data(self):
-
-        try:
-            if os.path.exists("launcher_data.json"):
-                with open("launcher_data.json", "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.favorite_servers = data.get("favorites", [])
-                    self.custom_servers = data.get("custom_servers", [])
-                    self.server_history = data.get("history", [])
-        except Exception as e:
-            print(f"Ошибка загрузки данных: {e}")
-    
     def save_data(self):
-        
+        """Отложенное сохранение: серия изменений пишется на диск одной пачкой"""
+        if not self.save_pending:
+            self.save_pending = True
+            self.root.after(500, self.flush_data)
+
+    def flush_data(self):
+
+        self.save_pending = False
         try:
-            data = {
-                "favorites": self.favorite_servers,
-                "custom_servers": self.custom_servers,
-                "history": self.server_history
-            }
-            with open("launcher_data.json", "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self.store.flush()
         except Exception as e:
             print(f"Ошибка сохранения данных: {e}")
     
+    @traced
     def load_images(self):
+        from PIL import ImageTk
+        from image_cache import ImageCache
 
+        self.image_cache = ImageCache()
         try:
  
-            self.icon_image = ImageTk.PhotoImage(Image.open("gmo.png").resize((150, 150), Image.LANCZOS))
-            
+            self.icon_image = ImageTk.PhotoImage(self.image_cache.get("gmo.png", (150, 150)))
+            self.icon_label.config(image=self.icon_image)
 
-            self.small_icon = ImageTk.PhotoImage(Image.open("gmo.png").resize((50, 50), Image.LANCZOS))
-            
+            self.small_icon = ImageTk.PhotoImage(self.image_cache.get("gmo.png", (50, 50)))
+            self.root.iconphoto(False, self.small_icon)
 
-            bg_img = Image.open("gar3main.png")
-            self.bg_image = ImageTk.PhotoImage(bg_img.resize((1000, 700), Image.LANCZOS))
-            self.bg_image_dark = ImageTk.PhotoImage(bg_img.resize((1000, 700), Image.LANCZOS).point(lambda p: p * 0.4))
+            self.bg_label.config(image=self.background_image() or "")
         except Exception as e:
             print(f"Ошибка загрузки изображений: {e}")
             self.icon_image = None
             self.small_icon = None
-            self.bg_image = None
-            self.bg_image_dark = None
+
+    def background_image(self) -> Optional["PhotoImage"]:
+        """Фон текущей темы и размера окна (собирается при первом обращении)"""
+        if self.image_cache is None:
+            return None
+        variant = "dark" if self.dark_mode else "normal"
+        if variant not in self.bg_images:
+            from PIL import ImageTk
+            try:
+                self.bg_images[variant] = ImageTk.PhotoImage(
+                    self.image_cache.get("gar3main.png", self.bg_size, variant))
+            except Exception as e:
+                print(f"Ошибка загрузки изображений: {e}")
+                return None
+        return self.bg_images[variant]
+
+    def on_main_resize(self, event):
+        # Фон перестраивается, когда размер окна перестал меняться
+        size = (event.width, event.height)
+        if size == self.bg_size or min(size) <= 1:
+            return
+        if self.image_cache is None:
+            # Картинки ещё не загружены - сразу возьмут новый размер
+            self.bg_size = size
+            return
+        if self.resize_job:
+            self.root.after_cancel(self.resize_job)
+        self.resize_job = self.root.after(200, self.rescale_background, size)
+
+    def rescale_background(self, size):
+
+        self.resize_job = None
+        self.image_token.cancel()
+        token = self.image_token = CancelToken()
+        variant = "dark" if self.dark_mode else "normal"
+
+        def done(image):
+            from PIL import ImageTk
+            self.bg_size = size
+            self.bg_images = {variant: ImageTk.PhotoImage(image)}
+            # Если тему успели переключить, нужный вариант соберётся здесь
+            self.bg_label.config(image=self.background_image() or "")
+
+        # Масштабирование в фоне, в Tk только создание PhotoImage
+        self.tasks.submit(token, self.image_cache.get, "gar3main.png", size, variant, False,
+                          on_done=done)
     
+    @traced
     def setup_ui(self):
         """Настройка основного интерфейса"""
         self.root.title(self._("title"))
@@ -180,16 +471,13 @@ class GModLauncher:
         self.root.minsize(800, 600)
         
 
-        if self.small_icon:
-            self.root.iconphoto(False, self.small_icon)
-        
-
         self.main_frame = ttk.Frame(self.root)
         self.main_frame.pack(fill=tk.BOTH, expand=True)
         
 
         self.bg_label = ttk.Label(self.main_frame)
         self.bg_label.place(x=0, y=0, relwidth=1, relheight=1)
+        self.main_frame.bind("<Configure>", self.on_main_resize)
         
 
         self.content_frame = ttk.Frame(self.main_frame)
@@ -199,8 +487,9 @@ class GModLauncher:
         self.header_frame = ttk.Frame(self.content_frame)
         self.header_frame.pack(fill=tk.X, pady=(0, 20))
         
-        if self.icon_image:
-            ttk.Label(self.header_frame, image=self.icon_image).pack(side=tk.LEFT, padx=10)
+        # Картинка появится после загрузки, место под неё уже есть
+        self.icon_label = ttk.Label(self.header_frame)
+        self.icon_label.pack(side=tk.LEFT, padx=10)
         
         title_frame = ttk.Frame(self.header_frame)
         title_frame.pack(side=tk.LEFT, fill=tk.Y)
@@ -228,11 +517,18 @@ class GModLauncher:
         
         self.notebook = ttk.Notebook(self.body_frame)
         self.notebook.pack(fill=tk.BOTH, expand=True)
-        
 
-        self.setup_servers_tab()
-        self.setup_mods_tab()
-        self.setup_settings_tab()
+        # Вкладки - пустые рамки; содержимое строит build_tab при первом показе
+        self.servers_tab = ttk.Frame(self.notebook)
+        self.mods_tab = ttk.Frame(self.notebook)
+        self.settings_tab = ttk.Frame(self.notebook)
+        self.tab_builders = {}
+        for i, (tab, builder) in enumerate(((self.servers_tab, self.setup_servers_tab),
+                                            (self.mods_tab, self.setup_mods_tab),
+                                            (self.settings_tab, self.setup_settings_tab))):
+            self.notebook.add(tab, text=self._("tabs")[i])
+            self.tab_builders[str(tab)] = builder
+        self.build_tab(self.servers_tab)
         
 
         self.bottom_frame = ttk.Frame(self.content_frame)
@@ -248,15 +544,37 @@ class GModLauncher:
         self.refresh_btn = ttk.Button(self.bottom_frame,
                                     command=self.refresh_all)
         self.refresh_btn.pack(side=tk.LEFT, padx=5)
+
+        self.status_label = ttk.Label(self.bottom_frame)
+        self.status_label.pack(side=tk.LEFT, padx=10)
         
         self.exit_btn = ttk.Button(self.bottom_frame,
                                  command=self.on_close)
         self.exit_btn.pack(side=tk.RIGHT, padx=5)
 
+    def build_tab(self, tab) -> bool:
+        """Построение вкладки при первом показе; False - уже построена"""
+        builder = self.tab_builders.pop(str(tab), None)
+        if builder:
+            builder()
+        return builder is not None
+
+    def on_tab_changed(self, event=None):
+
+        tab = self.notebook.select()
+        # Моды и настройки показывают пути: пока их ищут в фоне, вкладка ждёт
+        # результата, а не повторяет тот же поиск в потоке Tk
+        if str(tab) in (str(self.mods_tab), str(self.settings_tab)) and not self.engine.paths_found:
+            return
+        if self.build_tab(tab):
+            # Подписи кнопок новой вкладки расставляет update_language
+            self.update_language()
+
     def _(self, key):
 
         return self.localization[self.language].get(key, key)
 
+    @traced
     def update_language(self):
 
         self.root.title(self._("title"))
@@ -279,24 +597,47 @@ class GModLauncher:
                 self.servers_tree.heading(f"#{i+1}", text=col)
         
 
+        if hasattr(self, 'search_label'):
+            self.search_label.config(text=self._("settings")["search"])
         if hasattr(self, 'connect_btn'):
             self.connect_btn.config(text=self._("buttons")["connect"])
         if hasattr(self, 'mods_folder_btn'):
             self.mods_folder_btn.config(text=self._("buttons")["mods_folder"])
         if hasattr(self, 'add_server_btn'):
             self.add_server_btn.config(text=self._("buttons")["add_server"])
+        if hasattr(self, 'browse_btn'):
+            self.browse_btn.config(text=self._("buttons")["browse"])
         if hasattr(self, 'favorite_btn'):
             self.favorite_btn.config(text=self._("buttons")["add_favorite"])
         if hasattr(self, 'install_mod_btn'):
             self.install_mod_btn.config(text=self._("buttons")["install_mod"])
         if hasattr(self, 'workshop_btn'):
             self.workshop_btn.config(text=self._("buttons")["workshop"])
+        if hasattr(self, 'server_profile_btn'):
+            self.server_profile_btn.config(text=self._("buttons")["server_profile"])
+        if hasattr(self, 'conflicts_btn'):
+            self.conflicts_btn.config(text=self._("buttons")["conflicts"])
+        if hasattr(self, 'disk_usage_btn'):
+            self.disk_usage_btn.config(text=self._("buttons")["disk_usage"])
+        if hasattr(self, 'addon_profile_label'):
+            self.addon_profile_label.config(text=self._("settings")["addon_profile"])
+            self.save_addon_profile_btn.config(text=self._("buttons")["save_addon_profile"])
+            self.activate_addon_profile_btn.config(text=self._("buttons")["activate_addon_profile"])
+        if hasattr(self, 'quick_join_btn'):
+            self.quick_join_btn.config(text=self._("buttons")["quick_join"])
+        if hasattr(self, 'prefetch_btn'):
+            self.prefetch_btn.config(text=self._("buttons")["prefetch"])
+        if hasattr(self, 'details_frame'):
+            self.details_frame.config(text=self._("settings")["details"])
+            for column, text in zip(("name", "score", "time"), self._("settings")["player_columns"]):
+                self.players_tree.heading(column, text=text)
 
     def toggle_language(self):
 
         self.language = "en" if self.language == "ru" else "ru"
         self.update_language()
 
+    @traced
     def apply_theme(self):
 
         if self.dark_mode:
@@ -304,7 +645,7 @@ class GModLauncher:
             bg_color = '#2d2d2d'
             fg_color = '#ffffff'
             btn_color = '#3d3d3d'
-            self.bg_label.config(image=self.bg_image_dark if self.bg_image_dark else self.bg_image)
+            self.bg_label.config(image=self.background_image() or "")
             self.theme_btn.config(text=self._("buttons")["theme_dark"])
 
             
@@ -325,7 +666,7 @@ class GModLauncher:
             bg_color = '#f0f0f0'
             fg_color = '#000000'
             btn_color = '#e1e1e1'
-            self.bg_label.config(image=self.bg_image)
+            self.bg_label.config(image=self.background_image() or "")
             self.theme_btn.config(text=self._("buttons")["theme_light"])
             
 
@@ -343,82 +684,73 @@ class GModLauncher:
             self.launch_btn.config(bg="#4CAF50", fg="black")
 
     def toggle_theme(self):
-"
+
         self.dark_mode = not self.dark_mode
         self.apply_theme()
 
     def refresh_all(self):
+        """Фоновое обновление путей, серверов и модов"""
+        # Новое обновление прерывает предыдущее, если оно ещё идёт
+        self.refresh_token.cancel()
+        token = self.refresh_token = CancelToken()
+        self.refresh_pending = {"paths", "servers"}
+        if hasattr(self, 'mods_list'):
+            self.refresh_pending.add("mods")
+        self.status_label.config(text=self._("settings")["refreshing"])
+
+        # Серверы опрашиваются параллельно с поиском путей, моды ждут пути
+        self.load_servers(on_done=lambda: self.refresh_step(token, "servers"))
+        self.tasks.submit(token, self.engine.find_paths,
+                          on_done=lambda paths: self.on_paths_found(token, paths))
+
+    def on_paths_found(self, token, paths):
+
+        self.engine.set_paths(paths)
+        self.refresh_step(token, "paths")
+        # Вкладку модов ещё не открывали - список соберётся при первом открытии
+        if hasattr(self, 'mods_list'):
+            self.load_mods(on_done=lambda: self.refresh_step(token, "mods"))
+        # Вкладка, открытая до конца поиска путей при запуске, строится сейчас
+        self.on_tab_changed()
+
+    def refresh_step(self, token, part):
+
+        if token is not self.refresh_token or token.is_set():
+            return
+        self.refresh_pending.discard(part)
+        if not self.refresh_pending:
+            self.status_label.config(text=self._("settings")["all_updated"])
 
-        self.update_paths()
-        self.load_servers()
-        self.load_mods()
-        messagebox.showinfo(self._("settings")["updated"], 
-                          self._("settings")["all_updated"])
+    @property
+    def steam_path(self) -> Optional[str]:
+        return self.engine.steam_path
+
+    @property
+    def gmod_path(self) -> Optional[str]:
+        return self.engine.gmod_path
 
     def update_paths(self):
         """Обновление путей к Steam и GMod"""
-        self.steam_path = self.find_steam_path()
-        self.gmod_path = self.find_gmod_path()
-    
-    def find_steam_path(self) -> Optional[str]:
-
-        try:
-            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, "SOFTWARE\\WOW6432Node\\Valve\\Steam") as key:
-                path = winreg.QueryValueEx(key, "InstallPath")[0]
-                if os.path.exists(path):
-                    return path
-        except Exception as e:
-            print(f"Не удалось найти Steam в реестре: {e}")
-        
-
-        alternate_paths = [
-            os.path.join(os.getenv("ProgramFiles(x86)", ""), "Steam"),
-            os.path.expanduser("~") + "\\Steam",
-            "C:\\Steam",
-            "D:\\Steam"
-        ]
-        
-        for path in alternate_paths:
-            if os.path.exists(path):
-                return path
-        
-        return None
-    
-    def find_gmod_path(self) -> Optional[str]:
-        """Поиск пути к Garry's Mod"""
-        if not self.steam_path:
-            return None
-            
-
-        standard_path = os.path.join(self.steam_path, "steamapps", "common", "GarrysMod", "gmod.exe")
-        if os.path.exists(standard_path):
-            return standard_path
-            
-
-        library_folders_path = os.path.join(self.steam_path, "steamapps", "libraryfolders.vdf")
-        if os.path.exists(library_folders_path):
-            try:
-                with open(library_folders_path, "r", encoding="utf-8") as f:
-                    for line in f:
-                        if '"path"' in line:
-                            path = line.split('"')[-2].replace('\\\\', '\\')
-                            test_path = os.path.join(path, "steamapps", "common", "GarrysMod", "gmod.exe")
-                            if os.path.exists(test_path):
-                                return test_path
-            except Exception as e:
-                print(f"Ошибка чтения libraryfolders.vdf: {e}")
-        
-        return None
+        self.engine.update_paths()
 
     def setup_servers_tab(self):
         """Настройка вкладки с серверами"""
-        self.servers_tab = ttk.Frame(self.notebook)
-        self.notebook.add(self.servers_tab, text=self._("tabs")[0])
+        # Поиск фильтрует список на каждое нажатие клавиши
+        search_frame = ttk.Frame(self.servers_tab)
+        search_frame.pack(side=tk.TOP, fill=tk.X, padx=5, pady=(5, 0))
+
+        self.search_label = ttk.Label(search_frame, text=self._("settings")["search"])
+        self.search_label.pack(side=tk.LEFT)
+        self.server_search = tk.StringVar()
+        self.server_search.trace_add("write", lambda *_: self.apply_server_view())
+        ttk.Entry(search_frame, textvariable=self.server_search).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         
 
-        self.servers_tree = ttk.Treeview(self.servers_tab, columns=("name", "players", "map", "ping", "address"), show="headings")
+        columns = ("name", "players", "map", "ping", "address")
+        self.servers_tree = ttk.Treeview(self.servers_tab, columns=columns, show="headings")
         for i, col in enumerate(self._("server_columns")):
-            self.servers_tree.heading(f"#{i+1}", text=col)
+            self.servers_tree.heading(f"#{i+1}", text=col,
+                                      command=lambda c=columns[i]: self.sort_servers(c))
         
 
         self.servers_tree.column("name", width=250, anchor=tk.W)
@@ -427,8 +759,14 @@ class GModLauncher:
         self.servers_tree.column("ping", width=50, anchor=tk.CENTER)
         self.servers_tree.column("address", width=120, anchor=tk.W)
 
-        scrollbar = ttk.Scrollbar(self.servers_tab, orient="vertical", command=self.servers_tree.yview)
-        self.servers_tree.configure(yscrollcommand=scrollbar.set)
+        self.servers_tree.tag_configure('favorite', background='#fffacd')  # Светло-желтый для избранных
+        self.servers_tree.tag_configure('custom', background='#e6f7ff')    # Светло-голубой для пользовательских
+
+        self.setup_details_pane()
+
+        # Прокруткой управляет модель: при большом списке она держит в Treeview только видимые строки
+        scrollbar = ttk.Scrollbar(self.servers_tab, orient="vertical")
+        self.server_table = ServerTable(self.servers_tree, scrollbar)
         
 
         self.servers_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -446,11 +784,37 @@ class GModLauncher:
         
         self.favorite_btn = ttk.Button(btn_frame, command=self.toggle_favorite)
         self.favorite_btn.pack(side=tk.LEFT, padx=5)
+
+        self.browse_btn = ttk.Button(btn_frame, command=self.browse_servers)
+        self.browse_btn.pack(side=tk.LEFT, padx=5)
+
+        self.server_profile_btn = ttk.Button(btn_frame, command=self.toggle_server_profile)
+        self.server_profile_btn.pack(side=tk.LEFT, padx=5)
+
+        self.quick_join_btn = ttk.Button(btn_frame, command=self.quick_join)
+        self.quick_join_btn.pack(side=tk.LEFT, padx=5)
+
+        self.prefetch_btn = ttk.Button(btn_frame, command=self.prefetch_content)
+        self.prefetch_btn.pack(side=tk.LEFT, padx=5)
     
+    def setup_details_pane(self):
+        """Панель с игроками и правилами выбранного сервера"""
+        self.details_frame = ttk.LabelFrame(self.servers_tab, text=self._("settings")["details"])
+        self.details_frame.pack(side=tk.RIGHT, fill=tk.Y, padx=5, pady=5)
+
+        self.details_label = ttk.Label(self.details_frame, text="")
+        self.details_label.pack(side=tk.TOP, anchor=tk.W, padx=5)
+
+        self.players_tree = ttk.Treeview(self.details_frame, columns=("name", "score", "time"),
+                                         show="headings", height=12)
+        for column, width in (("name", 140), ("score", 50), ("time", 60)):
+            self.players_tree.column(column, width=width, anchor=tk.W if column == "name" else tk.CENTER)
+        self.players_tree.pack(side=tk.TOP, fill=tk.Y, expand=True, padx=5, pady=5)
+
+        self.rules_label = ttk.Label(self.details_frame, text="", wraplength=250, justify=tk.LEFT)
+        self.rules_label.pack(side=tk.TOP, anchor=tk.W, padx=5, pady=(0, 5))
+
     def setup_mods_tab(self):
-        
-        self.mods_tab = ttk.Frame(self.notebook)
-        self.notebook.add(self.mods_tab, text=self._("tabs")[1])
 
         self.mods_list = tk.Listbox(self.mods_tab, selectmode=tk.MULTIPLE)
         
@@ -474,11 +838,36 @@ class GModLauncher:
         
         self.workshop_btn = ttk.Button(btn_frame, command=self.open_workshop)
         self.workshop_btn.pack(side=tk.LEFT, padx=5)
+
+        self.conflicts_btn = ttk.Button(btn_frame, command=self.show_conflicts)
+        self.conflicts_btn.pack(side=tk.LEFT, padx=5)
+
+        self.disk_usage_btn = ttk.Button(btn_frame, command=self.show_disk_usage)
+        self.disk_usage_btn.pack(side=tk.LEFT, padx=5)
+
+        from addon_profiles import ALL_ADDONS
+
+        # Наборы аддонов: выделенные в списке моды сохраняются под именем
+        profile_frame = ttk.Frame(self.mods_tab)
+        profile_frame.pack(fill=tk.X, padx=5, pady=5)
+
+        self.addon_profile_label = ttk.Label(profile_frame)
+        self.addon_profile_label.pack(side=tk.LEFT, padx=5)
+        self.addon_profile_var = tk.StringVar(value=self.store.get("settings", "addon_profile", ALL_ADDONS))
+        self.addon_profile_box = ttk.Combobox(profile_frame, textvariable=self.addon_profile_var,
+                                              values=self.engine.addon_profile_names())
+        self.addon_profile_box.pack(side=tk.LEFT, padx=5)
+
+        self.save_addon_profile_btn = ttk.Button(profile_frame, command=self.save_addon_profile)
+        self.save_addon_profile_btn.pack(side=tk.LEFT, padx=5)
+
+        self.activate_addon_profile_btn = ttk.Button(profile_frame, command=self.activate_addon_profile)
+        self.activate_addon_profile_btn.pack(side=tk.LEFT, padx=5)
+
+        self.load_mods()
     
     def setup_settings_tab(self):
         """Настройка вкладки с настройками"""
-        self.settings_tab = ttk.Frame(self.notebook)
-        self.notebook.add(self.settings_tab, text=self._("tabs")[2])
         
 
         path_frame = ttk.LabelFrame(self.settings_tab, text=self._("settings")["paths"], padding=10)
@@ -499,16 +888,27 @@ class GModLauncher:
         launch_frame = ttk.LabelFrame(self.settings_tab, text=self._("settings")["launch_options"], padding=10)
         launch_frame.pack(fill=tk.X, padx=10, pady=5)
         
+        profile_frame = ttk.Frame(launch_frame)
+        profile_frame.pack(fill=tk.X)
+        ttk.Label(profile_frame, text=self._("settings")["profile"]).pack(side=tk.LEFT)
+        # Можно выбрать готовый профиль или вписать имя нового
+        self.profile_var = tk.StringVar(value=self.active_profile)
+        self.profile_box = ttk.Combobox(profile_frame, textvariable=self.profile_var,
+                                        values=self.profiles.names())
+        self.profile_box.pack(side=tk.LEFT, padx=5)
+        self.profile_box.bind("<<ComboboxSelected>>", lambda e: self.select_profile(self.profile_var.get()))
+        ttk.Button(profile_frame, text=self._("buttons")["save_profile"],
+                  command=self.save_profile).pack(side=tk.LEFT, padx=5)
+
         ttk.Label(launch_frame, text="Дополнительные параметры:").pack(anchor=tk.W)
-        self.launch_options = ttk.Entry(launch_frame)
+        self.launch_options = ttk.Entry(launch_frame, textvariable=self.options_var)
         self.launch_options.pack(fill=tk.X, pady=5)
-        self.launch_options.insert(0, "-windowed -w 1920 -h 1080")
         
-        self.console_var = tk.IntVar()
         ttk.Checkbutton(launch_frame, text=self._("settings")["console"], 
                        variable=self.console_var).pack(anchor=tk.W)
 
     def add_custom_server(self):
+        from tkinter import simpledialog
 
         ip = simpledialog.askstring(self._("settings")["enter_ip"], 
                                    self._("settings")["enter_ip"])
@@ -522,10 +922,10 @@ class GModLauncher:
             port = "27015"
             
         address = f"{ip}:{port}"
-        server_info = (f"Пользовательский сервер {len(self.custom_servers)+1}", 
-                      "0/0", "?", "?", address)
+        server_info = [f"Пользовательский сервер {len(self.store.custom_servers)+1}", 
+                      "0/0", "?", "?", address]
         
-        self.custom_servers.append(server_info)
+        self.store.put("custom_servers", address, server_info)
         self.save_data()
         self.load_servers()
         messagebox.showinfo(self._("settings")["success"], 
@@ -533,64 +933,206 @@ class GModLauncher:
 
     def toggle_favorite(self):
 
-        selected = self.servers_tree.focus()
-        if not selected:
+        server = list(self.server_table.selected() or ())
+        if not server:
             messagebox.showwarning(self._("settings")["error"], 
                                  "Выберите сервер!")
             return
             
-        server = self.servers_tree.item(selected)['values']
         address = server[4]  
         
 
-        if any(s[4] == address for s in self.favorite_servers):
+        if address in self.store.favorites:
 
-            self.favorite_servers = [s for s in self.favorite_servers if s[4] != address]
+            self.store.delete("favorites", address)
             self.favorite_btn.config(text=self._("buttons")["add_favorite"])
+            self.server_table.upsert(server, ('custom',) if address in self.store.custom_servers else ())
         else:
 
-            self.favorite_servers.append(server)
+            self.store.put("favorites", address, server)
             self.favorite_btn.config(text=self._("buttons")["remove_favorite"])
+            self.server_table.upsert(server, ('favorite',))
         
         self.save_data()
+        self.schedule_ping_targets()
 
     def install_workshop_mod(self):
- 
+        import workshop_queue
+
+        if not self.ensure_download_queue():
+            return
+
+        ids = workshop_queue.parse_ids(self.ask_text(self._("settings")["mod_install"]))
+        if not ids:
+            return
+        self.download_queue.add(ids)
+
+    def ensure_download_queue(self) -> bool:
+        """Очередь steamcmd создаётся при первой установке; False - ставить нечем"""
+        import workshop_queue
+
         if not self.steam_path:
             messagebox.showerror(self._("settings")["error"], 
                                self._("settings")["no_steam"])
+            return False
+
+        steamcmd = self.store.get("settings", "steamcmd_path") or workshop_queue.find_steamcmd(self.steam_path)
+        if not steamcmd:
+            messagebox.showerror(self._("settings")["error"],
+                               self._("settings")["no_steamcmd"])
+            return False
+
+        # steamcmd качает в свою папку в той библиотеке Steam, где стоит игра
+        # (перенос на том же диске - переименование), готовое - в Workshop игры
+        workshop = self.engine.workshop_path()
+        library = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(workshop))))
+        install_dir = os.path.join(library, workshop_queue.STAGING_DIR)
+        workers = int(self.store.get("settings", "workshop_workers", workshop_queue.DEFAULT_WORKERS))
+        config = (steamcmd, install_dir, workshop, workers)
+        # Сменились настройки или пути - очередь собирается заново, но не посреди загрузок
+        if (self.download_queue is not None and config != self.download_config
+                and self.download_queue.idle):
+            self.download_queue = None
+        if self.download_queue is None:
+            self.download_queue = workshop_queue.WorkshopQueue(
+                steamcmd, lambda event: self.tasks.post(self.download_token, self.on_download_event, event),
+                install_dir=install_dir, workers=workers, target_dir=workshop)
+            self.download_config = config
+        return True
+
+    def prefetch_content(self):
+        """Докачка недостающих и устаревших предметов сервера до подключения"""
+        import prefetch
+        import workshop_queue
+
+        server = list(self.server_table.selected() or ())
+        if not server:
+            messagebox.showwarning(self._("settings")["error"], "Выберите сервер!")
             return
-            
-        mod_id = simpledialog.askstring(self._("settings")["mod_install"], 
-                                       self._("settings")["mod_install"])
-        if not mod_id:
+        if not self.ensure_download_queue():
             return
-            
-        try:
+        address = str(server[4])
+
+        # Список, который сервер объявил в правилах, иначе сохранённый или введённый вручную
+        details = self.details_cache.get(address)
+        ids = details.workshop_ids if details else []
+        if not ids:
+            ids = self.store.get("server_content", address) or []
+        if not ids:
+            ids = workshop_queue.parse_ids(self.ask_text(self._("settings")["server_content"]))
+            if not ids:
+                return
+            self.store.put("server_content", address, ids)
+            self.save_data()
 
-            steamcmd = os.path.join(self.steam_path, "steamcmd.exe")
-            command = f'"{steamcmd}" +login anonymous +workshop_download_item 4000 {mod_id} +quit'
-            
-            subprocess.Popen(command, shell=True)
-            messagebox.showinfo(self._("settings")["success"], 
-                              self._("settings")["mod_installed"])
-        except Exception as e:
-            messagebox.showerror(self._("settings")["error"], 
-                               f"Ошибка установки мода: {e}")
+        self.prefetch_token.cancel()
+        token = self.prefetch_token = CancelToken()
+        self.status_label.config(text=self._("settings")["prefetch_checking"].format(len(ids)))
+        mods = None if self.mods is None else list(self.mods)
+        # Предметы из прошлого раскрытия коллекций - на случай, если API недоступен
+        expanded = self.store.get("server_items", address) or {}
+        known = expanded.get("items") if expanded.get("ids") == list(ids) else None
+
+        def check():
+            # Вкладку модов ещё не открывали - аддоны собираются здесь же, в фоне
+            installed = prefetch.installed_ids(mods if mods is not None
+                                               else self.engine.scan_mods(cancel=token))
+            return prefetch.resolve(ids, installed, self.addon_index.mtime, known)
+
+        def finished(plan):
+            texts = self._("settings")
+            if plan.items is not None and plan.required != known:
+                self.store.put("server_items", address, {"ids": list(ids), "items": plan.required})
+                self.save_data()
+            if plan.unresolved:
+                self.status_label.config(text=texts["prefetch_offline"].format(len(plan.unresolved)))
+                return
+            if not plan.downloads:
+                self.status_label.config(text=texts["prefetch_ready"].format(len(plan.required)))
+                return
+            self.download_queue.add(plan.downloads)
+            self.status_label.config(text=texts["prefetch_queued"].format(
+                len(plan.missing), len(plan.outdated), plan.download_bytes / 1048576))
+
+        def failed(e):
+            self.status_label.config(text=f"{self._('settings')['error']}: {e}")
+
+        self.tasks.submit(token, check, on_done=finished, on_error=failed)
+
+    def on_download_event(self, event):
+        """События очереди загрузок (в потоке Tk)"""
+        stats = self.download_stats
+        if event.kind == "queued":
+            stats["total"] += 1
+        elif event.kind == "done":
+            stats["done"] += 1
+            self.engine.record_download(event.item_id)
+        elif event.kind == "failed":
+            stats["failed"] += 1
+            print(f"Ошибка установки мода {event.item_id}: {event.message}")
+        elif event.kind == "finished":
+            done, failed = stats["done"], stats["failed"]
+            self.download_stats = {"total": 0, "done": 0, "failed": 0}
+            self.status_label.config(text="")
+            if done:
+                self.save_data()
+            text = self._("settings")["mod_installed"].format(done, failed)
+            if failed and not done:
+                messagebox.showerror(self._("settings")["error"], text)
+            elif failed:
+                messagebox.showwarning(self._("settings")["error"], text)
+            else:
+                messagebox.showinfo(self._("settings")["success"], text)
+            return
+        text = self._("settings")["downloading"].format(
+            stats["done"] + stats["failed"], stats["total"], stats["failed"])
+        if event.kind == "progress":
+            text += f" ({event.item_id}: {event.progress:.0f}%)"
+        self.status_label.config(text=text)
+
+    def ask_text(self, prompt: str) -> str:
+        """Многострочный ввод (для вставки списка из коллекции)"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title(prompt)
+        dialog.transient(self.root)
+        ttk.Label(dialog, text=prompt).pack(anchor=tk.W, padx=10, pady=5)
+        text = tk.Text(dialog, width=60, height=12)
+        text.pack(fill=tk.BOTH, expand=True, padx=10)
+        result = []
+
+        def accept():
+            result.append(text.get("1.0", tk.END))
+            dialog.destroy()
+
+        ttk.Button(dialog, text="OK", command=accept).pack(pady=5)
+        text.focus_set()
+        dialog.grab_set()
+        self.root.wait_window(dialog)
+        return result[0] if result else ""
 
     def open_workshop(self):
+        import webbrowser
 
         webbrowser.open("https://steamcommunity.com/workshop/browse/?appid=4000")
 
     def manual_path_select(self):
         """Ручной выбор пути к GMod"""
+        from tkinter import filedialog
+        import steam_paths
+
+        if sys.platform == "win32":
+            filetypes = [("Garry's Mod", "gmod.exe"), ("Executable files", "*.exe")]
+        else:
+            filetypes = [("Garry's Mod", " ".join(steam_paths.GMOD_BINARIES)), ("All files", "*")]
         path = filedialog.askopenfilename(
             title=self._("settings")["select_gmod"],
-            filetypes=[("Garry's Mod", "gmod.exe"), ("Executable files", "*.exe")]
+            filetypes=filetypes
         )
         
-        if path and os.path.basename(path).lower() == "gmod.exe":
-            self.gmod_path = path
+        if path and steam_paths.is_gmod_binary(path):
+            # Запоминаем выбор, чтобы автоматический поиск его не перезаписал
+            self.store.put("settings", "gmod_path", path)
+            self.save_data()
             messagebox.showinfo(self._("settings")["success"], 
                               self._("settings")["path_set"])
             self.update_paths()
@@ -600,73 +1142,606 @@ class GModLauncher:
     
     def open_mods_folder(self):
         """Открытие папки с модами"""
-        if not self.steam_path:
+        import steam_paths
+
+        mods_path = self.engine.addons_path()
+        if not mods_path:
             messagebox.showerror(self._("settings")["error"], 
                                "Не найден путь к Steam!")
             return
             
-        mods_path = os.path.join(self.steam_path, "steamapps", "common", "GarrysMod", "garrysmod", "addons")
         if os.path.exists(mods_path):
-            os.startfile(mods_path)
+            steam_paths.open_folder(mods_path)
         else:
             messagebox.showerror(self._("settings")["error"], 
                                "Папка с модами не найдена!")
 
-    def load_servers(self):
+    @traced
+    def load_servers(self, on_done=None):
         """Загрузка списка серверов"""
-        # Очищаем список
-        for i in self.servers_tree.get_children():
-            self.servers_tree.delete(i)
-        
-        # Тестовые данные
-        servers = [
-            ("DarkRP #1 | Начальный уровень", "24/32", "rp_downtown_v4c_v2", "45", "gmod.example.com:27015"),
-            ("TTT Pro | Профессиональный режим", "12/16", "ttt_minecraft", "62", "ttt.example.com:27015"),
-            ("Murder Mystery | Загадочные убийства", "8/10", "mu_mansion", "38", "murder.example.com:27015"),
-            ("Sandbox | Свободное творчество", "15/20", "gm_flatgrass", "55", "sandbox.example.com:27015"),
-            ("Zombie Survival | Выживание", "18/24", "zs_lighthouse", "42", "zombie.example.com:27015")
-        ]
-        
+        # Прерываем опрос, запущенный для прошлого списка
+        self.servers_token.cancel()
+        self.browse_token.cancel()
+        token = self.servers_token = CancelToken()
+
+        # Модель сама вычисляет разницу с тем, что уже показано,
+        # повторяющиеся адреса показываются один раз
+        rows = []
+        cached = []
+        sources = ((self.store.favorites, ('favorite',)),
+                   (self.store.custom_servers, ('custom',)),
+                   (self.store.history, ()))
+        for servers, tags in sources:
+            for server in servers.values():
+                info = self.server_cache.info(str(server[4]))
+                if info:
+                    cached.append(info)
+                rows.append((info.as_row() if info else server, tags))
+        self.server_table.replace(rows)
+        self.server_index.replace(rows)
+        for info in cached:
+            self.server_index.set(info.address, info.as_row(), info.game)
+        self.apply_server_view()
+
+        # Опрашиваем в фоне только устаревшие записи кэша,
+        # строки обновляются по мере прихода ответов
+        stale = self.server_cache.stale(self.server_table.records)
+        if not stale:
+            if on_done:
+                on_done()
+            return
+        self.tasks.submit(token, self.query_servers, stale, token,
+                          on_done=lambda _: on_done and on_done())
 
-        for server in self.favorite_servers:
-            self.servers_tree.insert("", tk.END, values=server, tags=('favorite',))
-        
+    def query_servers(self, addresses, token):
+        """Опрос серверов по A2S_INFO (выполняется в фоновом потоке)"""
+        def on_result(address, info):
+            if info:
+                self.tasks.post(token, self.show_server_info, info)
 
-        for server in servers:
-            self.servers_tree.insert("", tk.END, values=server)
-    
+        self.engine.query_servers(addresses, on_result=on_result, cancel=token)
 
-        for server in self.custom_servers:
-            self.servers_tree.insert("", tk.END, values=server, tags=('custom',))
+    def show_server_info(self, info):
 
-        self.servers_tree.tag_configure('favorite', background='#fffacd')  # Светло-желтый для избранных
-        self.servers_tree.tag_configure('custom', background='#e6f7ff')    # Светло-голубой для пользовательских
+        if info.address in self.server_table:
+            self.server_table.update(info.address, info.as_row())
+            self.server_index.set(info.address, info.as_row(), info.game)
+            self.schedule_server_view()
 
-    def load_mods(self):
+    def on_server_select(self, event=None):
+        """Выбор сервера: из кэша сразу, иначе запрос после паузы в выборе"""
+        address = self.server_table.selected_address
+        # Виртуальный список заново выделяет ту же строку при прокрутке
+        if address == self.details_address:
+            return
+        self.details_address = address
+        if self.details_after:
+            self.root.after_cancel(self.details_after)
+            self.details_after = None
+        self.details_token.cancel()
+        if not address:
+            return
+        details = self.details_cache.get(address)
+        if details:
+            self.show_details(details)
+            return
+        self.clear_details(self._("settings")["details_loading"])
+        # Стрелками список пролистывают быстро - запрашиваем только то, на чём остановились
+        self.details_after = self.root.after(200, self.fetch_details, address)
+
+    def fetch_details(self, address):
+        import server_details
+
+        self.details_after = None
+        token = self.details_token = CancelToken()
+
+        def finished(details):
+            if details is None:
+                return
+            self.details_cache.put(details)
+            if self.details_address == address:
+                self.show_details(details)
+
+        def failed(e):
+            if self.details_address == address:
+                self.details_address = None
+                self.clear_details(self._("settings")["details_failed"])
+
+        self.tasks.submit(token, server_details.fetch_details, address,
+                          server_details.DETAILS_TIMEOUT, token,
+                          on_done=finished, on_error=failed)
+
+    def clear_details(self, text=""):
+        self.players_tree.delete(*self.players_tree.get_children())
+        self.details_label.config(text=text)
+        self.rules_label.config(text="")
+
+    def show_details(self, details):
+        """Игроки (по счёту) и сводка правил в панели сервера"""
+        texts = self._("settings")
+        self.players_tree.delete(*self.players_tree.get_children())
+        if details.players is None:
+            self.details_label.config(text=texts["details_no_players"])
+        else:
+            self.details_label.config(text=texts["details_players"].format(len(details.players)))
+            for player in sorted(details.players, key=lambda p: -p.score):
+                minutes, seconds = divmod(int(player.duration), 60)
+                self.players_tree.insert("", "end", values=(
+                    player.name or "-", player.score, f"{minutes // 60}:{minutes % 60:02d}:{seconds:02d}"))
+        if details.rules is None:
+            self.rules_label.config(text=texts["details_no_rules"])
+        else:
+            self.rules_label.config(text=texts["details_rules"].format(
+                len(details.rules), len(details.workshop_ids)))
+
+    def schedule_ping_targets(self):
+        # Прокрутка и фильтр шлют события пачками - адреса пересчитываются один раз
+        if self.ping_targets_job is None:
+            self.ping_targets_job = self.root.after(250, self.update_ping_targets)
+
+    def update_ping_targets(self):
+        """Адреса для замера пинга: строки в окне и избранное"""
+        self.ping_targets_job = None
+        self.ping_monitor.set_targets(self.server_table.visible() + list(self.store.favorites))
+
+    def on_ping_sample(self, address, info):
+        # Вызывается из потока монитора
+        if info:
+            self.server_cache.store(info)
+            self.tasks.post(self.ping_token, self.show_ping_sample, info)
+        else:
+            self.server_cache.record_failure(address)
+
+    def show_ping_sample(self, info):
+        """В колонке пинга - медиана окна, а не последний замер"""
+        stats = self.ping_monitor.history.stats(info.address)
+        if stats and stats.loss < 1:
+            info = info._replace(ping=stats.p50)
+        self.show_server_info(info)
+
+    def show_ping_tip(self, event):
+        """Подсказка со статистикой пинга для строки под курсором"""
+        address = self.server_table.address_at(event.y)
+        stats = self.ping_monitor.history.stats(address) if address else None
+        if not stats:
+            self.hide_ping_tip()
+            return
+        if stats.loss >= 1:
+            text = self._("settings")["ping_lost"].format(stats.samples)
+        else:
+            text = self._("settings")["ping_stats"].format(
+                stats.p50, stats.p95, stats.jitter, stats.loss, stats.samples)
+        if self.ping_tip is None:
+            self.ping_tip = tk.Toplevel(self.root)
+            self.ping_tip.overrideredirect(True)
+            self.ping_tip_label = tk.Label(self.ping_tip, justify=tk.LEFT, relief=tk.SOLID,
+                                           borderwidth=1, background="#ffffe0", padx=4, pady=2)
+            self.ping_tip_label.pack()
+        self.ping_tip_label.config(text=text)
+        self.ping_tip.geometry(f"+{event.x_root + 16}+{event.y_root + 12}")
+        self.ping_tip.deiconify()
+
+    def hide_ping_tip(self, event=None):
+        if self.ping_tip is not None:
+            self.ping_tip.withdraw()
+
+    def apply_server_view(self):
+        """Применение поиска и сортировки к списку серверов"""
+        self.server_view_pending = False
+        column, reverse = self.server_sort
+        order = self.server_index.view(self.server_search.get(), column, reverse)
+        self.server_table.set_order(order)
+
+    def schedule_server_view(self):
+        # При потоке ответов пересчитываем порядок не чаще раза в 100 мс
+        if self.server_view_pending:
+            return
+        if self.server_sort[0] or self.server_search.get().strip():
+            self.server_view_pending = True
+            self.root.after(100, self.apply_server_view)
+
+    def sort_servers(self, column):
+        """Сортировка по колонке, повторный клик меняет направление"""
+        current, reverse = self.server_sort
+        self.server_sort = (column, not reverse if current == column else False)
+        self.apply_server_view()
+
+    def browse_servers(self):
+        """Поиск серверов GMod через мастер-сервер Steam"""
+        self.browse_token.cancel()
+        token = self.browse_token = CancelToken()
+        self.status_label.config(text=self._("settings")["searching"])
+
+        def finished(_):
+            count = len(self.server_table)
+            self.status_label.config(text=self._("settings")["servers_found"].format(count))
+
+        def failed(e):
+            self.status_label.config(text=f"{self._('settings')['error']}: {e}")
+
+        self.tasks.submit(token, self.fetch_master_list, set(self.server_table.records), token,
+                          on_done=finished, on_error=failed)
+
+    def quick_join(self):
+        """Подключение к лучшему серверу из отфильтрованного списка или избранного"""
+        if not self.gmod_path:
+            messagebox.showerror(self._("settings")["error"], "Garry's Mod не найден!")
+            return
+        if self.server_search.get().strip():
+            column, reverse = self.server_sort
+            candidates = self.server_index.view(self.server_search.get(), column, reverse)
+        else:
+            candidates = list(self.store.favorites) or list(self.server_table.records)
+        if not candidates:
+            messagebox.showwarning(self._("settings")["error"], "Список серверов пуст!")
+            return
+
+        self.quick_join_token.cancel()
+        token = self.quick_join_token = CancelToken()
+        self.status_label.config(text=self._("settings")["probing"].format(len(candidates)))
+        failures = {}
+        for address in candidates:
+            entry = self.server_cache.get(address)
+            if entry and entry.failures:
+                failures[address] = entry.failures
+
+        def finished(result):
+            self.status_label.config(text="")
+            if result.best is None:
+                messagebox.showwarning(
+                    self._("buttons")["quick_join"],
+                    self._("settings")["no_server_found"].format(result.answered, result.probed))
+                return
+            self.join_server(list(result.best.as_row()))
+
+        def failed(e):
+            self.status_label.config(text=f"{self._('settings')['error']}: {e}")
+
+        self.tasks.submit(token, self.probe_servers, candidates, failures, token,
+                          on_done=finished, on_error=failed)
+
+    def probe_servers(self, addresses, failures, token):
+        """Опрос кандидатов быстрого входа (в фоне); ответы попадают в кэш и таблицу"""
+        import quickjoin
+
+        def on_result(address, info):
+            if info:
+                self.server_cache.store(info)
+                self.tasks.post(token, self.show_server_info, info)
+            else:
+                self.server_cache.record_failure(address)
+
+        result = quickjoin.find_best(addresses, failures=failures, on_result=on_result, cancel=token)
+        self.server_cache.save()
+        return result
+
+    def fetch_master_list(self, known, token):
+        """Список мастер-сервера -> опрос A2S -> пачки строк в UI (в фоне)"""
+        import asyncio
+        import a2s
+        import masterserver
+
+        batcher = Batcher(self.tasks, token, self.add_server_rows)
+
+        def on_result(address, info):
+            if info:
+                batcher.add(info)
+
+        async def run():
+            pages = masterserver.iter_pages()
+            addresses = masterserver.unique_addresses(pages, skip=known)
+            await a2s.query_stream(addresses, on_result=on_result, cancel=token)
+
+        try:
+            asyncio.run(run())
+        finally:
+            batcher.flush()
+
+    def add_server_rows(self, infos):
+
+        self.server_table.upsert_many((info.as_row(), None) for info in infos)
+        for info in infos:
+            self.server_index.set(info.address, info.as_row(), info.game)
+        self.schedule_server_view()
+
+    @traced
+    def load_mods(self, on_done=None):
         """Загрузка списка модов"""
+        self.mods_token.cancel()
+        token = self.mods_token = CancelToken()
         self.mods_list.delete(0, tk.END)
         
-        if not self.steam_path:
+        mods_path = self.engine.addons_path()
+        if not mods_path:
             self.mods_list.insert(tk.END, "Не найден путь к Steam!")
+            if on_done:
+                on_done()
             return
-            
-        mods_path = os.path.join(self.steam_path, "steamapps", "common", "GarrysMod", "garrysmod", "addons")
-        
-        if os.path.exists(mods_path):
-            try:
-                mods = [d for d in os.listdir(mods_path) 
-                       if os.path.isdir(os.path.join(mods_path, d)) and not d.startswith(".")]
-                
-                if not mods:
-                    self.mods_list.insert(tk.END, "Моды не найдены!")
-                    return
-                
-                for mod in sorted(mods):
-                    self.mods_list.insert(tk.END, mod)
-            except Exception as e:
-                self.mods_list.insert(tk.END, f"Ошибка загрузки модов: {e}")
-        else:
-            self.mods_list.insert(tk.END, "Папка с модами не найдена!")
+
+        workshop_path = self.engine.workshop_path()
+
+        def scan():
+            # Папка проверяется в том же фоновом потоке, что и сканируется
+            return os.path.isdir(mods_path), self.engine.scan_mods(mods_path, workshop_path, token)
+
+        def show(result):
+            folder_found, mods = result
+            self.mods = mods
+            self.watch_mods(mods_path, workshop_path)
+            self.mods_list.delete(0, tk.END)
+            # Без папки addons моды Мастерской всё равно показываются
+            if not mods:
+                self.mods_list.insert(tk.END, "Моды не найдены!" if folder_found
+                                      else "Папка с модами не найдена!")
+            else:
+                # Одна вставка вместо тысяч отдельных вызовов Tcl
+                self.mods_list.insert(tk.END, *(mod.label for mod in mods))
+            if on_done:
+                on_done()
+
+        def show_error(e):
+            self.mods = []
+            self.mods_list.delete(0, tk.END)
+            self.mods_list.insert(tk.END, f"Ошибка загрузки модов: {e}")
+            if on_done:
+                on_done()
+
+        self.tasks.submit(token, scan, on_done=show, on_error=show_error)
+
+    def watch_mods(self, mods_path, workshop_path):
+        """Запуск наблюдателя за папками модов (перезапуск, если пути сменились)"""
+        from watcher import DirectoryWatcher
+
+        # Сравнивается с тем, что хранит наблюдатель: только существующие папки
+        roots = [os.path.normpath(p) for p in (mods_path, workshop_path) if p and os.path.isdir(p)]
+        if self.mod_watcher and self.mod_watcher.roots == roots:
+            return
+        self.stop_mod_watch()
+        if not roots:
+            return
+        token = self.watch_token = CancelToken()
+
+        def on_change(entries):
+            # Поток наблюдателя: индекс обновляется здесь, в Tk уходит только результат
+            if any(entry in roots for entry in entries):
+                self.tasks.post(token, self.load_mods)
+                return
+            updated, removed = self.addon_index.refresh(entries, mods_path, workshop_path)
+            if updated or removed:
+                self.tasks.post(token, self.apply_mod_changes, updated, removed)
+
+        self.mod_watcher = DirectoryWatcher(roots, on_change)
+        self.mod_watcher.start()
+
+    def stop_mod_watch(self):
+        if self.mod_watcher:
+            self.watch_token.cancel()
+            self.mod_watcher.stop()
+            self.mod_watcher = None
+
+    def apply_mod_changes(self, updated, removed):
+        """Точечные вставки и удаления в mods_list без полной перерисовки"""
+        if not self.mods:
+            # В списке только сообщение "Моды не найдены!"
+            self.mods_list.delete(0, tk.END)
+
+        gone = set(removed) | {mod.entry for mod in updated}
+        for i in range(len(self.mods) - 1, -1, -1):
+            if self.mods[i].entry in gone:
+                del self.mods[i]
+                self.mods_list.delete(i)
+
+        keys = [mod.title.lower() for mod in self.mods]
+        for mod in updated:
+            i = bisect.bisect_right(keys, mod.title.lower())
+            keys.insert(i, mod.title.lower())
+            self.mods.insert(i, mod)
+            self.mods_list.insert(i, mod.label)
+
+        if not self.mods:
+            self.mods_list.insert(tk.END, "Моды не найдены!")
+
+    def show_conflicts(self):
+        """Анализ пересечений файлов между модами (хэши считаются в фоне)"""
+        if not self.mods:
+            messagebox.showwarning(self._("settings")["error"], "Моды не найдены!")
+            return
+        if self.conflict_analyzer is None:
+            from conflicts import ConflictAnalyzer
+            self.conflict_analyzer = ConflictAnalyzer()
+        self.analyze_token.cancel()
+        token = self.analyze_token = CancelToken()
+        self.status_label.config(text=self._("settings")["analyzing"])
+
+        def done(report):
+            self.status_label.config(text="")
+            if report:
+                self.show_conflict_report(report)
+
+        def failed(e):
+            self.status_label.config(text="")
+            messagebox.showerror(self._("settings")["error"], f"Ошибка анализа модов: {e}")
+
+        self.tasks.submit(token, self.conflict_analyzer.analyze, list(self.mods), token,
+                          on_done=done, on_error=failed)
+
+    def show_conflict_report(self, report: "ConflictReport"):
+
+        window = tk.Toplevel(self.root)
+        window.title(self._("settings")["conflicts_title"])
+        window.geometry("800x500")
+
+        text = tk.Text(window, wrap=tk.NONE)
+        scrollbar = ttk.Scrollbar(window, orient="vertical", command=text.yview)
+        text.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        text.pack(fill=tk.BOTH, expand=True)
+
+        lines = [self._("settings")["conflicts_summary"].format(
+            report.addons, report.files, len(report.conflicts),
+            len(report.duplicates), report.wasted_bytes / 1048576), ""]
+        for path in sorted(report.conflicts)[:1000]:
+            lines.append(f"{path}: {', '.join(report.conflicts[path])}")
+        if report.duplicates:
+            lines.append("")
+        for group in report.duplicates[:200]:
+            addons = sorted({addon for addon, _ in group.copies})
+            lines.append(f"{group.size} B x{len(group.copies)}: {group.copies[0][1]} ({', '.join(addons)})")
+        # Одна вставка всего текста вместо построчной
+        text.insert(tk.END, "\n".join(lines))
+        text.config(state=tk.DISABLED)
+
+    def save_addon_profile(self):
+        """Набор из выделенных аддонов addons, без выделения - из всех включённых"""
+        from addon_profiles import ALL_ADDONS
+
+        name = self.addon_profile_var.get().strip()
+        if not name or name == ALL_ADDONS:
+            messagebox.showwarning(self._("settings")["error"], self._("settings")["addon_profile_name"])
+            return
+        mods = self.mods or []
+        selected = [mods[i] for i in self.mods_list.curselection() if i < len(mods)] or mods
+        # Предметы Мастерской не переносятся: Steam скачал бы их заново
+        entries = {os.path.basename(mod.entry) for mod in selected if mod.source == "addons"}
+        self.engine.save_addon_profile(name, entries)
+        self.save_data()
+        self.addon_profile_box.config(values=self.engine.addon_profile_names())
+        self.status_label.config(text=self._("settings")["addon_profile_saved"].format(name, len(entries)))
+
+    def activate_addon_profile(self):
+        """Смена набора аддонов: переносятся только отличающиеся элементы (в фоне)"""
+        texts = self._("settings")
+        name = self.addon_profile_var.get().strip()
+        if name not in self.engine.addon_profile_names():
+            messagebox.showwarning(texts["error"], texts["addon_profile_name"])
+            return
+        if len(self.supervisor):
+            # Запущенная игра держит файлы аддонов открытыми
+            messagebox.showwarning(texts["error"], texts["addon_profile_running"])
+            return
+        self.switch_token.cancel()
+        token = self.switch_token = CancelToken()
+
+        def done(result):
+            self.save_data()
+            self.status_label.config(text=texts["addon_profile_switched"].format(
+                name, len(result.enabled), len(result.disabled)))
+            if result.missing:
+                messagebox.showwarning(texts["error"],
+                                       texts["addon_profile_missing"].format("\n".join(result.missing)))
+            # Переносы в addons список подхватывает через наблюдатель за папками
+            if (result.enabled or result.disabled) and not self.mod_watcher:
+                self.load_mods()
+
+        def failed(e):
+            messagebox.showerror(texts["error"], f"Ошибка смены набора аддонов: {e}")
+
+        self.tasks.submit(token, self.engine.activate_addon_profile, name, on_done=done, on_error=failed)
+
+    def show_disk_usage(self):
+        """Место, занятое аддонами, Мастерской и кэшем игры (подсчёт в фоне)"""
+        if not self.engine.addons_path():
+            messagebox.showerror(self._("settings")["error"], "Не найден путь к Steam!")
+            return
+        self.usage_token.cancel()
+        token = self.usage_token = CancelToken()
+        self.status_label.config(text=self._("settings")["usage_scanning"])
+
+        def done(report):
+            self.status_label.config(text="")
+            if report:
+                self.show_usage_report(report)
+
+        def failed(e):
+            self.status_label.config(text="")
+            messagebox.showerror(self._("settings")["error"], f"Ошибка подсчёта места: {e}")
+
+        self.tasks.submit(token, self.engine.analyze_disk, token, self.engine.downloaded_items(),
+                          on_done=done, on_error=failed)
+
+    def show_usage_report(self, report: "UsageReport"):
+        """Папки по убыванию размера; вложенные вставляются при раскрытии"""
+        from disk_usage import format_size
+        import steam_paths
+
+        texts = self._("settings")
+        tree = report.tree
+        # Папки предметов Мастерской подписываются названиями аддонов
+        titles = {mod.workshop_id: mod.title for mod in self.mods or () if mod.workshop_id}
+
+        window = tk.Toplevel(self.root)
+        window.title(texts["usage_title"])
+        window.geometry("800x600")
+        ttk.Label(window, text=texts["usage_summary"].format(
+            format_size(tree.total), len(tree), format_size(report.reclaimable))).pack(anchor=tk.W, padx=10, pady=5)
+
+        columns = ("size", "share", "files")
+        view = ttk.Treeview(window, columns=columns)
+        for column, text in zip(("#0",) + columns, texts["usage_columns"]):
+            view.heading(column, text=text)
+        view.column("#0", width=440)
+        for column in columns:
+            view.column(column, width=100, anchor=tk.E)
+        scrollbar = ttk.Scrollbar(window, orient="vertical", command=view.yview)
+        view.configure(yscrollcommand=scrollbar.set)
+
+        def fill(parent, node=None):
+            total = tree.total if node is None else tree.size[node]
+            # В больших папках показываются только самые тяжёлые, остальные - одной строкой
+            children = tree.ranked(node)
+            for child in children[:USAGE_ROWS]:
+                name = tree.names[child]
+                if name in titles:
+                    name = f"{titles[name]} ({name})"
+                iid = str(child)
+                view.insert(parent, tk.END, iid=iid, text=name, values=(
+                    format_size(tree.size[child]),
+                    f"{tree.size[child] / total:.1%}" if total else "-", tree.files[child]))
+                if tree.first_child[child] >= 0:
+                    # Заглушка, чтобы у строки был значок раскрытия
+                    view.insert(iid, tk.END, iid=iid + ":", text="...")
+            rest = children[USAGE_ROWS:]
+            if rest:
+                size = sum(tree.size[child] for child in rest)
+                view.insert(parent, tk.END, iid=f"{parent}:more", text=texts["usage_more"].format(len(rest)),
+                            values=(format_size(size), f"{size / total:.1%}" if total else "-",
+                                    sum(tree.files[child] for child in rest)))
+
+        def on_open(event):
+            iid = view.focus()
+            if view.exists(iid + ":"):
+                view.delete(iid + ":")
+                fill(iid, int(iid))
+
+        view.bind("<<TreeviewOpen>>", on_open)
+        fill("")
+
+        suggestions = ttk.Treeview(window, columns=("size", "reason"), height=8)
+        suggestions.column("#0", width=440)
+        suggestions.column("size", width=100, anchor=tk.E)
+        suggestions.column("reason", width=200)
+        now = time.time()
+        for suggestion in report.suggestions:
+            if suggestion.kind == "stale_cache":
+                reason = texts["usage_stale"].format((now - suggestion.modified) / 86400)
+            else:
+                reason = texts["usage_unsubscribed"]
+            name = os.path.basename(suggestion.path)
+            suggestions.insert("", tk.END, iid=suggestion.path, text=f"{titles.get(name, name)} ({suggestion.path})",
+                               values=(format_size(suggestion.size), reason))
+
+        def open_suggestion(event):
+            path = suggestions.focus()
+            if path:
+                steam_paths.open_folder(path)
+
+        suggestions.bind("<Double-1>", open_suggestion)
+
+        if report.suggestions:
+            suggestions.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=(0, 10))
+            ttk.Label(window, text=texts["usage_suggestions"]).pack(side=tk.BOTTOM, anchor=tk.W, padx=10)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        view.pack(fill=tk.BOTH, expand=True, padx=(10, 0))
 
     def launch_gmod(self):
         """Запуск Garry's Mod"""
@@ -677,56 +1752,127 @@ class GModLauncher:
             
         try:
 
-            args = [self.gmod_path]
-            
-
-            options = self.launch_options.get().strip()
-            if options:
-                args.extend(options.split())
-            
-
-            if self.console_var.get():
-                args.append("-console")
+            args = self.launch_argv(console=bool(self.console_var.get()))
+            if args is None:
+                return
             
 
             self.root.withdraw()
             
  
-            self.gmod_process = subprocess.Popen(args)
-            
-
-            self.root.after(1000, self.check_gmod_process)
+            self.start_game(args)
                 
         except Exception as e:
             self.root.deiconify()
             messagebox.showerror(self._("settings")["error"], 
                                f"Не удалось запустить игру:\n{e}")
 
-    def check_gmod_process(self):
+    def select_profile(self, name):
+        """Переключение профиля одним щелчком: строка уже разобрана"""
+        if name not in self.profiles:
+            return
+        self.active_profile = name
+        self.options_var.set(self.profiles.get(name).options)
+        self.store.put("settings", "launch_profile", name)
+        self.save_data()
+
+    def save_profile(self, quiet=False) -> bool:
+        """Сохранить текст параметров в профиль из поля выбора (новый или существующий)"""
+        from launch_profiles import ProfileError
 
-        if self.gmod_process.poll() is None:
-            # Процесс еще работает, проверяем снова через секунду
-            self.root.after(1000, self.check_gmod_process)
+        name = self.profile_var.get().strip() or self.active_profile
+        options = self.options_var.get().strip()
+        try:
+            profile = self.profiles.set(name, options)
+        except ProfileError as e:
+            messagebox.showerror(self._("settings")["error"], str(e))
+            return False
+        if not quiet and profile.conflicts:
+            messagebox.showwarning(self._("settings")["error"],
+                                 self._("settings")["profile_conflicts"].format("\n".join(profile.conflicts)))
+        self.store.put("launch_profiles", name, options)
+        self.active_profile = name
+        self.store.put("settings", "launch_profile", name)
+        self.save_data()
+        self.profile_box.config(values=self.profiles.names())
+        if not quiet:
+            self.status_label.config(text=self._("settings")["profile_saved"].format(name))
+        return True
+
+    def launch_argv(self, connect=None, console=False) -> Optional[List[str]]:
+        """Готовая командная строка: для сервера - его профиль, иначе активный"""
+        from launch_profiles import PRESETS, ProfileError
+
+        name = self.engine.profile_for(connect, self.active_profile)
+        options = self.options_var.get().strip()
+        # Разбор нужен, только если параметры правили и не сохранили
+        if name == self.active_profile and options != self.profiles.get(name).options:
+            if (self.profile_var.get().strip() or name) in PRESETS:
+                # Готовый профиль не перезаписывается: правка действует на этот запуск
+                try:
+                    return self.engine.argv(name, connect, console, options)
+                except ProfileError as e:
+                    messagebox.showerror(self._("settings")["error"], str(e))
+                    return None
+            if not self.save_profile(quiet=True):
+                return None
+            # Параметры сохранены в профиль из поля выбора - он теперь активный
+            name = self.engine.profile_for(connect, self.active_profile)
+        return self.engine.argv(name, connect, console)
+
+    def toggle_server_profile(self):
+        """Закрепить активный профиль за выбранным сервером или снять закрепление"""
+        server = self.server_table.selected()
+        if not server:
+            messagebox.showwarning(self._("settings")["error"], 
+                                 "Выберите сервер из списка!")
+            return
+        address = str(server[4])
+        if self.store.get("server_profiles", address) == self.active_profile:
+            self.store.delete("server_profiles", address)
+            text = self._("settings")["server_profile_cleared"].format(address)
         else:
-            # Процесс завершен, показываем лаунчер снова
+            self.store.put("server_profiles", address, self.active_profile)
+            text = self._("settings")["server_profile_set"].format(address, self.active_profile)
+        self.save_data()
+        self.status_label.config(text=text)
+
+    def start_game(self, args):
+        """Запуск копии игры; о выходе сообщит поток ожидания, без опроса"""
+        session = self.supervisor.launch(args)
+        # Замеры пинга во время игры только мешали бы ей
+        self.ping_monitor.pause()
+        self.status_label.config(text="")
+        return session
+
+    def on_game_exit(self, session: "GameSession"):
+        """Выход одной из копий игры (в потоке Tk)"""
+        self.engine.record_session(session)
+        self.save_data()
+
+        if not len(self.supervisor):
+            # Последняя копия закрыта - лаунчер возвращается сразу
             self.root.deiconify()
-            self.gmod_process = None
+            self.ping_monitor.resume()
+        self.status_label.config(text=self._("settings")["game_exited"].format(
+            session.runtime / 60, session.exit_code))
 
     def connect_to_server(self):
 
-        selected = self.servers_tree.focus()
-        if not selected:
+        server_info = list(self.server_table.selected() or ())
+        if not server_info:
             messagebox.showwarning(self._("settings")["error"], 
                                  "Выберите сервер из списка!")
             return
-        
-        server_info = self.servers_tree.item(selected)['values']
+        self.join_server(server_info)
+
+    def join_server(self, server_info):
+        """Запуск игры с подключением к серверу из строки таблицы"""
         address = server_info[4]  
         
 
-        if server_info not in self.server_history:
-            self.server_history.append(server_info)
-            self.save_data()
+        self.engine.remember_server(server_info)
+        self.save_data()
         
         if not self.gmod_path:
             messagebox.showerror(self._("settings")["error"], 
@@ -735,21 +1881,15 @@ class GModLauncher:
             
         try:
 
-            args = [self.gmod_path, "-connect", address]
-            
-
-            options = self.launch_options.get().strip()
-            if options:
-                args.extend(options.split())
+            args = self.launch_argv(connect=address)
+            if args is None:
+                return
             
 
             self.root.withdraw()
             
 
-            self.gmod_process = subprocess.Popen(args)
-            
-а
-            self.root.after(1000, self.check_gmod_process)
+            self.start_game(args)
                 
         except Exception as e:
             self.root.deiconify()
@@ -758,10 +1898,48 @@ class GModLauncher:
 
     def on_close(self):
         """Обработчик закрытия окна"""
-        self.save_data()
+        if not hasattr(self, 'engine'):
+            # Закрыли до finish_startup: сохранять ещё нечего
+            if self.startup_job is not None:
+                self.root.after_cancel(self.startup_job)
+            self.tasks.shutdown()
+            self.root.destroy()
+            return
+        self.refresh_token.cancel()
+        self.servers_token.cancel()
+        self.mods_token.cancel()
+        self.browse_token.cancel()
+        self.quick_join_token.cancel()
+        self.ping_token.cancel()
+        if self.ping_targets_job:
+            self.root.after_cancel(self.ping_targets_job)
+        self.ping_monitor.stop()
+        self.details_token.cancel()
+        self.prefetch_token.cancel()
+        self.analyze_token.cancel()
+        self.usage_token.cancel()
+        self.switch_token.cancel()
+        self.download_token.cancel()
+        if self.download_queue:
+            self.download_queue.cancel()
+        self.stop_mod_watch()
+        self.tasks.shutdown()
+        self.server_cache.save()
+        try:
+            self.store.compact()
+        except Exception as e:
+            print(f"Ошибка сохранения данных: {e}")
+        if self.trace_file:
+            try:
+                profiling.tracer.dump(self.trace_file)
+            except OSError as e:
+                print(f"Ошибка записи трассы: {e}")
         self.root.destroy()
 
 if __name__ == "__main__":
+    trace_file = profiling.trace_path(sys.argv[1:])
+    profiling.tracer.since_start("imports")
     root = tk.Tk()
     app = GModLauncher(root)
+    app.trace_file = trace_file
     root.mainloop()
@@ -0,0 +1,137 @@
+"""Клиент мастер-сервера Valve и потоковый конвейер адресов"""
+import asyncio
+import socket
+import struct
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+
+MASTER_SERVERS: List[Tuple[str, int]] = [("hl2master.steampowered.com", 27011)]
+
+REGION_US_EAST = 0x00
+REGION_US_WEST = 0x01
+REGION_SOUTH_AMERICA = 0x02
+REGION_EUROPE = 0x03
+REGION_ASIA = 0x04
+REGION_AUSTRALIA = 0x05
+REGION_MIDDLE_EAST = 0x06
+REGION_AFRICA = 0x07
+REGION_ALL = 0xFF
+
+GMOD_FILTER = "\\appid\\4000"
+
+MSG_LIST_REQUEST = 0x31
+RESPONSE_HEADER = b"\xff\xff\xff\xff\x66\x0a"
+# Нулевой адрес и как начальная позиция, и как признак конца списка
+NULL_ADDRESS = "0.0.0.0:0"
+
+DEFAULT_TIMEOUT = 3.0
+DEFAULT_RETRIES = 2
+
+
+class MasterServerError(Exception):
+    """Мастер-сервер не ответил или прислал мусор"""
+
+
+def build_request(region: int, seed: str, filter_text: str) -> bytes:
+    """Пакет запроса страницы списка, начиная после адреса seed"""
+    return (bytes([MSG_LIST_REQUEST, region & 0xFF])
+            + seed.encode("ascii") + b"\x00"
+            + filter_text.encode("utf-8") + b"\x00")
+
+
+def parse_response(data: bytes) -> Tuple[List[str], bool]:
+    """Адреса из страницы ответа и признак того, что список закончился"""
+    if not data.startswith(RESPONSE_HEADER):
+        raise MasterServerError("Неизвестный формат ответа мастер-сервера")
+    addresses = []
+    done = False
+    for offset in range(len(RESPONSE_HEADER), len(data) - 5, 6):
+        ip = socket.inet_ntoa(data[offset:offset + 4])
+        port = struct.unpack_from(">H", data, offset + 4)[0]
+        address = f"{ip}:{port}"
+        if address == NULL_ADDRESS:
+            done = True
+            break
+        addresses.append(address)
+    return addresses, done
+
+
+class _MasterProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self):
+        self.packets: asyncio.Queue = asyncio.Queue()
+
+    def datagram_received(self, data, addr):
+        self.packets.put_nowait(data)
+
+    def error_received(self, exc):
+        self.packets.put_nowait(exc)
+
+
+async def _fetch_page(transport, protocol, request: bytes,
+                      timeout: float, retries: int) -> bytes:
+    for _ in range(retries + 1):
+        transport.sendto(request)
+        try:
+            packet = await asyncio.wait_for(protocol.packets.get(), timeout)
+        except asyncio.TimeoutError:
+            continue
+        if isinstance(packet, Exception):
+            raise packet
+        return packet
+    raise MasterServerError("Мастер-сервер не отвечает")
+
+
+async def iter_pages(region: int = REGION_ALL, filter_text: str = GMOD_FILTER,
+                     endpoints: Optional[Iterable[Tuple[str, int]]] = None,
+                     timeout: float = DEFAULT_TIMEOUT,
+                     retries: int = DEFAULT_RETRIES) -> AsyncIterator[List[str]]:
+    """Постраничное чтение списка с курсором по последнему адресу.
+
+    Страницы отдаются сразу по получении. Если мастер-сервер перестал
+    отвечать до первой страницы, пробуется следующий из endpoints.
+    """
+    loop = asyncio.get_running_loop()
+    last_error: Optional[Exception] = None
+    for host, port in endpoints or MASTER_SERVERS:
+        try:
+            transport, protocol = await loop.create_datagram_endpoint(
+                _MasterProtocol, remote_addr=(host, port))
+        except OSError as e:
+            last_error = e
+            continue
+        seed = NULL_ADDRESS
+        pages = 0
+        try:
+            while True:
+                try:
+                    data = await _fetch_page(transport, protocol,
+                                             build_request(region, seed, filter_text),
+                                             timeout, retries)
+                    addresses, done = parse_response(data)
+                except (OSError, MasterServerError) as e:
+                    last_error = e
+                    break
+                pages += 1
+                if addresses:
+                    yield addresses
+                if done or not addresses or addresses[-1] == seed:
+                    return
+                seed = addresses[-1]
+        finally:
+            transport.close()
+        # Часть списка уже выдана, с другого сервера начинать заново нельзя
+        if pages:
+            return
+    if last_error:
+        raise MasterServerError(f"Не удалось получить список серверов: {last_error}")
+
+
+async def unique_addresses(pages: AsyncIterator[List[str]],
+                           skip: Iterable[str] = ()) -> AsyncIterator[str]:
+    """Разворачивает страницы в поток адресов без повторов"""
+    seen = set(skip)
+    async for page in pages:
+        for address in page:
+            if address not in seen:
+                seen.add(address)
+                yield address
@@ -0,0 +1,192 @@
+"""Постоянный замер пинга серверов со статистикой по скользящему окну"""
+import math
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, Iterable, List, NamedTuple, Optional
+
+import a2s
+from a2s import ServerInfo
+
+# Замеров в окне на сервер и сколько серверов помнить
+WINDOW = 32
+MAX_SERVERS = 1024
+# Бюджет запросов в секунду: чем больше строк на экране, тем реже опрос каждой
+PROBES_PER_SECOND = 20
+MIN_INTERVAL = 2.0
+MAX_INTERVAL = 15.0
+PROBE_TIMEOUT = 1.0
+
+_LOST = math.nan
+
+
+class PingStats(NamedTuple):
+    samples: int
+    p50: float
+    p95: float
+    jitter: float
+    loss: float
+
+
+def _percentile(ordered: List[float], p: float) -> float:
+    index = max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class PingHistory:
+    """Кольцевые буферы RTT всех серверов в одном массиве float.
+
+    У каждого сервера свой слот из window значений; потерянный ответ
+    хранится как NaN. Слоты давно не опрашиваемых серверов переиспользуются.
+    """
+
+    def __init__(self, window: int = WINDOW, max_servers: int = MAX_SERVERS):
+        self.window = window
+        self.max_servers = max_servers
+        self.slots: "OrderedDict[str, int]" = OrderedDict()
+        self.samples = array("f")
+        # Позиция записи и число замеров в слоте
+        self.heads = array("H")
+        self.counts = array("H")
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, address):
+        return address in self.slots
+
+    def _slot(self, address: str) -> int:
+        slot = self.slots.get(address)
+        if slot is not None:
+            self.slots.move_to_end(address)
+            return slot
+        if len(self.slots) < self.max_servers:
+            slot = len(self.slots)
+            self.samples.extend(array("f", [_LOST]) * self.window)
+            self.heads.append(0)
+            self.counts.append(0)
+        else:
+            _, slot = self.slots.popitem(last=False)
+            self.heads[slot] = self.counts[slot] = 0
+        self.slots[address] = slot
+        return slot
+
+    def record(self, address: str, rtt: Optional[float]):
+        """Замер RTT в мс; None - ответа не было"""
+        with self._lock:
+            slot = self._slot(address)
+            head = self.heads[slot]
+            self.samples[slot * self.window + head] = _LOST if rtt is None else rtt
+            self.heads[slot] = (head + 1) % self.window
+            self.counts[slot] = min(self.counts[slot] + 1, self.window)
+
+    def values(self, address: str) -> List[float]:
+        """Замеры от старых к новым (NaN - потеря)"""
+        with self._lock:
+            slot = self.slots.get(address)
+            if slot is None:
+                return []
+            base, head, count = slot * self.window, self.heads[slot], self.counts[slot]
+            ring = self.samples[base:base + self.window]
+        start = (head - count) % self.window
+        return [ring[(start + i) % self.window] for i in range(count)]
+
+    def stats(self, address: str) -> Optional[PingStats]:
+        values = self.values(address)
+        if not values:
+            return None
+        ok = [v for v in values if not math.isnan(v)]
+        loss = 1 - len(ok) / len(values)
+        if not ok:
+            return PingStats(len(values), math.nan, math.nan, math.nan, loss)
+        # Джиттер - среднее модуля разницы соседних ответов (потери пропускаются).
+        # Сглаживание 1/16 из RFC 3550 на коротком окне не успело бы сойтись
+        jitter = (sum(abs(b - a) for a, b in zip(ok, ok[1:])) / (len(ok) - 1)
+                  if len(ok) > 1 else 0.0)
+        ordered = sorted(ok)
+        return PingStats(len(values), _percentile(ordered, 50), _percentile(ordered, 95),
+                         jitter, loss)
+
+
+class PingMonitor:
+    """Фоновый поток, по кругу опрашивающий адреса из set_targets().
+
+    Интервал между кругами растёт с числом адресов, чтобы держать
+    не больше probes_per_second запросов в секунду. Без адресов или на
+    паузе поток спит до set_targets, resume или stop. on_sample(address,
+    info или None) вызывается из потока монитора после записи замера.
+    """
+
+    def __init__(self, on_sample: Optional[Callable[[str, Optional[ServerInfo]], None]] = None,
+                 history: Optional[PingHistory] = None,
+                 probes_per_second: float = PROBES_PER_SECOND,
+                 timeout: float = PROBE_TIMEOUT):
+        self.on_sample = on_sample
+        self.history = history or PingHistory()
+        self.probes_per_second = probes_per_second
+        self.timeout = timeout
+        self.targets: List[str] = []
+        self.paused = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def interval(self, count: int) -> float:
+        return min(max(count / self.probes_per_second, MIN_INTERVAL), MAX_INTERVAL)
+
+    def set_targets(self, addresses: Iterable[str]):
+        """Новый набор адресов; новые адреса опрашиваются без ожидания круга"""
+        targets = list(dict.fromkeys(addresses))
+        with self._lock:
+            # Спящий без адресов поток будится всегда
+            fresh = any(a not in self.history for a in targets) or bool(targets and not self.targets)
+            self.targets = targets
+        if fresh:
+            self._wake.set()
+
+    def pause(self):
+        """Замеры прекращаются до resume (например, пока идёт игра)"""
+        with self._lock:
+            self.paused = True
+
+    def resume(self):
+        with self._lock:
+            self.paused = False
+        self._wake.set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="ping-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _record(self, address: str, info: Optional[ServerInfo]):
+        self.history.record(address, info.ping if info else None)
+        if self.on_sample:
+            try:
+                self.on_sample(address, info)
+            except Exception as e:
+                print(f"Ошибка обработки замера пинга: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Сброс до чтения адресов: set_targets после него не потеряется
+            self._wake.clear()
+            with self._lock:
+                targets = [] if self.paused else list(self.targets)
+            if not targets:
+                self._wake.wait()
+                continue
+            started = time.monotonic()
+            try:
+                a2s.query_servers(targets, timeout=self.timeout, on_result=self._record,
+                                  cancel=self._stop)
+            except Exception as e:
+                print(f"Ошибка замера пинга: {e}")
+            delay = self.interval(len(targets)) - (time.monotonic() - started)
+            self._wake.wait(max(delay, 0.1))
@@ -0,0 +1,173 @@
+"""Докачка контента сервера до запуска: какие предметы Мастерской отсутствуют или устарели"""
+import json
+import os
+import re
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from addons import AddonInfo
+
+API_URL = "https://api.steampowered.com/ISteamRemoteStorage/{}/v1/"
+# Сколько ID за один POST и сколько ждать ответа API
+API_BATCH = 100
+API_TIMEOUT = 10.0
+# Вложенные коллекции раскрываются не глубже этого
+MAX_COLLECTION_DEPTH = 3
+# Запас на разницу между временем публикации и mtime скачанного файла, сек
+MTIME_SLACK = 60
+
+# Старый формат addons: "название_123456789.gma"
+_LEGACY_ID = re.compile(r"_(\d{6,12})\.gma$", re.IGNORECASE)
+
+
+class WorkshopItem(NamedTuple):
+    item_id: str
+    title: str
+    size: int
+    updated: int
+
+
+class PrefetchPlan(NamedTuple):
+    required: List[str]
+    missing: List[str]
+    outdated: List[str]
+    # None - API Мастерской недоступен, устаревшие не определялись
+    items: Optional[Dict[str, WorkshopItem]]
+    # Не установленные ID, которые без API не отличить от коллекций: не качаются
+    unresolved: Tuple[str, ...] = ()
+
+    @property
+    def downloads(self) -> List[str]:
+        return self.missing + self.outdated
+
+    @property
+    def download_bytes(self) -> int:
+        if not self.items:
+            return 0
+        return sum(self.items[i].size for i in self.downloads if i in self.items)
+
+
+def installed_ids(mods: Iterable[AddonInfo]) -> Dict[str, AddonInfo]:
+    """Индекс ID Мастерской -> установленный аддон, включая старые .gma в addons"""
+    index = {}
+    for mod in mods:
+        item_id = mod.workshop_id
+        if not item_id and mod.kind == "gma":
+            match = _LEGACY_ID.search(mod.path)
+            item_id = match.group(1) if match else ""
+        if item_id:
+            index.setdefault(item_id, mod)
+    return index
+
+
+def _post(method: str, fields: Dict[str, str]) -> Dict:
+    data = urllib.parse.urlencode(fields).encode("ascii")
+    with urllib.request.urlopen(API_URL.format(method), data=data, timeout=API_TIMEOUT) as response:
+        return json.load(response)["response"]
+
+
+def _batches(ids: List[str]) -> Iterable[List[str]]:
+    for start in range(0, len(ids), API_BATCH):
+        yield ids[start:start + API_BATCH]
+
+
+def expand_collections(ids: Iterable[str]) -> List[str]:
+    """Коллекции заменяются их содержимым; обычные предметы остаются как есть"""
+    result: Dict[str, None] = {}
+    seen = set()
+    level = list(dict.fromkeys(ids))
+    for _ in range(MAX_COLLECTION_DEPTH):
+        seen.update(level)
+        nested = []
+        for batch in _batches(level):
+            fields = {"collectioncount": str(len(batch))}
+            fields.update((f"publishedfileids[{i}]", item_id) for i, item_id in enumerate(batch))
+            details = {str(d.get("publishedfileid")): d
+                       for d in _post("GetCollectionDetails", fields).get("collectiondetails", [])}
+            for item_id in batch:
+                children = details.get(item_id, {}).get("children")
+                if not children:
+                    result[item_id] = None
+                    continue
+                for child in children:
+                    child_id = str(child.get("publishedfileid"))
+                    # filetype 2 - вложенная коллекция
+                    if child.get("filetype") == 2:
+                        if child_id not in seen:
+                            nested.append(child_id)
+                    else:
+                        result[child_id] = None
+        if not nested:
+            break
+        level = nested
+    return list(result)
+
+
+def fetch_items(ids: List[str]) -> Dict[str, WorkshopItem]:
+    """Название, размер и время последнего обновления предметов"""
+    items = {}
+    for batch in _batches(ids):
+        fields = {"itemcount": str(len(batch))}
+        fields.update((f"publishedfileids[{i}]", item_id) for i, item_id in enumerate(batch))
+        for d in _post("GetPublishedFileDetails", fields).get("publishedfiledetails", []):
+            # result != 1 - предмет удалён или скрыт, скачать его нельзя
+            if d.get("result") == 1:
+                item_id = str(d["publishedfileid"])
+                items[item_id] = WorkshopItem(item_id, d.get("title", ""),
+                                              int(d.get("file_size") or 0), int(d.get("time_updated") or 0))
+    return items
+
+
+def diff(required: Iterable[str], installed: Dict[str, AddonInfo],
+         items: Optional[Dict[str, WorkshopItem]] = None,
+         mtime: Optional[Callable[[str], Optional[float]]] = None) -> PrefetchPlan:
+    """Сравнение списка сервера с установленным: каждый ID - одна проверка по словарю.
+
+    Без items (API недоступен) определяются только отсутствующие предметы.
+    mtime(path) даёт время изменения установленного файла.
+    """
+    required = list(dict.fromkeys(required))
+    missing, outdated = [], []
+    for item_id in required:
+        if items is not None and item_id not in items:
+            continue
+        mod = installed.get(item_id)
+        if mod is None:
+            missing.append(item_id)
+        elif items is not None and mtime is not None:
+            modified = mtime(mod.path)
+            if modified is not None and modified + MTIME_SLACK < items[item_id].updated:
+                outdated.append(item_id)
+    return PrefetchPlan(required, missing, outdated, items)
+
+
+def resolve(ids: Iterable[str], installed: Dict[str, AddonInfo],
+            mtime: Optional[Callable[[str], Optional[float]]] = None,
+            known: Optional[List[str]] = None) -> PrefetchPlan:
+    """Коллекции раскрываются через Steam Web API, затем считается разница.
+
+    Без сети остаётся проверка по ID. known - предметы из прошлого раскрытия
+    того же списка: по ним отсутствующие видны и так. Без known не
+    установленные ID попадают в unresolved - это могут быть коллекции,
+    и steamcmd скачать их как предмет не сможет.
+    """
+    ids = list(dict.fromkeys(ids))
+    try:
+        required = expand_collections(ids)
+        items = fetch_items(required)
+    except (urllib.error.URLError, OSError, ValueError, KeyError) as e:
+        print(f"Steam Web API недоступен, проверяются только отсутствующие: {e}")
+        if known is not None:
+            return diff(known, installed)
+        plan = diff(ids, installed)
+        return plan._replace(missing=[], unresolved=tuple(plan.missing))
+    return diff(required, installed, items, mtime or _file_mtime)
+
+
+def _file_mtime(path: str) -> Optional[float]:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
@@ -0,0 +1,97 @@
+"""Замеры этапов запуска лаунчера и выгрузка в формате Chrome Trace"""
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Путь, куда при закрытии записывается трасса (то же делает флаг --trace)
+TRACE_ENV = "GMOD_LAUNCHER_TRACE"
+# Сверх этого события не копятся, чтобы долгий сеанс не раздувал память
+MAX_EVENTS = 100000
+
+
+class Tracer:
+    """Интервалы выполнения с привязкой к потоку.
+
+    Файл из dump() открывается в chrome://tracing или ui.perfetto.dev.
+    Отсчёт времени идёт от импорта модуля, то есть почти от старта процесса.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.events: List[Dict] = []
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start: float, end: float, **args):
+        event = {
+            "name": name, "ph": "X", "pid": self.pid, "tid": threading.get_ident(),
+            "ts": round((start - self.origin) * 1e6, 1),
+            "dur": round((end - start) * 1e6, 1),
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            if len(self.events) < MAX_EVENTS:
+                self.events.append(event)
+
+    @contextmanager
+    def span(self, name: str, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter(), **args)
+
+    def since_start(self, name: str):
+        """Интервал от начала процесса до текущего момента"""
+        self.add(name, self.origin, time.perf_counter())
+
+    def durations(self) -> Dict[str, float]:
+        """Суммарное время по имени интервала, мс"""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for event in self.events:
+                totals[event["name"]] = totals.get(event["name"], 0.0) + event["dur"] / 1000
+        return totals
+
+    def dump(self, path: str):
+        with self._lock:
+            events = list(self.events)
+        thread_names = [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": t.ident,
+                         "args": {"name": t.name}} for t in threading.enumerate()]
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": thread_names + events, "displayTimeUnit": "ms"}, f)
+        os.replace(tmp_path, path)
+
+
+tracer = Tracer()
+span = tracer.span
+
+
+def traced(fn=None, *, name: Optional[str] = None):
+    """Декоратор: каждый вызов функции записывается интервалом"""
+    if fn is None:
+        return lambda f: traced(f, name=name)
+    label = name or fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with tracer.span(label):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def trace_path(argv: Optional[List[str]] = None) -> Optional[str]:
+    """Путь для трассы из --trace PATH / --trace=PATH или переменной окружения"""
+    argv = argv or []
+    for i, arg in enumerate(argv):
+        if arg == "--trace" and i + 1 < len(argv):
+            return argv[i + 1]
+        if arg.startswith("--trace="):
+            return arg.split("=", 1)[1]
+    return os.environ.get(TRACE_ENV) or None
@@ -0,0 +1,131 @@
+"""Быстрый вход: выбор лучшего сервера по свежему опросу A2S_INFO"""
+import asyncio
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+import a2s
+from a2s import ServerInfo
+
+# Первый проход по всем кандидатам и подтверждение лучших перед запуском
+PROBE_TIMEOUT = 0.6
+CONFIRM_TOP = 3
+# Сколько групп по CONFIRM_TOP переспрашивается, пока кто-нибудь не подтвердится
+CONFIRM_ROUNDS = 3
+# Через сколько без ответа подтверждения отправляется дублирующий запрос;
+# для дальних серверов - через HEDGE_RTT_FACTOR их пинга из первого прохода
+HEDGE_DELAY = 0.1
+HEDGE_RTT_FACTOR = 1.5
+# Подтверждение ждёт не меньше первого прохода и не меньше стольких пингов
+# (запрос с challenge - это два обмена)
+CONFIRM_RTT_FACTOR = 3.0
+
+# Штрафы к пингу, мс: последнее место успеют занять, пока грузится игра
+LAST_SLOT_PENALTY = 40.0
+FAILURE_PENALTY = 100.0
+
+
+class QuickJoinResult(NamedTuple):
+    best: Optional[ServerInfo]
+    ranked: List[ServerInfo]
+    probed: int
+    answered: int
+    elapsed: float
+
+
+def score(info: ServerInfo, failures: int = 0) -> Optional[float]:
+    """Чем меньше, тем лучше; None - сервер полон"""
+    free = info.max_players - info.players
+    if free <= 0:
+        return None
+    penalty = LAST_SLOT_PENALTY if free == 1 else 0.0
+    return info.ping + penalty + FAILURE_PENALTY * failures
+
+
+def rank(infos: Iterable[ServerInfo], failures: Optional[Dict[str, int]] = None) -> List[ServerInfo]:
+    """Доступные серверы от лучшего к худшему; при равенстве - больше свободных мест"""
+    failures = failures or {}
+    scored = []
+    for info in infos:
+        value = score(info, failures.get(info.address, 0))
+        if value is not None:
+            scored.append((value, info.players - info.max_players, info.address, info))
+    scored.sort(key=lambda item: item[:3])
+    return [item[3] for item in scored]
+
+
+async def hedged_info(address: str, timeout: float = PROBE_TIMEOUT,
+                      hedge_delay: float = HEDGE_DELAY) -> Optional[ServerInfo]:
+    """A2S_INFO с дублирующим запросом, если первый задержался.
+
+    Потерянный UDP-пакет не стоит целого таймаута: второй запрос уходит
+    через hedge_delay, засчитывается первый пришедший ответ.
+    """
+    async def attempt():
+        try:
+            return await a2s.query_info(address, timeout)
+        except (asyncio.TimeoutError, OSError, ValueError, a2s.A2SError):
+            return None
+
+    first = asyncio.ensure_future(attempt())
+    done, _ = await asyncio.wait({first}, timeout=hedge_delay)
+    if done and first.result() is not None:
+        return first.result()
+    pending = {asyncio.ensure_future(attempt())}
+    if not first.done():
+        pending.add(first)
+    result = None
+    while pending and result is None:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            result = result or task.result()
+    for task in pending:
+        task.cancel()
+    return result
+
+
+def confirm_timing(info: ServerInfo, timeout: float = PROBE_TIMEOUT):
+    """(таймаут, задержка дубля) подтверждения по пингу сервера из первого прохода"""
+    rtt = max(info.ping, 0.0) / 1000
+    return max(timeout, CONFIRM_RTT_FACTOR * rtt), max(HEDGE_DELAY, HEDGE_RTT_FACTOR * rtt)
+
+
+async def find_best_async(addresses: Iterable[str], failures: Optional[Dict[str, int]] = None,
+                          on_result: Optional[Callable[[str, Optional[ServerInfo]], None]] = None,
+                          cancel=None, timeout: float = PROBE_TIMEOUT,
+                          confirm_top: int = CONFIRM_TOP) -> QuickJoinResult:
+    start = time.perf_counter()
+    results = await a2s.query_many(addresses, timeout=timeout, on_result=on_result, cancel=cancel)
+    ranked = rank((info for info in results.values() if info), failures)
+    # Ответившие, в том числе заполненные: rank их отбрасывает
+    answered = sum(1 for info in results.values() if info)
+
+    # Ответы первого прохода могли устареть (сервер заполнился) - лучших
+    # переспрашиваем перед запуском и выбираем среди подтвердивших.
+    # Если никто из группы не подтвердился, переспрашивается следующая
+    best = None
+    # Не ответившие на повтор: место в них не опровергнуто, первый ответ в силе
+    unconfirmed: List[ServerInfo] = []
+    for first in range(0, min(len(ranked), confirm_top * CONFIRM_ROUNDS), confirm_top):
+        if cancel is not None and cancel.is_set():
+            break
+        top = ranked[first:first + confirm_top]
+        fresh = await asyncio.gather(*(hedged_info(info.address, *confirm_timing(info, timeout))
+                                       for info in top))
+        for info, again in zip(top, fresh):
+            if again is None:
+                unconfirmed.append(info)
+            elif on_result:
+                on_result(info.address, again)
+        confirmed = rank((info for info in fresh if info), failures)
+        if confirmed:
+            best = confirmed[0]
+            break
+    if best is None and unconfirmed and not (cancel is not None and cancel.is_set()):
+        best = unconfirmed[0]
+
+    return QuickJoinResult(best, ranked, len(results), answered, time.perf_counter() - start)
+
+
+def find_best(addresses: Iterable[str], **kwargs) -> QuickJoinResult:
+    """Синхронная обёртка для фонового потока"""
+    return asyncio.run(find_best_async(addresses, **kwargs))
@@ -0,0 +1,143 @@
+"""Кэш последних ответов A2S на диске"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, List, NamedTuple, Optional
+
+from a2s import ServerInfo
+
+CACHE_FILE = "server_cache.json"
+CACHE_VERSION = 1
+
+DEFAULT_TTL = 60.0
+DEFAULT_MAX_ENTRIES = 5000
+# Пауза перед повторным опросом сервера, который не отвечает: 30 с, 60 с, ... до часа
+BACKOFF_BASE = 30.0
+BACKOFF_MAX = 3600.0
+
+
+class CacheEntry(NamedTuple):
+    info: Optional[ServerInfo]
+    last_seen: float
+    failures: int
+    retry_at: float
+
+
+class ServerCache:
+    """Последние известные данные серверов с TTL, лимитом LRU и backoff.
+
+    Свежие (моложе ttl) записи не требуют повторного опроса. Сервер, не
+    ответивший несколько раз подряд, опрашивается всё реже. Потокобезопасен:
+    ответы записываются прямо из фонового опроса.
+    """
+
+    def __init__(self, path: str = CACHE_FILE, ttl: float = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.dirty = False
+        self._lock = threading.RLock()
+        # Запись на диск: снимок берётся под _lock, файл пишется под этой,
+        # чтобы опрос не ждал json.dump, а записи из разных потоков не смешивались
+        self._save_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, address):
+        return address in self.entries
+
+    # --- чтение ---
+
+    def get(self, address: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self.entries.get(address)
+            if entry is not None:
+                self.entries.move_to_end(address)
+            return entry
+
+    def info(self, address: str) -> Optional[ServerInfo]:
+        entry = self.get(address)
+        return entry.info if entry else None
+
+    def needs_refresh(self, address: str, now: Optional[float] = None) -> bool:
+        """Нужно ли опрашивать сервер сейчас"""
+        now = time.time() if now is None else now
+        entry = self.get(address)
+        if entry is None:
+            return True
+        if entry.failures:
+            return now >= entry.retry_at
+        return now - entry.last_seen >= self.ttl
+
+    def stale(self, addresses: Iterable[str]) -> List[str]:
+        now = time.time()
+        return [a for a in addresses if self.needs_refresh(a, now)]
+
+    # --- запись ---
+
+    def store(self, info: ServerInfo):
+        self._put(info.address, CacheEntry(info, time.time(), 0, 0.0))
+
+    def record_failure(self, address: str):
+        with self._lock:
+            entry = self.entries.get(address)
+            failures = entry.failures + 1 if entry else 1
+            delay = min(BACKOFF_BASE * 2 ** (failures - 1), BACKOFF_MAX)
+            self._put(address, CacheEntry(entry.info if entry else None,
+                                          entry.last_seen if entry else 0.0,
+                                          failures, time.time() + delay))
+
+    def _put(self, address: str, entry: CacheEntry):
+        with self._lock:
+            self.entries[address] = entry
+            self.entries.move_to_end(address)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.dirty = True
+
+    # --- диск ---
+
+    def load(self):
+        try:
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != CACHE_VERSION:
+                return
+            entries = OrderedDict()
+            for address, (info, last_seen, failures, retry_at) in data.get("servers", {}).items():
+                entries[address] = CacheEntry(ServerInfo(*info) if info else None,
+                                              last_seen, failures, retry_at)
+            with self._lock:
+                self.entries = entries
+                self.dirty = False
+        except Exception as e:
+            print(f"Ошибка загрузки кэша серверов: {e}")
+
+    def save(self):
+        """Атомарная запись через временный файл"""
+        with self._save_lock:
+            with self._lock:
+                if not self.dirty:
+                    return
+                servers = {address: [list(e.info) if e.info else None,
+                                     e.last_seen, e.failures, e.retry_at]
+                           for address, e in self.entries.items()}
+                self.dirty = False
+            try:
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"version": CACHE_VERSION, "servers": servers},
+                              f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                # Снимок не записан: следующая запись должна повторить попытку
+                with self._lock:
+                    self.dirty = True
+                print(f"Ошибка сохранения кэша серверов: {e}")
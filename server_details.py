@@ -0,0 +1,99 @@
+"""Игроки и правила выбранного сервера (A2S_PLAYER / A2S_RULES) с коротким кэшем"""
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional
+
+import a2s
+from a2s import PlayerInfo
+
+DETAILS_TIMEOUT = 2.0
+# Сколько секунд ответ считается свежим и сколько серверов помнить
+DETAILS_TTL = 30.0
+MAX_ENTRIES = 256
+
+# Правила, в которых серверы GMod публикуют коллекцию или нужные аддоны
+_WORKSHOP_RULE = re.compile(r"workshop|collection|addon", re.IGNORECASE)
+_WORKSHOP_ID = re.compile(r"(?<!\d)\d{6,12}(?!\d)")
+
+
+class ServerDetails(NamedTuple):
+    address: str
+    # None - сервер не ответил на этот запрос (правила часто отключены)
+    players: Optional[List[PlayerInfo]]
+    rules: Optional[Dict[str, str]]
+
+    @property
+    def workshop_ids(self) -> List[str]:
+        return workshop_ids(self.rules or {})
+
+
+def workshop_ids(rules: Dict[str, str]) -> List[str]:
+    """ID предметов Мастерской из значений правил про коллекцию/аддоны"""
+    ids = {}
+    for name, value in rules.items():
+        if _WORKSHOP_RULE.search(name):
+            ids.update(dict.fromkeys(_WORKSHOP_ID.findall(value)))
+    return list(ids)
+
+
+async def fetch_async(address: str, timeout: float = DETAILS_TIMEOUT,
+                      cancel=None) -> Optional[ServerDetails]:
+    """Игроки и правила параллельно; None, если запрос отменён.
+
+    A2SError - сервер не ответил ни на один из двух запросов.
+    """
+    tasks = [asyncio.ensure_future(a2s.query_players(address, timeout)),
+             asyncio.ensure_future(a2s.query_rules(address, timeout))]
+    pending = set(tasks)
+    while pending:
+        _, pending = await asyncio.wait(
+            pending, timeout=a2s.CANCEL_POLL if cancel is not None else None)
+        if pending and cancel is not None and cancel.is_set():
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            return None
+
+    results = []
+    for task in tasks:
+        error = task.exception()
+        if error is not None and not isinstance(
+                error, (asyncio.TimeoutError, OSError, ValueError, a2s.A2SError)):
+            raise error
+        results.append(None if error is not None else task.result())
+    if results == [None, None]:
+        raise a2s.A2SError("Сервер не отвечает на запросы игроков и правил")
+    return ServerDetails(address, *results)
+
+
+def fetch_details(address: str, timeout: float = DETAILS_TIMEOUT,
+                  cancel=None) -> Optional[ServerDetails]:
+    """Синхронная обёртка для фонового потока"""
+    return asyncio.run(fetch_async(address, timeout, cancel))
+
+
+class DetailsCache:
+    """Последние ответы по адресу; старше ttl считаются устаревшими"""
+
+    def __init__(self, ttl: float = DETAILS_TTL, max_entries: int = MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, address: str) -> Optional[ServerDetails]:
+        entry = self.entries.get(address)
+        if entry is None:
+            return None
+        details, fetched = entry
+        if time.monotonic() - fetched > self.ttl:
+            del self.entries[address]
+            return None
+        return details
+
+    def put(self, details: ServerDetails):
+        self.entries[details.address] = (details, time.monotonic())
+        self.entries.move_to_end(details.address)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
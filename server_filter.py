@@ -0,0 +1,206 @@
+"""Индекс серверов для быстрого поиска и сортировки списка"""
+import bisect
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+COLUMNS = ("name", "players", "map", "ping", "address")
+ADDRESS_COLUMN = 4
+
+_WORD = re.compile(r"\w+")
+_PART = re.compile(r"[^\W_]+")
+_PLAYERS = re.compile(r"\s*(\d+)\s*/\s*(\d+)")
+
+
+def tokenize(text: str) -> Set[str]:
+    """Слова целиком и их части между "_", в нижнем регистре"""
+    text = str(text).casefold()
+    return set(_WORD.findall(text)) | set(_PART.findall(text))
+
+
+def parse_players(text) -> Tuple[int, int]:
+    """"24/32" -> (24, 32), непонятное значение -> (-1, -1)"""
+    match = _PLAYERS.match(str(text))
+    if not match:
+        return -1, -1
+    return int(match.group(1)), int(match.group(2))
+
+
+def parse_ping(text) -> float:
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return float("inf")
+
+
+class ServerIndex:
+    """Предвычисленные ключи сортировки и префиксный индекс по словам.
+
+    Поиск: каждое слово запроса должно быть началом какого-то слова
+    в названии, карте или режиме сервера. Если новый запрос лишь уточняет
+    предыдущий (дописали букву или слово), проверяются только прошлые
+    совпадения, а не весь список.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.rows: Dict[str, tuple] = {}
+        self.gamemodes: Dict[str, str] = {}
+        self.tokens: Dict[str, Set[str]] = {}
+        self.postings: Dict[str, Set[str]] = {}
+        self.keys: Dict[str, Dict[str, object]] = {c: {} for c in COLUMNS + ("gamemode",)}
+
+        self._sorted_tokens: List[str] = []
+        self._tokens_dirty = False
+        self._sorted: Dict[str, List[str]] = {}
+
+        self._last_terms: Optional[List[str]] = None
+        self._last_matches: Optional[Set[str]] = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    # --- изменение данных ---
+
+    def replace(self, rows: Iterable[Tuple[Sequence, Sequence]]):
+        """Полная замена, rows в формате ServerTable.replace"""
+        self.clear()
+        for values, _ in rows:
+            address = str(values[ADDRESS_COLUMN])
+            if address not in self.rows:
+                self.set(address, values)
+
+    def set(self, address: str, row: Sequence, gamemode: Optional[str] = None):
+        row = tuple(row)
+        if gamemode is None:
+            gamemode = self.gamemodes.get(address, "")
+        if self.rows.get(address) == row and self.gamemodes.get(address) == gamemode:
+            return
+        self.rows[address] = row
+        self.gamemodes[address] = gamemode
+
+        keys = {
+            "name": str(row[0]).casefold(),
+            "players": parse_players(row[1]),
+            "map": str(row[2]).casefold(),
+            "ping": parse_ping(row[3]),
+            "address": address,
+            "gamemode": gamemode.casefold(),
+        }
+        for column, key in keys.items():
+            if self.keys[column].get(address) != key:
+                self.keys[column][address] = key
+                self._sorted.pop(column, None)
+
+        tokens = tokenize(row[0]) | tokenize(row[2]) | tokenize(gamemode)
+        old = self.tokens.get(address, set())
+        if tokens != old:
+            for token in old - tokens:
+                self._unpost(token, address)
+            for token in tokens - old:
+                if token not in self.postings:
+                    self.postings[token] = set()
+                    self._tokens_dirty = True
+                self.postings[token].add(address)
+            self.tokens[address] = tokens
+
+        # Поддерживаем прошлый результат поиска в актуальном состоянии
+        if self._last_matches is not None:
+            if self._matches(address, self._last_terms):
+                self._last_matches.add(address)
+            else:
+                self._last_matches.discard(address)
+
+    def remove(self, address: str):
+        if address not in self.rows:
+            return
+        for token in self.tokens.pop(address, ()):
+            self._unpost(token, address)
+        del self.rows[address]
+        del self.gamemodes[address]
+        for column in self.keys:
+            self.keys[column].pop(address, None)
+        self._sorted.clear()
+        if self._last_matches is not None:
+            self._last_matches.discard(address)
+
+    def _unpost(self, token: str, address: str):
+        # Пустой список удаляется: вернувшееся слово снова попадёт в сортированный индекс
+        posting = self.postings[token]
+        posting.discard(address)
+        if not posting:
+            del self.postings[token]
+            self._tokens_dirty = True
+
+    # --- поиск ---
+
+    def _matches(self, address: str, terms: List[str]) -> bool:
+        tokens = self.tokens.get(address, ())
+        return all(any(t.startswith(term) for t in tokens) for term in terms)
+
+    def _prefix_lookup(self, term: str) -> Set[str]:
+        if self._tokens_dirty:
+            self._sorted_tokens = sorted(self.postings)
+            self._tokens_dirty = False
+        start = bisect.bisect_left(self._sorted_tokens, term)
+        end = bisect.bisect_left(self._sorted_tokens, term + "\U0010ffff", start)
+        found = [self.postings[t] for t in self._sorted_tokens[start:end]]
+        if len(found) == 1:
+            return found[0]
+        return set().union(*found)
+
+    def search(self, query: str) -> Optional[Set[str]]:
+        """Адреса, подходящие под запрос; None - подходят все"""
+        terms = _WORD.findall(str(query).casefold())
+        if not terms:
+            self._last_terms = self._last_matches = None
+            return None
+
+        last = self._last_terms
+        if last is not None and self._narrows(last, terms):
+            # Сужаем прошлый результат только по изменившимся словам
+            changed = [n for i, n in enumerate(terms) if i >= len(last) or n != last[i]]
+            matches = set(self._last_matches)
+        else:
+            changed = terms
+            matches = None
+        for term in sorted(changed, key=len, reverse=True):
+            found = self._prefix_lookup(term)
+            matches = set(found) if matches is None else matches & found
+
+        self._last_terms = terms
+        self._last_matches = matches
+        return matches
+
+    @staticmethod
+    def _narrows(old: List[str], new: List[str]) -> bool:
+        """Новый запрос не шире старого: каждое старое слово - префикс нового"""
+        if len(new) < len(old):
+            return False
+        return all(n.startswith(o) for o, n in zip(old, new))
+
+    # --- сортировка ---
+
+    def sorted_addresses(self, column: str) -> List[str]:
+        if column not in self._sorted:
+            keys = self.keys[column]
+            self._sorted[column] = sorted(self.rows, key=keys.__getitem__)
+        return self._sorted[column]
+
+    def view(self, query: str = "", column: Optional[str] = None,
+             reverse: bool = False) -> List[str]:
+        """Порядок строк для показа: фильтр по запросу + сортировка"""
+        matches = self.search(query)
+        if column is None:
+            order = list(self.rows)
+            if matches is not None:
+                order = [a for a in order if a in matches]
+        elif matches is not None and len(matches) * 8 < len(self.rows):
+            order = sorted(matches, key=self.keys[column].__getitem__)
+        else:
+            order = self.sorted_addresses(column)
+            order = [a for a in order if a in matches] if matches is not None else list(order)
+        if reverse:
+            order.reverse()
+        return order
@@ -0,0 +1,388 @@
+"""Модель списка серверов с точечным обновлением Treeview"""
+import bisect
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# С какого числа строк в Treeview держатся только видимые строки
+VIRTUAL_THRESHOLD = 3000
+DEFAULT_ROW_HEIGHT = 20
+ADDRESS_COLUMN = 4
+
+
+def _longest_increasing(values: Sequence[int]) -> Set[int]:
+    """Значения наибольшей возрастающей подпоследовательности, O(n log n)"""
+    tails: List[int] = []           # индекс последнего элемента цепочки длины k + 1
+    tail_values: List[int] = []
+    prev = [-1] * len(values)
+    for i, value in enumerate(values):
+        k = bisect.bisect_left(tail_values, value)
+        if k:
+            prev[i] = tails[k - 1]
+        if k == len(tails):
+            tails.append(i)
+            tail_values.append(value)
+        else:
+            tails[k] = i
+            tail_values[k] = value
+    result = set()
+    i = tails[-1] if tails else -1
+    while i >= 0:
+        result.add(values[i])
+        i = prev[i]
+    return result
+
+
+class ServerTable:
+    """Все строки серверов в памяти + индекс адрес -> элемент Treeview.
+
+    Изменения применяются к Treeview как разница: новые строки вставляются,
+    изменённые обновляются, пропавшие удаляются одним вызовом. Когда строк
+    больше virtual_threshold, в Treeview остаётся только окно видимых строк,
+    элементы которого переиспользуются при прокрутке, а полосой прокрутки
+    управляет модель. on_view_change() вызывается, когда мог смениться
+    набор видимых строк: прокрутка, размер окна, фильтр.
+    """
+
+    def __init__(self, tree, scrollbar=None,
+                 virtual_threshold: int = VIRTUAL_THRESHOLD,
+                 row_height: int = DEFAULT_ROW_HEIGHT):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.virtual_threshold = virtual_threshold
+        self.row_height = row_height
+
+        self.records: Dict[str, tuple] = {}
+        self.tags: Dict[str, tuple] = {}
+        # Порядок отображаемых адресов (после фильтра и сортировки)
+        self.order: List[str] = []
+        self.items: Dict[str, str] = {}
+
+        self.virtual = False
+        self.first = 0
+        self.slots: List[str] = []
+        self.slot_rows: List[Optional[Tuple[str, tuple, tuple]]] = []
+        self.selected_address: Optional[str] = None
+        self.on_view_change: Optional[Callable[[], None]] = None
+
+        tree.bind("<<TreeviewSelect>>", self._on_select, add="+")
+        tree.bind("<Configure>", self._on_configure, add="+")
+        tree.bind("<MouseWheel>", self._on_wheel, add="+")
+        tree.bind("<Button-4>", self._on_wheel, add="+")
+        tree.bind("<Button-5>", self._on_wheel, add="+")
+        tree.bind("<Up>", self._on_key, add="+")
+        tree.bind("<Down>", self._on_key, add="+")
+        tree.bind("<Prior>", self._on_key, add="+")
+        tree.bind("<Next>", self._on_key, add="+")
+        if scrollbar is not None:
+            scrollbar.configure(command=self.yview)
+            tree.configure(yscrollcommand=self._on_tree_scroll)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, address):
+        return address in self.records
+
+    def get(self, address: str) -> Optional[tuple]:
+        return self.records.get(address)
+
+    # --- изменение данных ---
+
+    def replace(self, rows: Iterable[Tuple[Sequence, Sequence]]):
+        """Полная замена содержимого: rows - пары (values, tags)"""
+        new_records = {}
+        new_tags = {}
+        for values, tags in rows:
+            address = str(values[ADDRESS_COLUMN])
+            if address not in new_records:
+                new_records[address] = tuple(values)
+                new_tags[address] = tuple(tags)
+
+        added = [a for a in new_records if a not in self.records]
+        self.remove([a for a in self.records if a not in new_records])
+        for address, values in new_records.items():
+            self._store(address, values, new_tags[address])
+        self.order = list(new_records)
+        self._check_mode()
+        if not self.virtual:
+            for address in added:
+                if address not in self.items:
+                    self.items[address] = self.tree.insert(
+                        "", "end", values=self.records[address], tags=self.tags[address])
+        self.set_order(self.order)
+
+    def upsert(self, values: Sequence, tags: Optional[Sequence] = None):
+        """Вставка новой строки в конец или обновление существующей"""
+        self.upsert_many([(values, tags)])
+
+    def upsert_many(self, rows: Iterable[Tuple[Sequence, Optional[Sequence]]]):
+        added = []
+        for values, tags in rows:
+            address = str(values[ADDRESS_COLUMN])
+            if address not in self.records:
+                added.append(address)
+            self._store(address, tuple(values),
+                        self.tags.get(address, ()) if tags is None else tuple(tags))
+        if added:
+            self.order.extend(added)
+            if not self.virtual:
+                for address in added:
+                    self.items[address] = self.tree.insert(
+                        "", "end", values=self.records[address], tags=self.tags[address])
+        self._check_mode()
+        if self.virtual:
+            self._redraw()
+
+    def update(self, address: str, values: Sequence):
+        """Обновление ячеек известной строки, неизвестные адреса игнорируются"""
+        if address in self.records:
+            self.upsert(values)
+
+    def remove(self, addresses: Iterable[str]):
+        gone = {a for a in addresses if a in self.records}
+        if not gone:
+            return
+        for address in gone:
+            del self.records[address]
+            del self.tags[address]
+        self.order = [a for a in self.order if a not in gone]
+        items = [self.items.pop(a) for a in gone if a in self.items]
+        if items:
+            self.tree.delete(*items)
+        self._check_mode()
+        if self.virtual:
+            self._redraw()
+
+    def set_order(self, order: List[str]):
+        """Новый порядок/набор видимых строк (например, после фильтра)"""
+        self.order = [a for a in order if a in self.records]
+        self._check_mode()
+        self._view_changed()
+        if self.virtual:
+            self.first = min(self.first, self._max_first())
+            self._redraw()
+            return
+
+        # Скрываем лишние. Строки, которые уже идут в нужном порядке (наибольшая
+        # возрастающая подпоследовательность), остаются на месте; остальные
+        # отцепляются и вставляются на свои места одним проходом
+        position = {a: i for i, a in enumerate(self.order)}
+        hidden = [self.items[a] for a in self.items if a not in position]
+        if hidden:
+            self.tree.detach(*hidden)
+        by_item = {i: a for a, i in self.items.items()}
+        current = [position[by_item[i]] for i in self.tree.get_children("")]
+        stable = _longest_increasing(current)
+        moving = [self.items[self.order[i]] for i in current if i not in stable]
+        if moving:
+            self.tree.detach(*moving)
+        for index, address in enumerate(self.order):
+            if index not in stable:
+                self.tree.move(self.items[address], "", index)
+
+    def _store(self, address: str, values: tuple, tags: tuple):
+        if self.records.get(address) == values and self.tags.get(address) == tags:
+            return
+        self.records[address] = values
+        self.tags[address] = tags
+        item = self.items.get(address)
+        if item is not None:
+            self.tree.item(item, values=values, tags=tags)
+
+    # --- выбор строки ---
+
+    def selected(self) -> Optional[tuple]:
+        """Значения выбранной строки (по адресу, а не по элементу Tk)"""
+        if self.selected_address in self.records:
+            return self.records[self.selected_address]
+        return None
+
+    def _on_select(self, event=None):
+        # Пустое выделение бывает, когда выбранная строка ушла из окна
+        selection = self.tree.selection()
+        if not selection:
+            return
+        item = selection[0]
+        if self.virtual:
+            if item in self.slots:
+                row = self.slot_rows[self.slots.index(item)]
+                self.selected_address = row[0] if row else None
+        else:
+            values = self.tree.item(item, "values")
+            self.selected_address = str(values[ADDRESS_COLUMN]) if values else None
+
+    def address_at(self, y: int) -> Optional[str]:
+        """Адрес строки под указателем мыши"""
+        item = self.tree.identify_row(y)
+        if not item:
+            return None
+        if self.virtual:
+            row = self.slot_rows[self.slots.index(item)] if item in self.slots else None
+            return row[0] if row else None
+        values = self.tree.item(item, "values")
+        return str(values[ADDRESS_COLUMN]) if values else None
+
+    # --- виртуальный режим ---
+
+    def _check_mode(self):
+        virtual = len(self.records) > self.virtual_threshold
+        if virtual == self.virtual:
+            return
+        self.virtual = virtual
+        if virtual:
+            if self.items:
+                self.tree.delete(*self.items.values())
+            self.items = {}
+            self.first = 0
+            self._resize_slots()
+        else:
+            if self.slots:
+                self.tree.delete(*self.slots)
+            self.slots = []
+            self.slot_rows = []
+            visible = set(self.order)
+            for address in self.order + [a for a in self.records if a not in visible]:
+                self.items[address] = self.tree.insert(
+                    "", "end", values=self.records[address], tags=self.tags[address])
+            hidden = [self.items[a] for a in self.records if a not in visible]
+            if hidden:
+                self.tree.detach(*hidden)
+
+    def _page_size(self) -> int:
+        height = self.tree.winfo_height()
+        # До первой отрисовки высота равна 1, берём высоту из настроек
+        if height <= 1:
+            return max(int(str(self.tree.cget("height") or 10)), 1)
+        return max(height // self.row_height, 1)
+
+    def _resize_slots(self):
+        # +1 строка запаса под частично видимую нижнюю строку
+        count = self._page_size() + 1
+        while len(self.slots) < count:
+            self.slots.append(self.tree.insert("", "end", values=()))
+            self.slot_rows.append(None)
+        if len(self.slots) > count:
+            self.tree.delete(*self.slots[count:])
+            del self.slots[count:]
+            del self.slot_rows[count:]
+        self.first = min(self.first, self._max_first())
+        self._redraw()
+        self._view_changed()
+
+    def _max_first(self) -> int:
+        return max(len(self.order) - self._page_size(), 0)
+
+    def _redraw(self):
+        """Переписывает значения слотов, трогая только изменившиеся"""
+        focus_slot = ""
+        for index, slot in enumerate(self.slots):
+            position = self.first + index
+            if position < len(self.order):
+                address = self.order[position]
+                row = (address, self.records[address], self.tags[address])
+                if address == self.selected_address:
+                    focus_slot = slot
+            else:
+                row = None
+            if self.slot_rows[index] == row:
+                continue
+            self.slot_rows[index] = row
+            if row is None:
+                self.tree.item(slot, values=(), tags=())
+            else:
+                self.tree.item(slot, values=row[1], tags=row[2])
+
+        if focus_slot:
+            self.tree.selection_set(focus_slot)
+            self.tree.focus(focus_slot)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+        self._update_scrollbar()
+
+    def visible(self) -> List[str]:
+        """Адреса строк, которые сейчас в окне списка"""
+        if self.virtual:
+            return self.order[self.first:self.first + self._page_size() + 1]
+        top, bottom = self.tree.yview()
+        total = len(self.order)
+        return self.order[int(top * total):math.ceil(bottom * total)]
+
+    def _update_scrollbar(self):
+        if self.scrollbar is None:
+            return
+        total = len(self.order)
+        if not total:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        page = self._page_size()
+        self.scrollbar.set(self.first / total, min((self.first + page) / total, 1.0))
+
+    def scroll_to(self, first: int):
+        first = max(0, min(first, self._max_first()))
+        if first != self.first:
+            self.first = first
+            self._redraw()
+            self._view_changed()
+
+    def _view_changed(self):
+        if self.on_view_change is not None:
+            self.on_view_change()
+
+    def yview(self, *args):
+        """Обработчик команды полосы прокрутки"""
+        if not self.virtual:
+            return self.tree.yview(*args)
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self.order)))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= self._page_size()
+            self.scroll_to(self.first + step)
+
+    def _on_tree_scroll(self, first, last):
+        if not self.virtual and self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+            # Treeview сам прокрутился или изменился по высоте
+            self._view_changed()
+
+    def _on_configure(self, event=None):
+        if self.virtual:
+            self._resize_slots()
+
+    def _on_wheel(self, event):
+        if not self.virtual:
+            return None
+        if event.num == 4:
+            step = -3
+        elif event.num == 5:
+            step = 3
+        else:
+            step = -3 if event.delta > 0 else 3
+        self.scroll_to(self.first + step)
+        return "break"
+
+    def _on_key(self, event):
+        if not self.virtual or not self.slots:
+            return None
+        page = self._page_size()
+        focus = self.tree.focus()
+        index = self.slots.index(focus) if focus in self.slots else 0
+        if event.keysym == "Up" and index == 0:
+            self._move_selection(self.first - 1, 0)
+        elif event.keysym == "Down" and index >= page - 1:
+            self._move_selection(self.first + 1, page - 1)
+        elif event.keysym == "Prior":
+            self._move_selection(self.first - page, index)
+        elif event.keysym == "Next":
+            self._move_selection(self.first + page, index)
+        else:
+            return None
+        return "break"
+
+    def _move_selection(self, first: int, index: int):
+        self.scroll_to(first)
+        position = min(self.first + index, len(self.order) - 1)
+        if position >= 0:
+            self.selected_address = self.order[position]
+            self._redraw()
@@ -0,0 +1,164 @@
+"""Индекс библиотек Steam с кэшем на диске"""
+import json
+import os
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+import vdf
+
+GMOD_APPID = "4000"
+INDEX_CACHE_FILE = "steam_library_cache.json"
+INDEX_VERSION = 1
+
+
+class AppInstall(NamedTuple):
+    appid: str
+    library: str
+    installdir: str
+    size: int
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.library, "steamapps", "common", self.installdir)
+
+
+def _stat_key(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def read_manifest(library: str, appid: str) -> Optional[AppInstall]:
+    """Данные appmanifest_<appid>.acf из библиотеки, если он есть"""
+    path = os.path.join(library, "steamapps", f"appmanifest_{appid}.acf")
+    try:
+        state = vdf.get_ci(vdf.load(path), "AppState", {})
+    except (OSError, vdf.VdfError):
+        return None
+    installdir = vdf.get_ci(state, "installdir")
+    if not installdir:
+        return None
+    try:
+        size = int(vdf.get_ci(state, "SizeOnDisk", 0))
+    except ValueError:
+        size = 0
+    return AppInstall(appid, library, installdir, size)
+
+
+def build_index(steam_path: str) -> Dict:
+    """Разбор libraryfolders.vdf и манифестов приложений во всех библиотеках"""
+    libraries: Dict[str, Dict[str, int]] = {os.path.normpath(steam_path): {}}
+    folders_path = os.path.join(steam_path, "steamapps", "libraryfolders.vdf")
+    try:
+        root = vdf.load(folders_path)
+    except (OSError, vdf.VdfError) as e:
+        print(f"Ошибка чтения libraryfolders.vdf: {e}")
+        root = {}
+    folders = vdf.get_ci(root, "libraryfolders") or vdf.get_ci(root, "LibraryFolders") or {}
+
+    for key, value in folders.items():
+        if not key.isdigit():
+            continue
+        # Старый формат: "1" "D:\\SteamLibrary"; новый: "1" { "path" ... "apps" {...} }
+        if isinstance(value, str):
+            libraries.setdefault(os.path.normpath(value), {})
+            continue
+        path = vdf.get_ci(value, "path")
+        if not path:
+            continue
+        apps = libraries.setdefault(os.path.normpath(path), {})
+        for appid, size in (vdf.get_ci(value, "apps") or {}).items():
+            try:
+                apps[appid] = int(size)
+            except (TypeError, ValueError):
+                apps[appid] = 0
+
+    index_apps: Dict[str, Dict] = {}
+    for library, apps in libraries.items():
+        # Без карты apps (старый формат) остаётся только проверить манифест
+        candidates = apps if apps else [GMOD_APPID]
+        for appid in candidates:
+            if appid in index_apps:
+                continue
+            install = read_manifest(library, appid)
+            if install:
+                index_apps[appid] = install._asdict()
+
+    return {
+        "libraries": [{"path": p, "apps": a} for p, a in libraries.items()],
+        "apps": index_apps,
+    }
+
+
+class SteamLibraryIndex:
+    """Индекс "appid -> установка", пересобираемый только при изменении
+    libraryfolders.vdf (ключ кэша - mtime и размер файла)."""
+
+    def __init__(self, cache_path: str = INDEX_CACHE_FILE):
+        self.cache_path = cache_path
+        self._cache: Optional[Dict] = None
+        # Путь Steam -> ключ vdf, для которого индекс собран заново в этом процессе
+        self._built: Dict[str, Optional[List[int]]] = {}
+        self._lock = threading.Lock()
+
+    def _load_cache(self) -> Dict:
+        if self._cache is None:
+            try:
+                with open(self.cache_path, "r", encoding="utf-8") as f:
+                    self._cache = json.load(f)
+                if self._cache.get("version") != INDEX_VERSION:
+                    self._cache = {}
+            except (OSError, ValueError):
+                self._cache = {}
+            self._cache.setdefault("version", INDEX_VERSION)
+            self._cache.setdefault("steam", {})
+        return self._cache
+
+    def _save_cache(self):
+        tmp_path = self.cache_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._cache, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Ошибка сохранения индекса библиотек: {e}")
+
+    def get(self, steam_path: str) -> Dict:
+        """Индекс для установки Steam: из кэша или заново"""
+        folders_path = os.path.join(steam_path, "steamapps", "libraryfolders.vdf")
+        key = _stat_key(folders_path)
+        with self._lock:
+            cache = self._load_cache()
+            entry = cache["steam"].get(os.path.normpath(steam_path))
+            if entry and key is not None and entry.get("key") == key:
+                return entry["index"]
+
+            index = build_index(steam_path)
+            cache["steam"][os.path.normpath(steam_path)] = {"key": key, "index": index}
+            self._built[os.path.normpath(steam_path)] = key
+            self._save_cache()
+            return index
+
+    def find_app(self, steam_path: str, appid: str = GMOD_APPID) -> Optional[AppInstall]:
+        app = self.get(steam_path)["apps"].get(appid)
+        return AppInstall(**app) if app else None
+
+    def refresh(self, steam_path: str) -> bool:
+        """Сбросить индекс из кэша; False - он уже собран заново для текущего vdf"""
+        key = _stat_key(os.path.join(steam_path, "steamapps", "libraryfolders.vdf"))
+        with self._lock:
+            built = self._built.get(os.path.normpath(steam_path), False)
+        if key is not None and built == key:
+            return False
+        self.invalidate(steam_path)
+        return True
+
+    def invalidate(self, steam_path: Optional[str] = None):
+        with self._lock:
+            cache = self._load_cache()
+            if steam_path is None:
+                cache["steam"].clear()
+            else:
+                cache["steam"].pop(os.path.normpath(steam_path), None)
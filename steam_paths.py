@@ -0,0 +1,221 @@
+"""Поиск Steam и Garry's Mod на Windows, Linux и macOS"""
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Переменная окружения с явным путём к Steam (важнее любых других источников)
+STEAM_PATH_ENV = "GMOD_LAUNCHER_STEAM"
+PROBE_TIMEOUT = 2.0
+
+if sys.platform == "win32":
+    GMOD_BINARIES: Tuple[str, ...] = ("gmod.exe",)
+elif sys.platform == "darwin":
+    GMOD_BINARIES = ("hl2_osx", "gmod")
+else:
+    GMOD_BINARIES = ("hl2_linux", "gmod")
+
+
+def is_gmod_binary(path: str) -> bool:
+    return os.path.basename(path).lower() in GMOD_BINARIES
+
+
+def find_gmod_binary(game_dir: str) -> Optional[str]:
+    """Исполняемый файл игры в папке GarrysMod для текущей ОС"""
+    for name in GMOD_BINARIES:
+        path = os.path.join(game_dir, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def is_steam_dir(path: str) -> bool:
+    return os.path.isdir(os.path.join(path, "steamapps"))
+
+
+class PathBackend:
+    """Источник кандидатов в пути к Steam"""
+    name = "base"
+
+    def candidates(self) -> List[str]:
+        return []
+
+
+class OverrideBackend(PathBackend):
+    """Явно заданные пути: переменная окружения и настройки лаунчера"""
+    name = "override"
+
+    def __init__(self, paths: Sequence[str] = ()):
+        self.paths = list(paths)
+
+    def candidates(self) -> List[str]:
+        env = os.environ.get(STEAM_PATH_ENV)
+        return ([env] if env else []) + [p for p in self.paths if p]
+
+
+class RegistryBackend(PathBackend):
+    """Реестр Windows; winreg импортируется только здесь"""
+    name = "registry"
+
+    KEYS = (
+        ("HKEY_LOCAL_MACHINE", "SOFTWARE\\WOW6432Node\\Valve\\Steam", "InstallPath"),
+        ("HKEY_LOCAL_MACHINE", "SOFTWARE\\Valve\\Steam", "InstallPath"),
+        ("HKEY_CURRENT_USER", "Software\\Valve\\Steam", "SteamPath"),
+    )
+
+    def candidates(self) -> List[str]:
+        if sys.platform != "win32":
+            return []
+        try:
+            import winreg
+        except ImportError:
+            return []
+        paths = []
+        for hive, subkey, value in self.KEYS:
+            try:
+                with winreg.OpenKey(getattr(winreg, hive), subkey) as key:
+                    paths.append(os.path.normpath(winreg.QueryValueEx(key, value)[0]))
+            except OSError:
+                continue
+        return paths
+
+
+class WindowsDefaultsBackend(PathBackend):
+    name = "windows"
+
+    def candidates(self) -> List[str]:
+        if sys.platform != "win32":
+            return []
+        paths = []
+        for env in ("ProgramFiles(x86)", "ProgramFiles"):
+            if os.getenv(env):
+                paths.append(os.path.join(os.getenv(env), "Steam"))
+        paths.append(os.path.join(os.path.expanduser("~"), "Steam"))
+        paths += ["C:\\Steam", "D:\\Steam"]
+        return paths
+
+
+class LinuxBackend(PathBackend):
+    """Linux (обычная установка, Flatpak, Snap) и macOS"""
+    name = "linux"
+
+    def candidates(self) -> List[str]:
+        if sys.platform == "win32":
+            return []
+        home = os.path.expanduser("~")
+        data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(home, ".local", "share")
+        return [
+            os.path.join(home, ".steam", "steam"),
+            os.path.join(home, ".steam", "root"),
+            os.path.join(data_home, "Steam"),
+            os.path.join(home, ".var", "app", "com.valvesoftware.Steam", ".local", "share", "Steam"),
+            os.path.join(home, "snap", "steam", "common", ".local", "share", "Steam"),
+            os.path.join(home, "Library", "Application Support", "Steam"),
+        ]
+
+
+def probe_first(candidates: Sequence[str], check: Callable[[str], bool],
+                timeout: float = PROBE_TIMEOUT) -> Optional[str]:
+    """Первый по приоритету кандидат, прошедший check.
+
+    Все проверки идут одновременно в фоновых потоках, так что медленный
+    или отключённый сетевой диск не задерживает остальные. Если время
+    вышло, берётся лучший из уже подтверждённых кандидатов.
+    """
+    results: Dict[int, bool] = {}
+    cond = threading.Condition()
+
+    def run(index: int, path: str):
+        try:
+            ok = check(path)
+        except OSError:
+            ok = False
+        with cond:
+            results[index] = ok
+            cond.notify_all()
+
+    for index, path in enumerate(candidates):
+        threading.Thread(target=run, args=(index, path), daemon=True).start()
+
+    deadline = time.monotonic() + timeout
+    with cond:
+        while True:
+            # Ответ готов, когда все более приоритетные кандидаты уже отпали
+            for index, path in enumerate(candidates):
+                if index not in results:
+                    break
+                if results[index]:
+                    return path
+            else:
+                return None
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                for index, path in enumerate(candidates):
+                    if results.get(index):
+                        return path
+                return None
+            cond.wait(remaining)
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class SteamPathResolver:
+    """Поиск Steam по всем источникам с запоминанием результата.
+
+    Найденный путь переиспользуется, пока не изменилось mtime папки Steam.
+    """
+
+    def __init__(self, overrides: Sequence[str] = ()):
+        self.overrides = OverrideBackend(overrides)
+        self.backends: List[PathBackend] = [
+            self.overrides, RegistryBackend(), WindowsDefaultsBackend(), LinuxBackend()]
+        self._memo: Optional[Tuple[str, Optional[int]]] = None
+        self._lock = threading.Lock()
+
+    def set_overrides(self, paths: Sequence[str]):
+        self.overrides.paths = list(paths)
+        self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self._memo = None
+
+    def candidates(self) -> List[str]:
+        seen = []
+        for backend in self.backends:
+            try:
+                paths = backend.candidates()
+            except Exception as e:
+                print(f"Ошибка источника путей {backend.name}: {e}")
+                continue
+            for path in paths:
+                if path not in seen:
+                    seen.append(path)
+        return seen
+
+    def steam_path(self) -> Optional[str]:
+        with self._lock:
+            if self._memo is not None:
+                path, mtime = self._memo
+                if _mtime(path) == mtime and mtime is not None:
+                    return path
+            path = probe_first(self.candidates(), is_steam_dir)
+            self._memo = (path, _mtime(path)) if path else None
+            return path
+
+
+def open_folder(path: str):
+    """Открыть папку в файловом менеджере системы"""
+    if sys.platform == "win32":
+        os.startfile(path)
+    elif sys.platform == "darwin":
+        subprocess.Popen(["open", path])
+    else:
+        subprocess.Popen(["xdg-open", path])
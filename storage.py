@@ -0,0 +1,148 @@
+"""Хранилище данных лаунчера: снимок JSON + журнал изменений"""
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+DATA_FILE = "launcher_data.json"
+JOURNAL_SUFFIX = ".log"
+
+# Разделы, где хранятся строки серверов; ключ - адрес (5-я колонка)
+ROW_SECTIONS = ("favorites", "custom_servers", "history")
+ADDRESS_COLUMN = 4
+
+HISTORY_LIMIT = 500
+# После стольких записей в журнале он сворачивается в новый снимок
+COMPACT_AFTER = 200
+
+
+class LauncherStore:
+    """Разделы "ключ -> значение" в памяти с журналом изменений на диске.
+
+    Каждое изменение дописывается строкой в журнал (flush), а не
+    переписывает весь файл. Снимок launcher_data.json обновляется
+    атомарно через временный файл при сворачивании журнала (compact).
+    Старый формат файла со списками строк читается как есть.
+    """
+
+    def __init__(self, path: str = DATA_FILE, history_limit: int = HISTORY_LIMIT,
+                 compact_after: int = COMPACT_AFTER):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.history_limit = history_limit
+        self.compact_after = compact_after
+        self.sections: Dict[str, "OrderedDict[str, Any]"] = {
+            name: OrderedDict() for name in ROW_SECTIONS}
+        self.pending: List[list] = []
+        self.journal_ops = 0
+
+    @property
+    def favorites(self) -> "OrderedDict[str, Any]":
+        return self.sections["favorites"]
+
+    @property
+    def custom_servers(self) -> "OrderedDict[str, Any]":
+        return self.sections["custom_servers"]
+
+    @property
+    def history(self) -> "OrderedDict[str, Any]":
+        return self.sections["history"]
+
+    def section(self, name: str) -> "OrderedDict[str, Any]":
+        if name not in self.sections:
+            self.sections[name] = OrderedDict()
+        return self.sections[name]
+
+    def get(self, section: str, key: str, default=None):
+        return self.sections.get(section, {}).get(key, default)
+
+    # --- изменения ---
+
+    def put(self, section: str, key: str, value):
+        """Запись значения; ключ переезжает в конец (самый свежий)"""
+        self._apply(["set", section, key, value])
+        self.pending.append(["set", section, key, value])
+        if section == "history":
+            history = self.history
+            while len(history) > self.history_limit:
+                oldest = next(iter(history))
+                self.delete("history", oldest)
+
+    def delete(self, section: str, key: str):
+        if key in self.sections.get(section, {}):
+            self._apply(["del", section, key])
+            self.pending.append(["del", section, key])
+
+    def _apply(self, op: list):
+        section = self.section(op[1])
+        if op[0] == "set":
+            section[op[2]] = op[3]
+            section.move_to_end(op[2])
+        elif op[0] == "del":
+            section.pop(op[2], None)
+
+    # --- диск ---
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for name, content in data.items():
+                section = self.section(name)
+                section.clear()
+                if name in ROW_SECTIONS:
+                    for row in content:
+                        section[str(row[ADDRESS_COLUMN])] = row
+                else:
+                    section.update(content)
+
+        self.journal_ops = 0
+        if os.path.exists(self.journal_path):
+            valid = 0
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    try:
+                        op = json.loads(line.decode("utf-8"))
+                    except ValueError:
+                        break
+                    self._apply(op)
+                    self.journal_ops += 1
+                    valid += len(line)
+                size = f.seek(0, os.SEEK_END)
+            # Недописанный хвост после сбоя отрезаем, чтобы новые записи не склеились с ним
+            if valid < size:
+                with open(self.journal_path, "r+b") as f:
+                    f.truncate(valid)
+
+    def flush(self):
+        """Дописать накопленные изменения в журнал"""
+        if not self.pending:
+            return
+        lines = "".join(json.dumps(op, ensure_ascii=False) + "\n" for op in self.pending)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        self.journal_ops += len(self.pending)
+        self.pending = []
+        if self.journal_ops >= self.compact_after:
+            self.compact()
+
+    def compact(self):
+        """Новый снимок атомарно заменяет старый, журнал удаляется"""
+        if not self.pending and not self.journal_ops:
+            return
+        data = {}
+        for name, section in self.sections.items():
+            data[name] = list(section.values()) if name in ROW_SECTIONS else dict(section)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        # Если упадём здесь, журнал просто применится к снимку повторно
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.journal_ops = 0
+        self.pending = []
@@ -0,0 +1,136 @@
+"""Наблюдение за запущенными копиями игры без периодического опроса"""
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+HISTORY_LIMIT = 100
+
+
+class GameSession(NamedTuple):
+    pid: int
+    args: List[str]
+    started: float
+    ended: Optional[float] = None
+    exit_code: Optional[int] = None
+    peak_rss: Optional[int] = None      # байты, если ОС сообщает
+
+    @property
+    def runtime(self) -> float:
+        return (self.ended or time.time()) - self.started
+
+
+def _windows_peak_rss(process: subprocess.Popen) -> Optional[int]:
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    handle = wintypes.HANDLE(int(process._handle))
+    if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+        return counters.PeakWorkingSetSize
+    return None
+
+
+def wait_process(process: subprocess.Popen) -> Tuple[int, Optional[int]]:
+    """Блокирующее ожидание выхода: (код завершения, пиковый RSS в байтах).
+
+    На Unix процесс забирается через wait4, который заодно отдаёт ru_maxrss;
+    поток спит в ядре и не просыпается до выхода игры.
+    """
+    if hasattr(os, "wait4"):
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        except ChildProcessError:
+            # Процесс уже забрал кто-то другой
+            return process.wait(), None
+        process.returncode = os.waitstatus_to_exitcode(status)
+        # Linux считает ru_maxrss в килобайтах, macOS - в байтах
+        scale = 1 if sys.platform == "darwin" else 1024
+        return process.returncode, usage.ru_maxrss * scale
+
+    exit_code = process.wait()
+    try:
+        peak = _windows_peak_rss(process) if sys.platform == "win32" else None
+    except (OSError, AttributeError, ValueError):
+        peak = None
+    return exit_code, peak
+
+
+def game_running(binary: str) -> bool:
+    """Работает ли игра из папки binary, в том числе запущенная другим процессом
+    (например, окном лаунчера, пока работает CLI)"""
+    game_dir = os.path.dirname(os.path.realpath(binary))
+    try:
+        if sys.platform == "win32":
+            name = os.path.basename(binary)
+            result = subprocess.run(["tasklist", "/FI", f"IMAGENAME eq {name}", "/NH", "/FO", "CSV"],
+                                    capture_output=True, text=True, timeout=10)
+            return f'"{name.lower()}"' in result.stdout.lower()
+        if os.path.isdir("/proc"):
+            # Скрипт запуска подменяет себя на hl2_linux из той же папки
+            prefix = os.path.join(game_dir, "")
+            for pid in os.listdir("/proc"):
+                if pid.isdigit():
+                    try:
+                        if os.readlink(f"/proc/{pid}/exe").startswith(prefix):
+                            return True
+                    except OSError:
+                        continue
+            return False
+        return subprocess.run(["pgrep", "-f", game_dir], capture_output=True, timeout=10).returncode == 0
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"Ошибка проверки запущенной игры: {e}")
+        return False
+
+
+class ProcessSupervisor:
+    """Запуск копий игры и ожидание их выхода в фоновых потоках.
+
+    on_exit(session) вызывается из потока ожидания сразу после выхода
+    процесса. Одновременно может работать несколько копий.
+    """
+
+    def __init__(self, on_exit: Callable[[GameSession], None], history_limit: int = HISTORY_LIMIT):
+        self.on_exit = on_exit
+        self.running: Dict[int, GameSession] = {}
+        self.history: "deque[GameSession]" = deque(maxlen=history_limit)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.running)
+
+    def launch(self, args: Sequence[str], **popen_kwargs) -> GameSession:
+        process = subprocess.Popen(list(args), **popen_kwargs)
+        session = GameSession(process.pid, list(args), time.time())
+        with self._lock:
+            self.running[process.pid] = session
+        threading.Thread(target=self._wait, args=(process, session),
+                         name=f"game-{process.pid}", daemon=True).start()
+        return session
+
+    def _wait(self, process: subprocess.Popen, session: GameSession):
+        exit_code, peak_rss = wait_process(process)
+        finished = session._replace(ended=time.time(), exit_code=exit_code, peak_rss=peak_rss)
+        with self._lock:
+            self.running.pop(session.pid, None)
+            self.history.append(finished)
+        try:
+            self.on_exit(finished)
+        except Exception as e:
+            print(f"Ошибка обработки выхода игры: {e}")
+
+    def sessions(self) -> List[GameSession]:
+        """Работающие копии, затем завершённые (новые в конце)"""
+        with self._lock:
+            return list(self.running.values()) + list(self.history)
@@ -0,0 +1,85 @@
+"""Разбор текстового формата KeyValues (VDF/ACF) Steam"""
+import re
+from typing import Dict, Union
+
+VdfDict = Dict[str, Union[str, "VdfDict"]]
+
+# Пробелы пропускаются поиском, комментарии и условия вида [$WIN32] дают
+# пустой кортеж, последняя группа ловит мусор (например, незакрытую кавычку)
+_TOKEN = re.compile(r'''
+      ("(?:[^"\\]|\\.)*")
+    | ([{}])
+    | //[^\n]*
+    | \[[^\]\n]*\]
+    | ([^\s{}"]+)
+    | (\S)
+''', re.VERBOSE | re.DOTALL)
+
+_ESCAPES = {"n": "\n", "t": "\t", "\\": "\\", '"': '"'}
+_ESCAPE = re.compile(r"\\(.)", re.DOTALL)
+
+
+class VdfError(ValueError):
+    """Нарушена структура файла"""
+
+
+def _unescape(text: str) -> str:
+    if "\\" not in text:
+        return text
+    return _ESCAPE.sub(lambda m: _ESCAPES.get(m.group(1), "\\" + m.group(1)), text)
+
+
+def loads(text: str) -> VdfDict:
+    """Разбор VDF во вложенные словари (повторный ключ перезаписывает прежний)"""
+    root: VdfDict = {}
+    stack = [root]
+    current = root
+    key = None
+    for quoted, brace, bare, junk in _TOKEN.findall(text):
+        if quoted:
+            value = _unescape(quoted[1:-1])
+        elif bare:
+            value = bare
+        elif brace == "{":
+            if key is None:
+                raise VdfError("Блок без имени")
+            child: VdfDict = {}
+            current[key] = child
+            stack.append(child)
+            current = child
+            key = None
+            continue
+        elif brace == "}":
+            if len(stack) == 1 or key is not None:
+                raise VdfError("Лишняя закрывающая скобка")
+            stack.pop()
+            current = stack[-1]
+            continue
+        elif junk:
+            raise VdfError(f"Неожиданный символ {junk!r}")
+        else:
+            continue
+        if key is None:
+            key = value
+        else:
+            current[key] = value
+            key = None
+    if len(stack) != 1 or key is not None:
+        raise VdfError("Файл оборвался внутри блока")
+    return root
+
+
+def load(path: str) -> VdfDict:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return loads(f.read())
+
+
+def get_ci(block: VdfDict, key: str, default=None):
+    """Поиск ключа без учёта регистра (Steam пишет ключи по-разному)"""
+    if key in block:
+        return block[key]
+    lowered = key.lower()
+    for name, value in block.items():
+        if name.lower() == lowered:
+            return value
+    return default
@@ -0,0 +1,253 @@
+"""Слежение за папками аддонов: inotify на Linux, опрос mtime в остальных случаях"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+# Пачка изменений отдаётся, когда события стихли на DEBOUNCE секунд,
+# но не позже MAX_DELAY после первого события (долгая синхронизация Workshop)
+DEBOUNCE = 0.5
+MAX_DELAY = 3.0
+POLL_INTERVAL = 2.0
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+_EVENT = struct.Struct("iIII")
+
+
+class WatchError(OSError):
+    """inotify недоступен или кончился лимит наблюдений"""
+
+
+class PollingBackend:
+    """Сравнение снимков mtime/размера верхнего уровня и подпапок раз в interval.
+
+    Файлы подпапки перечитываются, только если сменился mtime самой подпапки.
+    """
+    name = "polling"
+
+    def __init__(self, roots: Iterable[str], interval: float = POLL_INTERVAL):
+        self.roots = list(roots)
+        self.interval = interval
+        self.snapshot = self._snapshot()
+        self.next_poll = time.monotonic() + interval
+
+    def _entry_key(self, entry: os.DirEntry, old: Optional[Tuple]):
+        st = entry.stat()
+        if not entry.is_dir():
+            return st.st_mtime_ns, st.st_size
+        # Пока mtime папки прежний, файлы в ней не перечитываются:
+        # замена .gma через запись рядом и переименование mtime меняет
+        if old is not None and old[0] == st.st_mtime_ns:
+            return old
+        files = []
+        try:
+            with os.scandir(entry.path) as children:
+                for child in children:
+                    if child.is_file():
+                        child_st = child.stat()
+                        files.append((child.name, child_st.st_mtime_ns, child_st.st_size))
+        except OSError:
+            pass
+        return st.st_mtime_ns, tuple(sorted(files))
+
+    def _snapshot(self, old: Optional[Dict[str, Tuple]] = None) -> Dict[str, Tuple]:
+        old = old or {}
+        snapshot = {}
+        for root in self.roots:
+            try:
+                with os.scandir(root) as entries:
+                    for entry in entries:
+                        try:
+                            snapshot[entry.path] = self._entry_key(entry, old.get(entry.path))
+                        except OSError:
+                            continue
+            except OSError:
+                snapshot[root] = None
+        return snapshot
+
+    def wait(self, timeout: float) -> Set[str]:
+        delay = self.next_poll - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            return set()
+        time.sleep(max(delay, 0))
+        self.next_poll = time.monotonic() + self.interval
+
+        old = self.snapshot
+        snapshot = self._snapshot(old)
+        self.snapshot = snapshot
+        # Пропавшая или вновь появившаяся корневая папка попадает в ответ сама
+        return {path for path in snapshot.keys() | old.keys()
+                if snapshot.get(path) != old.get(path)}
+
+    def close(self):
+        pass
+
+
+class InotifyBackend:
+    """inotify через ctypes: корни и их прямые подпапки (папки предметов Workshop)"""
+    name = "inotify"
+
+    def __init__(self, roots: Iterable[str]):
+        if not sys.platform.startswith("linux"):
+            raise WatchError("inotify есть только в Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        try:
+            self._add_watch = libc.inotify_add_watch
+        except AttributeError:
+            raise WatchError("libc без inotify")
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise WatchError(ctypes.get_errno(), "inotify_init1")
+        self.roots = list(roots)
+        # Дескриптор наблюдения -> (папка, корень, которому она принадлежит)
+        self.watches: Dict[int, Tuple[str, str]] = {}
+        try:
+            for root in self.roots:
+                if not os.path.isdir(root):
+                    continue
+                self._watch(root, root)
+                with os.scandir(root) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            self._watch(entry.path, root)
+        except WatchError:
+            self.close()
+            raise
+
+    def _watch(self, path: str, root: str):
+        wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            # Папку удалили между scandir и добавлением - просто пропускаем
+            if errno in (2, 20):
+                return
+            raise WatchError(errno, f"inotify_add_watch {path}: {os.strerror(errno)}")
+        self.watches[wd] = (path, root)
+
+    def wait(self, timeout: float) -> Set[str]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            raw_name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                # События потеряны - только полное пересканирование
+                changed.update(self.roots)
+                continue
+            watch = self.watches.get(wd)
+            if watch is None:
+                continue
+            path, root = watch
+            if mask & IN_IGNORED:
+                del self.watches[wd]
+                continue
+            if path == root:
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    changed.add(root)
+                    continue
+                entry = os.path.join(root, os.fsdecode(raw_name))
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        self._watch(entry, root)
+                    except WatchError as e:
+                        print(f"Ошибка слежения за {entry}: {e}")
+                changed.add(entry)
+            else:
+                changed.add(path)
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class DirectoryWatcher:
+    """Фоновый поток, отдающий изменения пачками в on_change(set путей).
+
+    Путь в пачке - элемент верхнего уровня корня (папка или .gma в addons,
+    папка предмета в Workshop). Если в пачке есть сам корень, события
+    потеряны и нужно пересканировать всё. on_change вызывается в потоке
+    наблюдателя.
+    """
+
+    def __init__(self, roots: Iterable[str], on_change: Callable[[Set[str]], None],
+                 debounce: float = DEBOUNCE, max_delay: float = MAX_DELAY,
+                 poll_interval: float = POLL_INTERVAL):
+        self.roots = [os.path.normpath(root) for root in roots if root]
+        self.on_change = on_change
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.backend = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        try:
+            self.backend = InotifyBackend(self.roots)
+        except (WatchError, OSError) as e:
+            if sys.platform.startswith("linux"):
+                print(f"inotify недоступен, используется опрос: {e}")
+            self.backend = PollingBackend(self.roots, self.poll_interval)
+        self._thread = threading.Thread(target=self._run, name="addon-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        pending: Set[str] = set()
+        first = last = 0.0
+        try:
+            while not self._stop.is_set():
+                timeout = self.debounce if pending else 0.5
+                changed = self.backend.wait(timeout)
+                now = time.monotonic()
+                if changed:
+                    if not pending:
+                        first = now
+                    pending |= changed
+                    last = now
+                if pending and (now - last >= self.debounce or now - first >= self.max_delay):
+                    batch, pending = pending, set()
+                    if self._stop.is_set():
+                        break
+                    try:
+                        self.on_change(batch)
+                    except Exception as e:
+                        print(f"Ошибка обработки изменений аддонов: {e}")
+        finally:
+            self.backend.close()
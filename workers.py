@@ -0,0 +1,159 @@
+"""Фоновые задачи лаунчера с доставкой результатов в цикл Tk"""
+import queue
+import threading
+import time
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+POLL_MS = 30
+# Tcl без потоков: из других потоков Tk не будится, очередь опрашивается всегда
+IDLE_POLL_MS = 250
+# Сколько времени за один тик можно тратить на обработку результатов
+POLL_BUDGET = 0.015
+WAKE_EVENT = "<<TaskRunnerWake>>"
+
+
+class CancelToken:
+    """Флаг отмены, общий для группы фоновых задач"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+
+class TaskRunner:
+    """Пул потоков + очередь результатов, которую опрашивает root.after.
+
+    Колбэки on_done/on_error и всё, что передано через post(), выполняются
+    в потоке Tk. Результаты отменённых задач молча отбрасываются. Без
+    активных задач таймер не крутится: post() будит цикл Tk сам. Это
+    можно делать только в потоковой сборке Tcl; в остальных очередь
+    опрашивается и без задач, раз в IDLE_POLL_MS.
+    """
+
+    def __init__(self, root, max_workers: int = 4):
+        self.root = root
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="launcher")
+        self.results: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._active = 0
+        self._lock = threading.Lock()
+        self._polling = False
+        # В потоковой сборке _tkinter сам передаёт вызов из другого потока в цикл Tk
+        self.threaded = bool(int(root.tk.call("info", "exists", "tcl_platform(threaded)")))
+        self.root.bind(WAKE_EVENT, lambda event: self._schedule())
+        if not self.threaded:
+            self._schedule()
+
+    def submit(self, token: CancelToken, fn: Callable, *args,
+               on_done: Optional[Callable] = None,
+               on_error: Optional[Callable] = None):
+        """Запуск fn(*args) в пуле (вызывать из потока Tk)"""
+
+        def run():
+            try:
+                if token.is_set():
+                    return
+                try:
+                    result = fn(*args)
+                except Exception as e:
+                    if on_error:
+                        self.post(token, on_error, e)
+                    else:
+                        print(f"Ошибка фоновой задачи {getattr(fn, '__name__', fn)}: {e}")
+                else:
+                    if on_done:
+                        self.post(token, on_done, result)
+            finally:
+                with self._lock:
+                    self._active -= 1
+
+        with self._lock:
+            self._active += 1
+        future = self.executor.submit(run)
+        self._schedule()
+        return future
+
+    def post(self, token: CancelToken, callback: Callable, *args):
+        """Передать вызов callback(*args) в поток Tk (можно из любого потока)"""
+        self.results.put((token, callback, args))
+        if not self._polling and self.threaded:
+            # Таймер остановлен: будим цикл Tk виртуальным событием, чтобы
+            # долгоживущие источники (наблюдатели, ожидание процесса) не
+            # требовали постоянного опроса очереди
+            try:
+                self.root.event_generate(WAKE_EVENT, when="tail")
+            except (RuntimeError, tk.TclError) as e:
+                # Цикл Tk не запущен или окно закрыто: результат дождётся
+                # следующего опроса очереди
+                print(f"Не удалось разбудить цикл Tk: {e}")
+
+    def _schedule(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        deadline = time.perf_counter() + POLL_BUDGET
+        while time.perf_counter() < deadline:
+            try:
+                token, callback, args = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if token.is_set():
+                continue
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Ошибка обработки результата: {e}")
+
+        # Пока нет активных задач, таймер не крутится
+        with self._lock:
+            idle = self._active == 0
+        if not self.threaded:
+            self.root.after(IDLE_POLL_MS if idle else POLL_MS, self._poll)
+        elif idle and self.results.empty():
+            self._polling = False
+            # Результат мог прийти между проверкой и сбросом флага
+            if not self.results.empty():
+                self._schedule()
+        else:
+            self.root.after(POLL_MS, self._poll)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Batcher:
+    """Собирает результаты из фонового потока и отдаёт их в Tk пачками.
+
+    Первая пачка уходит сразу, дальше - не чаще раза в interval секунд
+    или при накоплении size элементов.
+    """
+
+    def __init__(self, runner: TaskRunner, token: CancelToken, callback: Callable,
+                 size: int = 200, interval: float = 0.1):
+        self.runner = runner
+        self.token = token
+        self.callback = callback
+        self.size = size
+        self.interval = interval
+        self.items = []
+        self.last_flush = 0.0
+
+    def add(self, item):
+        self.items.append(item)
+        if (len(self.items) >= self.size
+                or time.perf_counter() - self.last_flush >= self.interval):
+            self.flush()
+
+    def flush(self):
+        if self.items:
+            self.runner.post(self.token, self.callback, self.items)
+            self.items = []
+        self.last_flush = time.perf_counter()
@@ -0,0 +1,272 @@
+"""Очередь установки предметов Workshop через steamcmd"""
+import math
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Union
+
+GMOD_APPID = "4000"
+DEFAULT_WORKERS = 2
+# Сколько предметов качает одна сессия steamcmd (один вход в аккаунт)
+BATCH_SIZE = 200
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 5.0
+# Своя папка steamcmd в библиотеке Steam: манифест клиента Steam он не трогает
+STAGING_DIR = "gmod_launcher_steamcmd"
+
+_SUCCESS = re.compile(r"Success\. Downloaded item (\d+)")
+_FAILURE = re.compile(r"ERROR! (?:Download item|Timeout downloading item) (\d+)(.*)")
+_STARTED = re.compile(r"Downloading item (\d+)")
+_PROGRESS = re.compile(r"progress: ([\d.]+)")
+_WORKSHOP_ID = re.compile(r"[?&]id=(\d+)")
+
+
+class DownloadEvent(NamedTuple):
+    kind: str           # queued, started, progress, done, retry, failed, finished
+    item_id: str = ""
+    progress: float = 0.0
+    message: str = ""
+
+
+def parse_ids(text: str) -> List[str]:
+    """ID предметов из вставленного текста: ссылки Workshop или числа через
+    пробел, запятую или с новой строки (например, содержимое коллекции)"""
+    ids = _WORKSHOP_ID.findall(text)
+    if not ids:
+        ids = [token for token in re.split(r"[\s,;]+", text) if token.isdigit()]
+    return list(dict.fromkeys(ids))
+
+
+def find_steamcmd(steam_path: Optional[str] = None) -> Optional[str]:
+    """steamcmd рядом со Steam или в PATH"""
+    name = "steamcmd.exe" if sys.platform == "win32" else "steamcmd.sh"
+    if steam_path:
+        for candidate in (name, os.path.join("steamcmd", name)):
+            path = os.path.join(steam_path, candidate)
+            if os.path.isfile(path):
+                return path
+    return shutil.which("steamcmd")
+
+
+def build_command(steamcmd: Sequence[str], item_ids: Sequence[str],
+                  install_dir: Optional[str] = None, appid: str = GMOD_APPID) -> List[str]:
+    """Одна сессия: вход и несколько +workshop_download_item подряд"""
+    command = list(steamcmd)
+    if install_dir:
+        # force_install_dir действует, только если стоит до входа
+        command += ["+force_install_dir", install_dir]
+    command += ["+login", "anonymous"]
+    for item_id in item_ids:
+        command += ["+workshop_download_item", appid, item_id]
+    command.append("+quit")
+    return command
+
+
+class WorkshopQueue:
+    """Очередь ID с несколькими параллельными сессиями steamcmd.
+
+    Каждый рабочий поток забирает пачку ID и скачивает её за одну
+    сессию. Итог по предмету берётся из вывода steamcmd; предметы без
+    подтверждения успеха повторяются с растущей паузой. on_event
+    вызывается из рабочих потоков.
+
+    steamcmd качает в install_dir и пишет там свой appworkshop_4000.acf.
+    Если задан target_dir, готовый предмет переносится туда (в папку
+    Workshop игры), а манифест клиента Steam остаётся нетронутым.
+    """
+
+    def __init__(self, steamcmd: Union[str, Sequence[str]], on_event: Callable[[DownloadEvent], None],
+                 install_dir: Optional[str] = None, workers: int = DEFAULT_WORKERS,
+                 batch_size: int = BATCH_SIZE, max_attempts: int = MAX_ATTEMPTS,
+                 backoff: float = BACKOFF_BASE, target_dir: Optional[str] = None):
+        self.steamcmd = [steamcmd] if isinstance(steamcmd, str) else list(steamcmd)
+        self.on_event = on_event
+        self.install_dir = install_dir
+        self.target_dir = target_dir
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+
+        self.pending: "deque[str]" = deque()
+        self.attempts: Dict[str, int] = {}
+        # ID -> момент, раньше которого повтор не запускается
+        self.retry_at: Dict[str, float] = {}
+        self.active: set = set()
+        self.sessions = 0
+        self._running = 0
+        self._busy = 0
+        self._processes: List[subprocess.Popen] = []
+        self._cancelled = False
+        self._cond = threading.Condition()
+
+    def add(self, item_ids: Sequence[str]):
+        """Добавить ID; уже стоящие в очереди или качающиеся пропускаются"""
+        events = []
+        with self._cond:
+            for item_id in item_ids:
+                if item_id in self.active or item_id in self.pending:
+                    continue
+                self.attempts[item_id] = 0
+                self.retry_at.pop(item_id, None)
+                self.pending.append(item_id)
+                events.append(DownloadEvent("queued", item_id))
+            while self._running < self.workers and self._running < len(self.pending):
+                self._running += 1
+                threading.Thread(target=self._worker, name="steamcmd", daemon=True).start()
+            self._cond.notify_all()
+        # События отдаются вне блокировки: обработчик может ждать поток Tk
+        for event in events:
+            self._emit(event)
+
+    @property
+    def idle(self) -> bool:
+        """Ничего не ждёт очереди и не качается"""
+        with self._cond:
+            return self._running == 0 and not self.pending and not self.active
+
+    def cancel(self):
+        with self._cond:
+            self._cancelled = True
+            self.pending.clear()
+            processes = list(self._processes)
+            self._cond.notify_all()
+        for process in processes:
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+    def _emit(self, event: DownloadEvent):
+        try:
+            self.on_event(event)
+        except Exception as e:
+            print(f"Ошибка обработки события загрузки: {e}")
+
+    def _take_batch(self) -> List[str]:
+        """Пачка для одной сессии (под блокировкой); ждёт, пока подойдёт время повторов"""
+        while not self._cancelled:
+            now = time.monotonic()
+            ready = [i for i in self.pending if self.retry_at.get(i, 0) <= now]
+            if ready:
+                # Очередь делится поровну между свободными потоками
+                idle = max(self._running - self._busy, 1)
+                size = min(self.batch_size, math.ceil(len(ready) / idle))
+                batch = ready[:size]
+                for item_id in batch:
+                    self.pending.remove(item_id)
+                    self.active.add(item_id)
+                return batch
+            if not self.pending:
+                return []
+            self._cond.wait(min(self.retry_at.get(i, now) for i in self.pending) - now)
+        return []
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+                if not batch:
+                    self._running -= 1
+                    finished = self._running == 0 and not self.active
+                    break
+                self.sessions += 1
+                self._busy += 1
+            self._run_session(batch)
+            with self._cond:
+                self._busy -= 1
+        if finished and not self._cancelled:
+            self._emit(DownloadEvent("finished"))
+
+    def _deliver(self, item_id: str) -> str:
+        """Перенос скачанного предмета в target_dir; пустая строка - успех"""
+        if not self.target_dir:
+            return ""
+        content = os.path.join(self.install_dir or ".", "steamapps", "workshop", "content", GMOD_APPID)
+        source = os.path.join(content, item_id)
+        target = os.path.join(self.target_dir, item_id)
+        # Прежняя версия отодвигается к steamcmd и удаляется после переноса новой
+        old = os.path.join(content, item_id + ".old")
+        try:
+            os.makedirs(self.target_dir, exist_ok=True)
+            if os.path.exists(target):
+                shutil.rmtree(old, ignore_errors=True)
+                shutil.move(target, old)
+            try:
+                shutil.move(source, target)
+            except OSError:
+                if os.path.exists(old) and not os.path.exists(target):
+                    shutil.move(old, target)
+                raise
+            shutil.rmtree(old, ignore_errors=True)
+        except OSError as e:
+            return f"не удалось перенести в {self.target_dir}: {e}"
+        return ""
+
+    def _run_session(self, batch: List[str]):
+        results: Dict[str, str] = {}
+        output: List[str] = []
+        current = None
+        try:
+            process = subprocess.Popen(
+                build_command(self.steamcmd, batch, self.install_dir),
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                text=True, errors="replace", bufsize=1)
+        except OSError as e:
+            output.append(str(e))
+            process = None
+        if process is not None:
+            with self._cond:
+                self._processes.append(process)
+            for line in process.stdout:
+                line = line.strip()
+                output.append(line)
+                match = _SUCCESS.search(line)
+                if match:
+                    error = self._deliver(match.group(1))
+                    results[match.group(1)] = error
+                    if not error:
+                        self._emit(DownloadEvent("done", match.group(1), 100.0))
+                    continue
+                match = _FAILURE.search(line)
+                if match:
+                    results[match.group(1)] = match.group(2).strip(" .()") or line
+                    continue
+                match = _STARTED.search(line)
+                if match:
+                    current = match.group(1)
+                    self._emit(DownloadEvent("started", current))
+                    continue
+                match = _PROGRESS.search(line)
+                if match and current:
+                    self._emit(DownloadEvent("progress", current, float(match.group(1))))
+            process.wait()
+            with self._cond:
+                self._processes.remove(process)
+
+        reason = output[-1] if output else "steamcmd завершился без вывода"
+        events = []
+        with self._cond:
+            for item_id in batch:
+                self.active.discard(item_id)
+                if item_id in results and not results[item_id]:
+                    continue
+                if self._cancelled:
+                    continue
+                error = results.get(item_id) or reason
+                self.attempts[item_id] += 1
+                if self.attempts[item_id] < self.max_attempts:
+                    delay = self.backoff * 2 ** (self.attempts[item_id] - 1)
+                    self.retry_at[item_id] = time.monotonic() + delay
+                    self.pending.append(item_id)
+                    events.append(DownloadEvent("retry", item_id, message=error))
+                else:
+                    events.append(DownloadEvent("failed", item_id, message=error))
+            self._cond.notify_all()
+        for event in events:
+            self._emit(event)